@@ -3,9 +3,13 @@ from dspace.models.base import Equations
 from dspace.models.gma import GMASystem
 from dspace.models.ssystem import SSystem
 from dspace.models.designspace import DesignSpace
-from dspace.models.case import Case, CaseIntersection, CaseColocalization
+from dspace.models.case import Case, CaseIntersection, CaseColocalization, CaseHandle
 from dspace.variables import VariablePool
 from dspace.expressions import Expression
+from dspace.executors import SerialExecutor, ThreadExecutor, ProcessExecutor
+from dspace.profiling import profile
+from dspace.handles import enable_leak_tracking, disable_leak_tracking, outstanding_allocations, leak_report
+from dspace.archive import save_analysis, load_analysis
 
 
 
@@ -0,0 +1,505 @@
+''' A versioned, chunked file format for saved design space analyses.
+
+An archive is a sequence of independently encoded sections followed by an
+index, so that a section is only read and decoded when it is requested. The
+file starts with a magic number and the version of the format, and ends with
+the position of the index and the magic number:
+
+    magic (8 bytes) | major, minor version (2 x uint16)
+    section | section | ... | index (JSON)
+    index offset, index length (2 x uint64) | magic (8 bytes)
+
+Each entry of the index has the name, offset, length and CRC-32 checksum of
+a section, its encoding ('bytes', 'pickle' or 'json'), whether it is
+compressed with zlib and a dictionary of metadata that is available without
+decoding the section. Archives with a different major version cannot be
+read; fields of the index added by later minor versions are ignored.
+
+An analysis is saved with the design space, each cached case, the cached
+lists of valid cases, each parameter set and each figure image in separate
+sections:
+
+    >>> dspace.save_analysis('analysis.dsa', ds, parameter_sets={'Figure 1':pvals})
+    >>> analysis = dspace.load_analysis('analysis.dsa')
+    >>> ds = analysis.design_space
+    >>> case = analysis.case('1')
+
+An analysis can be saved again from the analysis it was loaded from, in
+which case the design space, the cases and the figures that are unchanged
+are copied from the open archive without decoding them. If the archive is
+saved to its own path, it is closed while the file is replaced and reopened
+afterwards.
+
+'''
+
+import cPickle as pickle
+import json
+import os
+import struct
+import threading
+import zlib
+
+from collections import OrderedDict
+
+MAGIC = 'DSPACE\x00A'
+FORMAT_VERSION = (1, 0)
+
+_header = struct.Struct('<8sHH')
+_footer = struct.Struct('<QQ8s')
+
+_ENCODINGS = ['bytes', 'pickle', 'json']
+
+
+def is_archive(path):
+    ''' Returns True if the file at path starts with the magic number of an
+        archive.
+    '''
+    f = open(path, 'rb')
+    magic = f.read(len(MAGIC))
+    f.close()
+    return magic == MAGIC
+
+def _encode(value, encoding):
+    if encoding == 'bytes':
+        return str(value)
+    if encoding == 'pickle':
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return json.dumps(value)
+
+def _replace(source, destination):
+    try:
+        os.rename(source, destination)
+    except OSError:
+        os.remove(destination)
+        os.rename(source, destination)
+
+def _decode(data, encoding):
+    if encoding == 'bytes':
+        return data
+    if encoding == 'pickle':
+        return pickle.loads(data)
+    return json.loads(data)
+
+
+class ArchiveSection(object):
+    ''' A section of an archive, which is read and decoded by load. '''
+
+    def __init__(self, archive, entry):
+        setattr(self, 'archive', archive)
+        setattr(self, 'entry', entry)
+
+    def __repr__(self):
+        return 'ArchiveSection: ' + self.name
+
+    @property
+    def name(self):
+        return self.entry['name']
+
+    @property
+    def encoding(self):
+        return self.entry['encoding']
+
+    @property
+    def metadata(self):
+        return self.entry.get('metadata', dict())
+
+    def raw(self):
+        ''' Returns the bytes of the section as stored in the file. '''
+        return self.archive._read(self.entry)
+
+    def load(self):
+        ''' Reads and decodes the section. '''
+        data = self.raw()
+        if self.entry['compressed'] is True:
+            data = zlib.decompress(data)
+        return _decode(data, self.encoding)
+
+
+class ArchiveWriter(object):
+    ''' Writes the sections of an archive to a temporary file, which
+        replaces the file at path when the writer is closed. If replaces is
+        the open archive of that file, it is reopened once the file is
+        replaced, and the sections copied from it refer to their copies.
+    '''
+
+    def __init__(self, path, replaces=None):
+        setattr(self, 'path', path)
+        setattr(self, 'replaces', replaces)
+        setattr(self, 'entries', list())
+        setattr(self, '_names', set())
+        setattr(self, '_copies', dict())
+        setattr(self, '_temporary', path + '.tmp')
+        setattr(self, '_file', open(self._temporary, 'wb'))
+        self._file.write(_header.pack(MAGIC, *FORMAT_VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+    def add(self, name, value, encoding='pickle', compress=None, metadata=None):
+        ''' Adds a section with a value encoded as 'bytes', 'pickle' or
+            'json'. A section of another archive is copied without decoding
+            it. Sections are compressed, except for bytes, unless compress
+            is False.
+        '''
+        if name in self._names:
+            raise ValueError, 'The archive already has a section named ' + name
+        if isinstance(value, ArchiveSection) is True:
+            data = value.raw()
+            encoding = value.encoding
+            compressed = value.entry['compressed']
+            if metadata is None:
+                metadata = value.metadata
+            if value.archive is self.replaces:
+                self._copies[name] = value
+        else:
+            if encoding not in _ENCODINGS:
+                raise ValueError, 'Unknown encoding: ' + str(encoding)
+            if compress is None:
+                compress = encoding != 'bytes'
+            data = _encode(value, encoding)
+            compressed = compress is True
+            if compressed is True:
+                data = zlib.compress(data)
+        entry = dict(name=name,
+                     encoding=encoding,
+                     compressed=compressed,
+                     offset=self._file.tell(),
+                     length=len(data),
+                     crc=zlib.crc32(data) & 0xffffffff)
+        if metadata:
+            entry['metadata'] = metadata
+        self._file.write(data)
+        self.entries.append(entry)
+        self._names.add(name)
+
+    def close(self):
+        ''' Writes the index and replaces the file at path. '''
+        if self._file is None:
+            return
+        index = json.dumps(self.entries)
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_footer.pack(offset, len(index), MAGIC))
+        self._file.close()
+        self._file = None
+        replaces = self.replaces
+        if replaces is None:
+            _replace(self._temporary, self.path)
+            return
+        replaces.close()
+        try:
+            _replace(self._temporary, self.path)
+        except:
+            replaces._open()
+            raise
+        replaces._open(copies=self._copies)
+
+    def discard(self):
+        ''' Closes and removes the temporary file without replacing the
+            file at path.
+        '''
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self._temporary)
+
+
+class Archive(object):
+    ''' An archive opened for reading. Only the index is read when it is
+        opened, and the file stays open until close is called so that its
+        sections can be loaded later.
+    '''
+
+    def __init__(self, path):
+        setattr(self, 'path', path)
+        setattr(self, '_lock', threading.Lock())
+        setattr(self, '_file', None)
+        setattr(self, 'sections', OrderedDict())
+        self._open()
+
+    def _open(self, copies=None):
+        ''' Opens the file and reads its index. The section objects in
+            copies, keyed by their name in the file, are reused for those
+            sections.
+        '''
+        path = self.path
+        self._file = open(path, 'rb')
+        try:
+            header = self._file.read(_header.size)
+            if len(header) < _header.size or header[:len(MAGIC)] != MAGIC:
+                raise ValueError, path + ' is not a dspace archive'
+            magic, major, minor = _header.unpack(header)
+            if major != FORMAT_VERSION[0]:
+                raise ValueError, ('Archive format version ' + str(major) + '.' + str(minor) +
+                                   ' is not supported')
+            setattr(self, 'version', (major, minor))
+            self._file.seek(-_footer.size, os.SEEK_END)
+            offset, length, magic = _footer.unpack(self._file.read(_footer.size))
+            if magic != MAGIC:
+                raise ValueError, path + ' is truncated'
+            self._file.seek(offset)
+            entries = json.loads(self._file.read(length))
+        except:
+            self._file.close()
+            raise
+        if copies is None:
+            copies = dict()
+        sections = OrderedDict()
+        for entry in entries:
+            entry['name'] = str(entry['name'])
+            section = copies.get(entry['name'])
+            if section is None:
+                section = ArchiveSection(self, entry)
+            section.entry = entry
+            sections[entry['name']] = section
+        self.sections = sections
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def __getitem__(self, name):
+        return self.sections[name]
+
+    def names(self, prefix=''):
+        ''' Returns the names of the sections that start with prefix. '''
+        return [name for name in self.sections if name.startswith(prefix)]
+
+    def load(self, name):
+        ''' Reads and decodes the section with the given name. '''
+        return self.sections[name].load()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self, entry):
+        with self._lock:
+            if self._file is None:
+                raise ValueError, 'The archive ' + self.path + ' is closed'
+            self._file.seek(entry['offset'])
+            data = self._file.read(entry['length'])
+        if len(data) != entry['length'] or zlib.crc32(data) & 0xffffffff != entry['crc']:
+            raise ValueError, 'Section ' + entry['name'] + ' of ' + self.path + ' is corrupted'
+        return data
+
+
+class SavedAnalysis(object):
+    ''' An analysis read from an archive written by save_analysis. Each part
+        of the analysis is decoded the first time it is used.
+    '''
+
+    def __init__(self, path, design_space=None):
+        setattr(self, 'archive', Archive(path))
+        setattr(self, '_design_space', design_space)
+        setattr(self, '_loaded', dict())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self.archive.close()
+
+    @property
+    def version(self):
+        return self.archive.version
+
+    @property
+    def path(self):
+        return self.archive.path
+
+    def _section(self, name, default=None):
+        if name not in self._loaded:
+            if name in self.archive:
+                self._loaded[name] = self.archive.load(name)
+            else:
+                self._loaded[name] = default
+        return self._loaded[name]
+
+    @property
+    def design_space(self):
+        ''' The design space, with the cached lists of valid cases. '''
+        if self._design_space is None and 'design_space' in self.archive:
+            ds = self.archive.load('design_space')
+            caches = self._section('valid_cases_cache', dict())
+            for key, cases in caches.get('valid_cases', []):
+                ds._valid_cases_cache.put(key, cases)
+            for key, valid in caches.get('intersections', []):
+                ds._intersections_cache.put(key, valid)
+            self._design_space = ds
+        return self._design_space
+
+    @property
+    def case_numbers(self):
+        ''' The case numbers of the saved cases. '''
+        return [str(self.archive[name].metadata['case_number'])
+                for name in self.archive.names('case/')]
+
+    @property
+    def _case_sections(self):
+        ''' The names of the sections of the saved cases, keyed by their
+            case number and tuple of constraints, read once from the index.
+        '''
+        if 'case_sections' not in self._loaded:
+            sections = dict()
+            for name in self.archive.names('case/'):
+                metadata = self.archive[name].metadata
+                constraints = metadata.get('constraints')
+                key = (str(metadata['case_number']),
+                       None if constraints is None else tuple(constraints))
+                sections.setdefault(key, name)
+            self._loaded['case_sections'] = sections
+        return self._loaded['case_sections']
+
+    def case(self, case_number, constraints=None):
+        ''' Returns a case, which is decoded from the archive if it was
+            saved or calculated by the design space otherwise, and is added
+            to the case cache of the design space.
+        '''
+        case_number = str(case_number)
+        if constraints is not None:
+            if isinstance(constraints, list) is False:
+                constraints = [constraints]
+            constraints = list(constraints)
+        ds = self.design_space
+        key = (case_number, None if constraints is None else tuple(constraints))
+        name = self._case_sections.get(key)
+        if name is None:
+            return ds(case_number, constraints=constraints)
+        case = self.archive.load(name)
+        ds._case_cache.put(key, case)
+        return case
+
+    @property
+    def parameter_sets(self):
+        ''' An ordered dictionary of the saved parameter sets. '''
+        if 'parameter_sets' not in self._loaded:
+            parameter_sets = OrderedDict()
+            for name in self.archive.names('parameters/'):
+                parameter_sets[self.archive[name].metadata['name']] = self.archive.load(name)
+            self._loaded['parameter_sets'] = parameter_sets
+        return self._loaded['parameter_sets']
+
+    @property
+    def figures(self):
+        ''' The saved figures, as tuples of the section of the image, which
+            is read by its load method, and the saved figure data.
+        '''
+        info = self._section('figures', [])
+        return [(self.archive['figure/' + str(i)],) + tuple(info[i])
+                for i in xrange(len(info))]
+
+    @property
+    def tables(self):
+        return self._section('tables', [])
+
+    @property
+    def settings(self):
+        ''' The dictionary of settings of the analysis. '''
+        return self._section('settings', dict())
+
+
+def save_analysis(path, design_space=None, parameter_sets=None, figures=None,
+                  tables=None, settings=None, cases=True, source=None):
+    ''' Saves an analysis of a design space to an archive.
+
+    Args:
+        path (str): The path of the archive, which is replaced if it exists.
+
+    Kwargs:
+        design_space (DesignSpace): The design space that is analyzed.
+
+        parameter_sets (dict): Parameter sets, keyed by name.
+
+        figures (list): Figures as tuples of the PNG image, or a section of
+            a saved analysis, followed by any picklable figure data, such
+            as the title, caption and parameter values.
+
+        tables (list): Picklable tables.
+
+        settings (dict): Other picklable settings of the analysis.
+
+        cases (bool): If True, the cases in the case cache of the design
+            space and its cached lists of valid cases are saved.
+
+        source (SavedAnalysis): The open analysis the design space was
+            loaded from. Its design space and saved cases are copied without
+            encoding them again, and it is reopened if it is saved to its
+            own path.
+    '''
+    replaced = None
+    if source is not None:
+        if os.path.abspath(source.path) == os.path.abspath(path):
+            replaced = source
+        if source.design_space is not design_space:
+            source = None
+    replaces = None if replaced is None else replaced.archive
+    with ArchiveWriter(path, replaces=replaces) as writer:
+        if design_space is not None:
+            if source is not None and 'design_space' in source.archive:
+                writer.add('design_space', source.archive['design_space'])
+            else:
+                writer.add('design_space', design_space)
+            if cases is True:
+                saved = set()
+                if source is not None:
+                    for name in source.archive.names('case/'):
+                        section = source.archive[name]
+                        metadata = section.metadata
+                        constraints = metadata.get('constraints')
+                        saved.add((str(metadata['case_number']),
+                                   None if constraints is None else tuple(constraints)))
+                        writer.add('case/' + str(len(saved)-1), section)
+                number = len(saved)
+                for key, case in design_space._case_cache.items():
+                    if (str(key[0]), key[1]) in saved:
+                        continue
+                    metadata = dict(case_number=key[0],
+                                    constraints=None if key[1] is None else list(key[1]))
+                    writer.add('case/' + str(number), case, metadata=metadata)
+                    number += 1
+                caches = dict(valid_cases=design_space._valid_cases_cache.items(),
+                              intersections=design_space._intersections_cache.items())
+                writer.add('valid_cases_cache', caches)
+        if parameter_sets is not None:
+            for i, name in enumerate(parameter_sets):
+                writer.add('parameters/' + str(i), parameter_sets[name], metadata=dict(name=name))
+        if figures is not None:
+            info = list()
+            for i, figure in enumerate(figures):
+                writer.add('figure/' + str(i), figure[0], encoding='bytes')
+                info.append(tuple(figure[1:]))
+            writer.add('figures', info)
+        if tables is not None:
+            writer.add('tables', list(tables))
+        if settings is not None:
+            writer.add('settings', dict(settings))
+    if replaced is not None:
+        replaced._loaded.clear()
+        replaced._design_space = design_space
+
+def load_analysis(path, design_space=None):
+    ''' Opens an archive written by save_analysis. Nothing but the index of
+        the archive is read until the parts of the analysis are used. If a
+        design space is given, it is used instead of the saved one.
+    '''
+    return SavedAnalysis(path, design_space=design_space)
@@ -0,0 +1,14 @@
+''' Benchmarks of the performance of the design space analysis.
+
+The benchmarks time the construction of design spaces, the enumeration of
+valid cases and intersections, steady state functions and plotting, for the
+example models and synthetic networks of increasing size. They are run from
+the command line with python -m dspace.benchmarks, which also measures how
+the number of cases and the analysis time scale with the size of synthetic
+models with the --scaling option.
+
+'''
+
+from dspace.benchmarks.generators import chain, feedback_loop, cascade, gma_system
+from dspace.benchmarks.models import BenchmarkModel, get_models, synthetic_model
+from dspace.benchmarks.suite import BENCHMARKS, run_benchmark, run_benchmarks, compare_results, run_scaling
@@ -0,0 +1,94 @@
+''' Command line runner of the benchmarks.
+
+Usage:
+    python -m dspace.benchmarks [--models NAME ...] [--benchmarks NAME ...]
+                                [--repeat N] [--output FILE]
+                                [--baseline FILE] [--tolerance FRACTION]
+    python -m dspace.benchmarks --scaling TOPOLOGY [--sizes N ...]
+                                [--repeat N] [--output FILE]
+
+The results are written as JSON to the output file, or to standard output.
+If a baseline file written by a previous run is given, the benchmarks that
+are slower than the baseline, that failed or that are in the baseline for the
+requested models and benchmarks but were not run are reported as regressions
+and the exit status is 1. With the --scaling option, the number of cases
+and the time to construct the design space and calculate its valid cases are
+measured for synthetic models of a topology with increasing sizes.
+
+'''
+
+import argparse
+import json
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+from dspace.benchmarks.suite import BENCHMARKS, run_benchmarks, compare_results, run_scaling
+from dspace.benchmarks.models import get_models
+from dspace.benchmarks.generators import TOPOLOGIES
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog='python -m dspace.benchmarks',
+                                     description='Runs the dspace benchmarks.')
+    parser.add_argument('--models', nargs='+', default=None,
+                        help='models to benchmark, e.g. example_1 or chain_8')
+    parser.add_argument('--benchmarks', nargs='+', default=None,
+                        choices=BENCHMARKS.keys(),
+                        help='benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions of each benchmark')
+    parser.add_argument('--output', default=None,
+                        help='file where the JSON results are written')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown reported as a regression')
+    parser.add_argument('--scaling', default=None, choices=sorted(TOPOLOGIES.keys()),
+                        help='measures the scaling of a synthetic topology')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1, 2, 3, 4, 5, 6],
+                        help='sizes of the synthetic models of a scaling run')
+    parser.add_argument('--list', action='store_true',
+                        help='lists the models and benchmarks and exits')
+    options = parser.parse_args(arguments)
+    if options.list is True:
+        print 'Models: ' + ', '.join([model.name for model in get_models()])
+        print 'Benchmarks: ' + ', '.join(BENCHMARKS.keys())
+        print 'Topologies: ' + ', '.join(sorted(TOPOLOGIES.keys()))
+        return 0
+    if options.scaling is not None:
+        results = run_scaling(options.scaling, options.sizes, repeat=options.repeat)
+    else:
+        results = run_benchmarks(models=options.models,
+                                 benchmarks=options.benchmarks,
+                                 repeat=options.repeat,
+                                 verbose=True)
+    if options.output is None:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        f = open(options.output, 'w')
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.close()
+    if options.baseline is None or options.scaling is not None:
+        return 0
+    f = open(options.baseline, 'r')
+    baseline = json.load(f)
+    f.close()
+    regressions = compare_results(results, baseline, tolerance=options.tolerance)
+    for regression in regressions:
+        if regression['reason'] == 'error':
+            message = 'Regression: {model} {benchmark} failed ({error})\n'
+        elif regression['reason'] == 'missing':
+            message = 'Regression: {model} {benchmark} is missing from the results\n'
+        else:
+            message = ('Regression: {model} {benchmark} {time:.4f} s '
+                       '(baseline {baseline:.4f} s, x{ratio:.2f})\n')
+        sys.stderr.write(message.format(**regression))
+    if len(regressions) > 0:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
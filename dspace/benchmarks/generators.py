@@ -0,0 +1,159 @@
+''' Generators of synthetic GMA systems for scaling tests.
+
+The generators build families of models whose size is set by their
+arguments, so that the number of cases of a design space, which is the
+product of the number of positive and negative terms of each equation given
+by its signature, can be increased systematically. Every generator returns an
+Equations object. The names of the dependent variables are X1, X2, ..., the
+input of the system is the independent variable X0, and the rate constants of
+the positive and negative terms of the equation of Xi are named kiPj and kiNj.
+
+Extra positive terms are basal and cooperative production terms, extra
+negative terms are higher order degradation terms, and regulatory
+interactions multiply the first positive term of a randomly chosen equation
+by a power of a randomly chosen variable, using the seed for reproducibility.
+
+'''
+
+import random
+
+from dspace.models.base import Equations
+
+
+def _power(variable, order):
+    if order == 0:
+        return ''
+    if order == 1:
+        return '*' + variable
+    return '*' + variable + '^' + repr(order)
+
+def _equation(variable, positive, negative):
+    return variable + '. = ' + ' + '.join(positive) + ' - ' + ' - '.join(negative)
+
+def _extend_terms(index, variable, upstream, positive, negative,
+                  positive_terms, negative_terms):
+    for j in xrange(len(positive)+1, positive_terms+1):
+        order = 0 if j == 2 else j-1
+        positive.append('k' + str(index) + 'P' + str(j) + _power(upstream, order))
+    for j in xrange(len(negative)+1, negative_terms+1):
+        negative.append('k' + str(index) + 'N' + str(j) + _power(variable, j))
+
+def _factors(term):
+    return [factor.split('^')[0] for factor in term.split('*')]
+
+def _regulate(equations, regulations, kinetic_order, seed):
+    if regulations == 0:
+        return
+    variables = [equation[0] for equation in equations]
+    pairs = [(i, regulator) for i in xrange(len(equations)) for regulator in variables
+             if regulator != variables[i] and regulator not in _factors(equations[i][1][0])]
+    if regulations > len(pairs):
+        raise ValueError, 'The system has at most ' + str(len(pairs)) + ' regulatory interactions'
+    generator = random.Random(seed)
+    for target, regulator in generator.sample(pairs, regulations):
+        order = generator.choice([-kinetic_order, kinetic_order])
+        equations[target][1][0] += _power(regulator, order)
+
+def _gma_equations(equations):
+    return Equations([_equation(*equation) for equation in equations])
+
+def chain(number_of_variables, positive_terms=1, negative_terms=1,
+          regulations=0, feedback=None, kinetic_order=0.5, seed=0):
+    ''' Returns the equations of a linear pathway, X0 -> X1 -> ... -> Xn.
+
+    Args:
+        number_of_variables (int): The number of dependent variables.
+
+    Kwargs:
+        positive_terms (int): The number of positive terms of each equation.
+
+        negative_terms (int): The number of negative terms of each equation.
+
+        regulations (int): The number of random regulatory interactions.
+
+        feedback (str): 'negative' or 'positive' to regulate the first
+            reaction by the last variable, or None.
+
+        kinetic_order (float): The kinetic order of the regulatory
+            interactions and feedback.
+
+        seed: The seed of the random regulatory interactions.
+    '''
+    if number_of_variables < 1:
+        raise ValueError, 'A chain must have at least one variable'
+    if positive_terms < 1 or negative_terms < 1:
+        raise ValueError, 'Each equation must have positive and negative terms'
+    equations = []
+    for i in xrange(1, number_of_variables+1):
+        variable = 'X' + str(i)
+        upstream = 'X' + str(i-1)
+        positive = ['k' + str(i) + 'P1*' + upstream]
+        negative = ['k' + str(i) + 'N1*' + variable]
+        _extend_terms(i, variable, upstream, positive, negative,
+                      positive_terms, negative_terms)
+        equations.append((variable, positive, negative))
+    if feedback is not None:
+        if feedback not in ['negative', 'positive']:
+            raise ValueError, 'feedback must be "negative", "positive" or None'
+        order = -kinetic_order if feedback == 'negative' else kinetic_order
+        equations[0][1][0] += _power('X' + str(number_of_variables), order)
+    _regulate(equations, regulations, kinetic_order, seed)
+    return _gma_equations(equations)
+
+def feedback_loop(number_of_variables, sign='negative', **kwargs):
+    ''' Returns the equations of a linear pathway whose first reaction is
+        regulated by its last variable. The keyword arguments are those of
+        chain.
+    '''
+    return chain(number_of_variables, feedback=sign, **kwargs)
+
+def cascade(number_of_stages, positive_terms=2, negative_terms=2,
+            regulations=0, kinetic_order=0.5, seed=0):
+    ''' Returns the equations of a signaling cascade, in which the active
+        form of each stage activates the next stage.
+
+    Each stage i has an inactive form X(2i-1), which is synthesized,
+    activated by the previous stage and degraded, and an active form X(2i),
+    which is inactivated and degraded. The number of dependent variables is
+    twice the number of stages, and the keyword arguments are those of
+    chain. The number of terms refers to the equations of the inactive
+    forms, and the equations of the active forms have one positive term
+    less.
+    '''
+    if number_of_stages < 1:
+        raise ValueError, 'A cascade must have at least one stage'
+    if positive_terms < 2 or negative_terms < 2:
+        raise ValueError, 'The equations of a cascade have at least two terms of each sign'
+    equations = []
+    upstream = 'X0'
+    for i in xrange(1, number_of_stages+1):
+        inactive = 'X' + str(2*i-1)
+        active = 'X' + str(2*i)
+        activation = upstream + '*' + inactive
+        positive = ['k' + str(2*i-1) + 'P1',
+                    'k' + str(2*i-1) + 'P2*' + active]
+        negative = ['k' + str(2*i) + 'P1*' + activation,
+                    'k' + str(2*i-1) + 'N2*' + inactive]
+        _extend_terms(2*i-1, inactive, upstream, positive, negative,
+                      positive_terms, negative_terms)
+        equations.append((inactive, positive, negative))
+        positive = ['k' + str(2*i) + 'P1*' + activation]
+        negative = ['k' + str(2*i-1) + 'P2*' + active,
+                    'k' + str(2*i) + 'N2*' + active]
+        _extend_terms(2*i, active, upstream, positive, negative,
+                      positive_terms-1, negative_terms)
+        equations.append((active, positive, negative))
+        upstream = active
+    _regulate(equations, regulations, kinetic_order, seed)
+    return _gma_equations(equations)
+
+TOPOLOGIES = dict(chain=chain, feedback=feedback_loop, cascade=cascade)
+
+def gma_system(topology, size, **kwargs):
+    ''' Returns the equations of a synthetic system with a topology in
+        TOPOLOGIES and a size, which is the number of variables of a chain
+        or feedback loop and the number of stages of a cascade.
+    '''
+    if topology not in TOPOLOGIES:
+        raise ValueError, 'Unknown topology: ' + str(topology)
+    return TOPOLOGIES[topology](size, **kwargs)
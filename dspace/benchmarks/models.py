@@ -0,0 +1,166 @@
+''' Models used by the benchmarks.
+
+The example models are the systems analyzed by the scripts in dspace.examples,
+with the parameter values and axes used in those scripts. The synthetic models
+are chains, feedback loops and cascades produced by the generators in
+dspace.benchmarks.generators, which show how the analysis scales with the size
+of a model.
+
+'''
+
+import dspace
+from dspace.models.base import Equations
+from dspace.benchmarks.generators import TOPOLOGIES, gma_system
+
+
+class BenchmarkModel(object):
+
+    def __init__(self, name, equations, auxiliary_variables=[], parameters=None,
+                 xaxis='X3', yaxis='X4', x_range=[1e-3, 1e3], y_range=[1e-3, 1e3],
+                 function='log(X1)', **kwargs):
+        ''' Initializes a model with the equations, options and axes used
+            to benchmark its analysis.
+
+        Args:
+            name (str): The name used to identify the model in the results.
+
+            equations (list): A list of equations in string format, or an
+                Equations object.
+
+        Kwargs:
+            auxiliary_variables (list): The names of the auxiliary variables.
+
+            parameters (dict): The nominal parameter values. Independent
+                variables that are missing are set to 1, and if parameters
+                is None, a valid interior parameter set of the first valid
+                case is used.
+
+            xaxis, yaxis (str): The variables on the axes of 2D slices.
+
+            x_range, y_range (list): The ranges of the axes.
+
+            function (str): The steady state function that is benchmarked.
+
+        Any other keyword arguments are passed to the DesignSpace
+        constructor, such as resolve_cycles or constraints.
+        '''
+        if isinstance(equations, Equations) is True:
+            auxiliary_variables = equations.auxiliary_variables
+            equations = equations.system
+        setattr(self, 'name', name)
+        setattr(self, 'equations', list(equations))
+        setattr(self, 'auxiliary_variables', list(auxiliary_variables))
+        setattr(self, 'parameters', parameters)
+        setattr(self, 'xaxis', xaxis)
+        setattr(self, 'yaxis', yaxis)
+        setattr(self, 'x_range', x_range)
+        setattr(self, 'y_range', y_range)
+        setattr(self, 'function', function)
+        setattr(self, 'options', dict(kwargs))
+
+    def __repr__(self):
+        return 'BenchmarkModel(' + repr(self.name) + ')'
+
+    def design_space(self):
+        eq = dspace.Equations(self.equations,
+                              auxiliary_variables=self.auxiliary_variables)
+        return dspace.DesignSpace(eq, name=self.name, **self.options)
+
+    def parameter_values(self, ds):
+        pvals = dspace.VariablePool(names=ds.independent_variables)
+        if self.parameters is None:
+            valid_cases = ds.valid_cases(expand_cycles=False)
+            if len(valid_cases) > 0:
+                pvals.update(ds(valid_cases[0]).valid_interior_parameter_set())
+                return pvals
+            parameters = {}
+        else:
+            parameters = self.parameters
+        for name in ds.independent_variables:
+            pvals[name] = parameters.get(name, 1.)
+        return pvals
+
+    @property
+    def p_bounds(self):
+        p_bounds = dict()
+        p_bounds[self.xaxis] = self.x_range
+        p_bounds[self.yaxis] = self.y_range
+        return p_bounds
+
+
+EXAMPLE_MODELS = [
+    BenchmarkModel('example_1',
+                   ['X1. =     alpha*X1*X2*X3*X4 + X1*X2 - X1',
+                    'X2. = alpha^-1*X1*X2*X3*X4 + X1*X2 - X2'],
+                   parameters={'alpha':10}),
+    BenchmarkModel('example_2',
+                   ['X1. =     alpha*X5 + X1*X2 -     alpha*X1*X3*X4^-1 - X1',
+                    'X2. = (1/alpha)*X5 + X1*X2 - (1/alpha)*X2*X3*X4^-1 - X2',
+                    '  X5 = X1*X2*X3*X4'],
+                   auxiliary_variables=['X5'],
+                   parameters={'alpha':10}),
+    BenchmarkModel('example_3',
+                   ['X1. = 1000*X1^2*X2^-1 + 100*X2^-1 - X1*X3*X4',
+                    'X2. =      X1^2 + 1000 - X2'],
+                   parameters={}),
+    BenchmarkModel('example_4',
+                   ['X1. =     10*X1*X2*X3*X4 + X1*X2 - X1',
+                    'X2. = (1/10)*X1*X2*X3*X4 + X1*X2 - X2'],
+                   parameters={}),
+    BenchmarkModel('example_5',
+                   ['X1. = a1 + a2*X3 - b1*X1',
+                    'X2. = b1*X1 + a2*X3^2 - b2*X2'],
+                   parameters={'a1':0.1, 'a2':1e-2, 'X3':1,
+                               'b1':0.45, 'b2':0.45},
+                   xaxis='X3', yaxis='a2',
+                   x_range=[1e-4, 1e4], y_range=[1e-3, 1e0]),
+    BenchmarkModel('example_6',
+                   ['X1. = alpha*X5 + 2*k41*X4 + 4*gamma*X2^2 - 2*X1^2',
+                    'X2. = X1^2 + k32*X3 - X2*X8 - X2*X7 - 2*gamma*X2^2',
+                    'X3. = X2*X8 - k34*X3*X6 - k32*X3',
+                    'X4. = k34*X3*X6 + X2*X7 - k41*X4 - 2*beta*X4^2',
+                    'X6 = 1 + X3'],
+                   xaxis='X7', yaxis='X8',
+                   resolve_cycles=True, resolve_codominance=True),
+    BenchmarkModel('example_7',
+                   ['X1. = a1*X1^3*X2^2 - 6*X1^2*X2 - epsilon*X1',
+                    'X2. = 11*X2 - b1*6*X1^-1'],
+                   parameters={'epsilon':1e-20},
+                   xaxis='a1', yaxis='b1'),
+    ]
+
+def synthetic_model(topology, size, **kwargs):
+    ''' Returns a model of a synthetic system generated by gma_system,
+        with the input X0 and the rate constant of the first reaction on the
+        axes. The keyword arguments are passed to the generator.
+    '''
+    eq = gma_system(topology, size, **kwargs)
+    last = eq.dependent_variables[-1]
+    return BenchmarkModel(topology + '_' + str(size), eq,
+                          parameters={}, xaxis='X0', yaxis='k1P1',
+                          function='log(' + last + ')')
+
+def synthetic_models(sizes=(2, 4, 6)):
+    return [synthetic_model(topology, size) for topology in ['chain', 'feedback']
+            for size in sizes] + [synthetic_model('cascade', size//2) for size in sizes]
+
+def get_models(names=None):
+    ''' Returns the benchmark models with the given names, which are the
+        names of the example models and <topology>_<size> for a synthetic
+        model, e.g. chain_8 or cascade_3. Returns the example and default
+        synthetic models if names is None.
+    '''
+    models = EXAMPLE_MODELS + synthetic_models()
+    if names is None:
+        return models
+    by_name = {model.name:model for model in models}
+    selected = []
+    for name in names:
+        topology = name.rsplit('_', 1)[0]
+        if name in by_name:
+            selected.append(by_name[name])
+        elif topology in TOPOLOGIES:
+            selected.append(synthetic_model(topology, int(name.rsplit('_', 1)[1])))
+        else:
+            raise ValueError, 'Unknown benchmark model: ' + name
+    return selected
@@ -0,0 +1,296 @@
+''' Timing and memory benchmarks of the analysis of a design space.
+
+Each benchmark has a setup function, which is not timed, and a run function,
+which is timed. The setup function constructs a new design space for every
+repetition, so that results cached by a previous repetition do not affect the
+timings. Memory is reported as the largest increase of the current resident
+set size of the process during a run of a benchmark, in kilobytes, which is
+read from /proc/self/statm and is None where it is not available.
+
+'''
+
+from __future__ import division
+
+import gc
+import os
+import platform
+import sys
+import timeit
+
+from collections import OrderedDict
+
+import dspace
+from dspace.benchmarks.models import get_models, synthetic_model
+
+
+def _design_space(model):
+    ds = model.design_space()
+    pvals = model.parameter_values(ds)
+    ds.clear_valid_cases_cache()
+    ds.clear_case_cache()
+    p_bounds = dict(pvals)
+    p_bounds.update(model.p_bounds)
+    return dict(ds=ds, pvals=pvals, p_bounds=p_bounds)
+
+def _slice_cases(model):
+    state = _design_space(model)
+    ds = state['ds']
+    state['case_numbers'] = ds.valid_cases(p_bounds=state['p_bounds'], expand_cycles=False)
+    ds.clear_valid_cases_cache()
+    ds.clear_case_cache()
+    return state
+
+def _plot_setup(model):
+    import matplotlib.pyplot as plt
+    import dspace.plotutils
+    state = _design_space(model)
+    fig = plt.figure()
+    state['figure'] = fig
+    state['ax'] = fig.add_axes([0.2, 0.2, 0.7, 0.7])
+    return state
+
+def _close_figure(state):
+    import matplotlib.pyplot as plt
+    plt.close(state['figure'])
+
+
+def _run_design_space(model, state):
+    model.design_space()
+
+def _run_valid_cases(model, state):
+    state['ds'].valid_cases()
+
+def _run_valid_cases_slice(model, state):
+    state['ds'].valid_cases(p_bounds=state['p_bounds'])
+
+def _run_valid_intersecting_cases(model, state):
+    state['ds'].valid_intersecting_cases(3, state['case_numbers'],
+                                         p_bounds=state['p_bounds'])
+
+def _run_steady_state_function(model, state):
+    ds = state['ds']
+    for case in ds(state['case_numbers']):
+        case.steady_state_function(model.function, state['pvals'])
+
+def _run_draw_2D_slice(model, state):
+    state['ds'].draw_2D_slice(state['ax'], state['pvals'], model.xaxis, model.yaxis,
+                              model.x_range, model.y_range)
+
+def _run_draw_2D_ss_function(model, state):
+    state['ds'].draw_2D_ss_function(state['ax'], model.function, state['pvals'],
+                                    model.xaxis, model.yaxis,
+                                    model.x_range, model.y_range,
+                                    resolution=50)
+
+BENCHMARKS = OrderedDict([
+    ('design_space', (lambda model: {}, _run_design_space, None)),
+    ('valid_cases', (_design_space, _run_valid_cases, None)),
+    ('valid_cases_slice', (_design_space, _run_valid_cases_slice, None)),
+    ('valid_intersecting_cases', (_slice_cases, _run_valid_intersecting_cases, None)),
+    ('steady_state_function', (_slice_cases, _run_steady_state_function, None)),
+    ('draw_2D_slice', (_plot_setup, _run_draw_2D_slice, _close_figure)),
+    ('draw_2D_ss_function', (_plot_setup, _run_draw_2D_ss_function, _close_figure)),
+    ])
+
+
+def _current_rss():
+    ''' The current resident set size of the process in kilobytes, or None
+        if it cannot be read.
+    '''
+    try:
+        f = open('/proc/self/statm', 'r')
+        try:
+            pages = int(f.read().split()[1])
+        finally:
+            f.close()
+        return pages*os.sysconf('SC_PAGE_SIZE')//1024
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values)//2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle-1] + values[middle])/2
+
+def run_benchmark(model, benchmark, repeat=3):
+    ''' Runs a benchmark for a model, returning a dictionary with the time
+        of each repetition, in seconds, and summary statistics.
+    '''
+    setup, run, teardown = BENCHMARKS[benchmark]
+    result = dict(model=model.name, benchmark=benchmark)
+    times = []
+    rss_increase = None
+    try:
+        for i in xrange(repeat):
+            state = setup(model)
+            try:
+                gc.collect()
+                initial_rss = _current_rss()
+                start = timeit.default_timer()
+                run(model, state)
+                times.append(timeit.default_timer() - start)
+                final_rss = _current_rss()
+                if initial_rss is not None and final_rss is not None:
+                    increase = final_rss - initial_rss
+                    if rss_increase is None or increase > rss_increase:
+                        rss_increase = increase
+            finally:
+                if teardown is not None:
+                    teardown(state)
+    except Exception as e:
+        result['error'] = e.__class__.__name__ + ': ' + str(e)
+        return result
+    result.update(times=times,
+                  min=min(times),
+                  median=_median(times),
+                  mean=sum(times)/len(times),
+                  rss_increase=rss_increase)
+    return result
+
+def run_benchmarks(models=None, benchmarks=None, repeat=3, verbose=False):
+    ''' Runs benchmarks for a list of models and returns the results in a
+        dictionary that can be written as JSON.
+
+    Kwargs:
+        models (list): The names of the models, or BenchmarkModel objects.
+            Defaults to the example models and the default synthetic models.
+
+        benchmarks (list): The names of the benchmarks in BENCHMARKS.
+            Defaults to every benchmark.
+
+        repeat (int): The number of times each benchmark is repeated.
+
+        verbose (bool): If True, prints the time of each benchmark to
+            standard error.
+    '''
+    requested_benchmarks = benchmarks
+    if models is None or isinstance(models[0], str) is True:
+        requested_models = models
+        models = get_models(models)
+    else:
+        requested_models = [model.name for model in models]
+    if benchmarks is None:
+        benchmarks = BENCHMARKS.keys()
+    for benchmark in benchmarks:
+        if benchmark not in BENCHMARKS:
+            raise ValueError, 'Unknown benchmark: ' + benchmark
+    results = []
+    for model in models:
+        for benchmark in benchmarks:
+            result = run_benchmark(model, benchmark, repeat=repeat)
+            if verbose is True:
+                if 'error' in result:
+                    summary = result['error']
+                else:
+                    summary = '%.4f s' % result['min']
+                sys.stderr.write(model.name + ' ' + benchmark + ': ' + summary + '\n')
+            results.append(result)
+    metadata = dict(dspace=dspace.__version__,
+                    python=platform.python_version(),
+                    platform=platform.platform(),
+                    repeat=repeat,
+                    models=requested_models,
+                    benchmarks=requested_benchmarks)
+    return dict(metadata=metadata, results=results)
+
+def compare_results(results, baseline, tolerance=0.25, minimum_time=1e-3,
+                    models=None, benchmarks=None):
+    ''' Compares benchmark results with baseline results, returning a list
+        of the benchmarks that regressed.
+
+    A benchmark is slower if its minimum time exceeds the minimum time of the
+    baseline by more than the relative tolerance. Benchmarks that take less
+    than minimum_time seconds in the baseline, or that are missing from the
+    baseline, are not timed against it. A benchmark that failed, or that is
+    in the baseline but missing from the results, is a regression as well.
+    The reason of each regression is 'slower', 'error' or 'missing'.
+
+    Only the baseline results of the requested models and benchmarks can be
+    missing. The names of the requested models and benchmarks default to
+    those in the metadata of the results, and None means that every model
+    or benchmark was requested.
+    '''
+    metadata = results.get('metadata', {})
+    if models is None:
+        models = metadata.get('models')
+    if benchmarks is None:
+        benchmarks = metadata.get('benchmarks')
+    reference = dict()
+    for result in baseline['results']:
+        if 'error' not in result:
+            reference[(result['model'], result['benchmark'])] = result['min']
+        else:
+            reference[(result['model'], result['benchmark'])] = None
+    regressions = []
+    compared = set()
+    for result in results['results']:
+        key = (result['model'], result['benchmark'])
+        compared.add(key)
+        if 'error' in result:
+            regressions.append(dict(model=key[0], benchmark=key[1],
+                                    baseline=reference.get(key),
+                                    time=None,
+                                    ratio=None,
+                                    reason='error',
+                                    error=result['error']))
+            continue
+        if reference.get(key) is None:
+            continue
+        if reference[key] < minimum_time:
+            continue
+        ratio = result['min']/reference[key]
+        if ratio > 1. + tolerance:
+            regressions.append(dict(model=key[0], benchmark=key[1],
+                                    baseline=reference[key],
+                                    time=result['min'],
+                                    ratio=ratio,
+                                    reason='slower'))
+    for result in baseline['results']:
+        key = (result['model'], result['benchmark'])
+        if key in compared:
+            continue
+        if models is not None and key[0] not in models:
+            continue
+        if benchmarks is not None and key[1] not in benchmarks:
+            continue
+        compared.add(key)
+        regressions.append(dict(model=key[0], benchmark=key[1],
+                                baseline=reference[key],
+                                time=None,
+                                ratio=None,
+                                reason='missing'))
+    return regressions
+
+def run_scaling(topology, sizes, repeat=1, **kwargs):
+    ''' Measures how the design space of a synthetic topology scales with
+        its size, returning a dictionary with a list of results that contain
+        the signature and number of cases of each size and the minimum time
+        to construct the design space and to calculate its valid cases. The
+        keyword arguments are passed to the generator.
+    '''
+    results = []
+    for size in sizes:
+        model = synthetic_model(topology, size, **kwargs)
+        ds = model.design_space()
+        result = dict(model=model.name,
+                      size=size,
+                      variables=len(ds.dependent_variables),
+                      signature=ds.signature,
+                      number_of_cases=ds.number_of_cases)
+        for benchmark in ['design_space', 'valid_cases']:
+            timing = run_benchmark(model, benchmark, repeat=repeat)
+            if 'error' in timing:
+                result[benchmark] = None
+                result[benchmark + '_error'] = timing['error']
+            else:
+                result[benchmark] = timing['min']
+        results.append(result)
+    metadata = dict(dspace=dspace.__version__,
+                    python=platform.python_version(),
+                    platform=platform.platform(),
+                    repeat=repeat,
+                    topology=topology,
+                    options=kwargs)
+    return dict(metadata=metadata, scaling=results)
@@ -0,0 +1,67 @@
+''' Bounded caches of the results calculated by dspace objects. '''
+
+import threading
+from collections import OrderedDict
+
+
+class _LRUCache(object):
+    ''' A bounded mapping that evicts the least recently used entries and
+        counts hits and misses. The cache can be used from several threads.
+    '''
+
+    def __init__(self, size):
+        setattr(self, '_data', OrderedDict())
+        setattr(self, '_lock', threading.Lock())
+        setattr(self, 'size', 0)
+        setattr(self, 'hits', 0)
+        setattr(self, 'misses', 0)
+        self.resize(size)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if self.size == 0:
+                return
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def items(self):
+        ''' Returns the cached items, from the least recently used. '''
+        with self._lock:
+            return self._data.items()
+
+    def resize(self, size):
+        if size < 0:
+            raise ValueError, 'Cache size cannot be negative'
+        with self._lock:
+            self.size = int(size)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return dict(hits=self.hits,
+                        misses=self.misses,
+                        size=len(self._data),
+                        max_size=self.size)
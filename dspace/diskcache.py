@@ -0,0 +1,166 @@
+''' Persistent storage of results computed for a design space.
+
+A disk cache is an SQLite database that stores the results of expensive
+calculations, such as valid case lists, bounding boxes, valid interior
+parameter sets and vertices of 2D slices, so that they can be reused by
+later sessions that analyze the same model. Results are stored under a key
+that identifies the model, which is a hash of its equations, auxiliary
+variables, constraints and options, so that a cache file can be shared by
+several models. The cache is opt-in and is enabled with the disk_cache
+argument of a DesignSpace object.
+
+The model keys include the versions of dspace and of the design space
+toolbox, so that results stored by another version are not reused. The
+results stored within a batch are committed together when the batch ends,
+which is used by the analyses that store one result per case.
+
+'''
+
+import cPickle as pickle
+import hashlib
+import os
+import sqlite3
+import threading
+
+from contextlib import contextmanager
+
+from dspace.SWIG.dspace_interface import *
+
+_versions = None
+
+
+def arguments_key(value):
+    ''' Converts the arguments of a calculation into a hashable and
+        reproducible value, with dictionaries and variable pools as sorted
+        tuples of key value pairs.
+    '''
+    if isinstance(value, dict) is True:
+        return tuple([(key, arguments_key(value[key])) for key in sorted(value.keys())])
+    if isinstance(value, (list, tuple)) is True:
+        return tuple([arguments_key(i) for i in value])
+    if isinstance(value, float) is True:
+        return repr(value)
+    return value
+
+def _hash(value):
+    return hashlib.sha1(repr(arguments_key(value))).hexdigest()
+
+def versions():
+    ''' Returns the versions of dspace and of the design space toolbox. '''
+    global _versions
+    if _versions is None:
+        import dspace
+        _versions = (dspace.__version__, DSDesignSpaceToolboxVersionString())
+    return _versions
+
+def model_key(*parts):
+    ''' Returns the hash used to identify a model in a disk cache, which
+        depends on the versions of dspace and the design space toolbox.
+    '''
+    return _hash((versions(),) + parts)
+
+
+class DiskCache(object):
+
+    def __init__(self, path):
+        setattr(self, 'path', os.path.abspath(path))
+        setattr(self, '_connection', None)
+        setattr(self, '_lock', threading.Lock())
+        setattr(self, '_batches', 0)
+
+    def __getstate__(self):
+        return dict(path=self.path)
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            connection.text_factory = str
+            connection.execute('CREATE TABLE IF NOT EXISTS results '
+                               '(model TEXT, kind TEXT, key TEXT, value BLOB, '
+                               'PRIMARY KEY (model, kind, key))')
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def get(self, model, kind, key):
+        ''' Returns the stored result of a calculation, or None if the result
+            has not been stored.
+        '''
+        key = _hash(key)
+        with self._lock:
+            row = self._connect().execute('SELECT value FROM results '
+                                          'WHERE model=? AND kind=? AND key=?',
+                                          (model, kind, key)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(str(row[0]))
+
+    def put(self, model, kind, key, value):
+        ''' Stores the result of a calculation, which is committed at once or,
+            within a batch, when the batch ends.
+        '''
+        key = _hash(key)
+        data = sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                               (model, kind, key, data))
+            if self._batches == 0:
+                connection.commit()
+
+    @contextmanager
+    def batch(self):
+        ''' Context in which the stored results are committed together when
+            the outermost batch ends.
+        '''
+        with self._lock:
+            self._batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+                if self._batches == 0 and self._connection is not None:
+                    self._connection.commit()
+
+    def clear(self, model=None):
+        ''' Removes the stored results of a model, or of every model if model
+            is None.
+        '''
+        with self._lock:
+            connection = self._connect()
+            if model is None:
+                connection.execute('DELETE FROM results')
+            else:
+                connection.execute('DELETE FROM results WHERE model=?', (model,))
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+            self._connection = None
+
+
+@contextmanager
+def batch(disk_cache):
+    ''' Batch of a disk cache, which can be None. '''
+    if disk_cache is None:
+        yield None
+        return
+    with disk_cache.batch():
+        yield disk_cache
+
+def get_disk_cache(disk_cache):
+    ''' Returns a disk cache object for the disk_cache argument of a design
+        space, which can be None, a file path or a DiskCache object.
+    '''
+    if disk_cache is None or isinstance(disk_cache, DiskCache) is True:
+        return disk_cache
+    if isinstance(disk_cache, str) is True:
+        return DiskCache(disk_cache)
+    raise TypeError, 'disk_cache must be a file path or a DiskCache object'
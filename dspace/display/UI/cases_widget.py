@@ -33,15 +33,75 @@ from IPython.display import clear_output, display, Latex
 import matplotlib.pyplot as plt
 
 import cStringIO
+import threading
 from matplotlib.backends.backend_agg import FigureCanvasAgg  
 
+from dspace.executors import get_executor
+from dspace.variables import VariablePool
+
 from case_widget import DisplayCase
 
+_parameter_pools = threading.local()
+
+def _parameter_pool(names, values):
+    ''' Variable pool of the current thread set to the values of the names,
+        which is reused by the rows of a table.
+    '''
+    names = tuple(names)
+    p_vals = getattr(_parameter_pools, 'pool', None)
+    if p_vals is None or tuple(p_vals.keys()) != names:
+        p_vals = VariablePool(names=list(names))
+        _parameter_pools.pool = p_vals
+    p_vals.set_values(values)
+    return p_vals
+
+def _case_table_row(ds, case_number, columns=(), constraints=None, p_values=None):
+    ''' Values of a row of the cases table. The parameter values are an
+        array in the order of the independent variables of the design space.
+    '''
+    case = ds(case_number, constraints=constraints)
+    row = [case.case_number, case.signature]
+    cyclical = False
+    if case.is_cyclical is True:
+        cyclical = True
+        case = case.original_case
+    if case.is_valid() is False:
+        value = '*' if cyclical is True else '-'
+        return row + [value for column in columns]
+    for header, xd, xi in columns:
+        if header == 'Validity':
+            value = '+'
+        elif header == '# eigenvalues w/ positive real part':
+            p_vals = _parameter_pool(ds.independent_variables, p_values)
+            value = case.positive_roots(p_vals)
+        else:
+            value = case.ssystem.log_gain(xd, xi)
+        row.append(value)
+    return row
+
+def _chunks(items, first, size):
+    ''' Splits the items of an iterable into lists, the first with at most
+        first items and the others with at most size items.
+    '''
+    chunk = []
+    limit = first
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == limit:
+            yield chunk
+            chunk = []
+            limit = size
+    if len(chunk) > 0:
+        yield chunk
+
 class CasesTable(object):
     
-    def __init__(self, controller):
+    def __init__(self, controller, page_size=100, chunk_size=2000, parallel_threshold=500):
         setattr(self, 'controller', controller)
         setattr(self, 'table', VBox())
+        setattr(self, 'page_size', page_size)
+        setattr(self, 'chunk_size', chunk_size)
+        setattr(self, 'parallel_threshold', parallel_threshold)
     
     def cases_table_widget(self):
         controller = self.controller
@@ -192,6 +252,7 @@ class CasesTable(object):
             constraints = []
         controller.set_defaults('biological_constraints', constraints)
         if mode == 'None':
+            controller.tasks.cancel('cases table')
             self.table.children=[]
             return
         s = '<div><table>\n<caption>Cases in the system design space. </caption>\n'
@@ -203,45 +264,179 @@ class CasesTable(object):
             s += '<td><b>' + header + '</b></td>'
         s += '</tr>'
         if mode == 'Valid':    
-            cases = controller.ds(controller.ds.valid_cases(),
-                                  constraints=constraints)
+            case_numbers = controller.ds.valid_cases()
+            number_of_cases = len(case_numbers)
         elif mode == 'All':
-            cases = controller.ds(
-                     [i for i in xrange(1, controller.ds.number_of_cases+1)],
-                     constraints=constraints)
+            case_numbers = None
+            number_of_cases = controller.ds.number_of_cases
         else:
             case_signatures = [i.strip() for i in str(b.cases.value).split(',') if len(i.strip()) > 0] 
-            cases = controller.ds([i for i in case_signatures], 
-                                  by_signature=b.by_signature.value,
-                                  constraints=constraints)
-            
-        for c in cases:
-            #self.show_case(c, b.extra_columns)
-            values = [c.case_number, c.signature]
-            values += [self.value_for_extra_column(c, column) for column in b.extra_columns.children]
-            if self.show_case(values, b.extra_columns.children, b.filters) is False:
-                continue
-            s += '<tr align=center><td style="padding:0 15px 0 15px;">{0}</td><td style="padding:0 15px 0 15px;">{1}</td>'.format(c.case_number,c.signature)
-            for column in b.extra_columns.children:
-                s += self.html_for_extra_column(c, column)    
-            s += '</tr>\n'
-            
-        s += '</table><caption>'
-        s += 'Note: # of eigenvalues w/ positive real part is calculated using a representative set of parameter values, and may not be reflective of all potential behaviors.'
-        s += '</caption></div>'
-        html_widget = HTML(value = s)
+            if b.by_signature.value is True:
+                case_numbers = [c.case_number for c in controller.ds(case_signatures, 
+                                                                     by_signature=True,
+                                                                     constraints=constraints)]
+            else:
+                case_numbers = case_signatures
+            number_of_cases = len(case_numbers)
+        columns = [(str(column.header.value),
+                    str(column.dependent.value),
+                    str(column.independent.value)) for column in b.extra_columns.children]
+        executor = None
+        if number_of_cases >= self.parallel_threshold:
+            executor = get_executor('process')
+            executor.start(controller.ds)
+        pages = self.case_table_pages(b, s, columns)
+        self.table.children = [HTML(value='<b>Calculating cases table... Please Wait.</b>')]
+        controller.tasks.submit('cases table', self.case_table_data,
+                                args=(controller.ds, case_numbers, columns, constraints,
+                                      controller.pvals.copy(), executor),
+                                partial=lambda rows: self.add_case_table_rows(pages, rows),
+                                done=lambda number: self.case_table_done(pages),
+                                failed=lambda e: self.table_error(),
+                                progress=lambda fraction, message: self.table_progress(pages, message))
+        
+    def case_table_data(self, token, ds, case_numbers, columns, constraints,
+                        p_vals, executor=None):
+        ''' Calculates the rows of the cases table in chunks and publishes the
+            rows of each chunk, with the case number, the case signature and
+            the value of each extra column. The rows of every case are
+            calculated if case_numbers is None. Returns the number of rows.
+
+        The first chunk has the rows of a page, so that the first page is
+        shown while the other rows are calculated, and the calculation is
+        cancelled between chunks if another table is requested. The executor
+        is started by the caller, so that worker processes are never started
+        from the background thread; the parameter values are sent as an array
+        once with each chunk of rows of a worker.
+        '''
+        executor = get_executor(executor)
+        p_values = [p_vals[key] for key in ds.independent_variables]
+        if case_numbers is None:
+            number_of_cases = ds.number_of_cases
+            case_numbers = (i for chunk in ds.iter_cases(valid_only=False) for i in chunk)
+        else:
+            number_of_cases = len(case_numbers)
+        number_of_rows = 0
+        for chunk in _chunks(case_numbers, self.page_size, self.chunk_size):
+            token.check()
+            token.report(number_of_rows/float(number_of_cases),
+                         str(number_of_rows) + ' of ' + str(number_of_cases) + ' cases')
+            rows = executor.map(_case_table_row, ds, chunk,
+                                columns=columns,
+                                constraints=constraints,
+                                p_values=p_values)
+            token.check()
+            token.publish(rows)
+            number_of_rows += len(rows)
+        return number_of_rows
+    
+    def table_progress(self, pages, message):
+        if pages.shown is False:
+            self.table.children = [HTML(value='<b>Calculating cases table (' + message + ')... Please Wait.</b>')]
+            return
+        pages.message = message
+        self.show_table_page(pages)
+        
+    def table_error(self):
+        self.table.children = [HTML(value='<b>An error occured while creating the cases table</b>')]
+        
+    def case_table_pages(self, b, header, columns):
+        ''' The widgets of a cases table whose rows are added by
+            add_case_table_rows while they are calculated.
+        '''
+        footer = '</table><caption>'
+        footer += 'Note: # of eigenvalues w/ positive real part is calculated using a representative set of parameter values, and may not be reflective of all potential behaviors.'
+        footer += '</caption></div>'
+        html_widget = HTML()
         save_table = Button(description='Save Table')
-        save_table.table_data = s
+        save_table.disabled = True
         save_table.on_click(self.save_table)
-        table_container = VBox(children=[save_table, 
-                                         html_widget])
+        previous_page = Button(description='Previous')
+        next_page = Button(description='Next')
+        page_label = HTML()
+        for button, step in [(previous_page, -1), (next_page, 1)]:
+            button.step = step
+            button.on_click(self.change_table_page)
+        pages = HBox(children=[previous_page, page_label, next_page])
+        pages.visible = False
+        pages.rows = []
+        pages.header = header
+        pages.footer = footer
+        pages.columns = columns
+        pages.extra_columns = b.extra_columns.children
+        pages.filters = b.filters
+        pages.page = 0
+        pages.done = False
+        pages.shown = False
+        pages.message = ''
+        pages.html_widget = html_widget
+        pages.page_label = page_label
+        pages.save_table = save_table
+        previous_page.pages = pages
+        next_page.pages = pages
+        table_container = VBox(children=[save_table, pages, html_widget])
         if ipy_old is True:
             table_container.set_css('height', '300px')
         else:
             table_container.height = '300px'
             table_container.overflow_x = 'auto'
             table_container.overflow_y = 'auto'
-        self.table.children = [table_container]
+        pages.table_container = table_container
+        return pages
+        
+    def add_case_table_rows(self, pages, rows):
+        ''' Adds the calculated rows that pass the filters to a cases table,
+            which is shown once its first page is complete.
+        '''
+        columns = pages.columns
+        for values in rows:
+            if self.show_case(values, pages.extra_columns, pages.filters) is False:
+                continue
+            row = '<tr align=center><td style="padding:0 15px 0 15px;">{0}</td><td style="padding:0 15px 0 15px;">{1}</td>'.format(values[0], values[1])
+            for j in xrange(len(columns)):
+                row += self.html_for_value(columns[j], values[j+2])
+            row += '</tr>\n'
+            pages.rows.append(row)
+        if pages.shown is True:
+            self.show_table_page(pages)
+        elif len(pages.rows) >= self.page_size:
+            self.show_case_table(pages)
+        
+    def case_table_done(self, pages):
+        pages.done = True
+        pages.save_table.table_data = pages.header + ''.join(pages.rows) + pages.footer
+        pages.save_table.disabled = False
+        if pages.shown is False:
+            self.show_case_table(pages)
+        else:
+            self.show_table_page(pages)
+        
+    def show_case_table(self, pages):
+        pages.shown = True
+        self.show_table_page(pages)
+        self.table.children = [pages.table_container]
+        
+    def number_of_pages(self, pages):
+        return max(1, (len(pages.rows)+self.page_size-1)//self.page_size)
+        
+    def change_table_page(self, b):
+        pages = b.pages
+        pages.page = min(max(pages.page + b.step, 0), self.number_of_pages(pages)-1)
+        self.show_table_page(pages)
+        
+    def show_table_page(self, pages):
+        start = pages.page*self.page_size
+        s = pages.header + ''.join(pages.rows[start:start+self.page_size]) + pages.footer
+        number_of_pages = self.number_of_pages(pages)
+        if pages.html_widget.value != s:
+            pages.html_widget.value = s
+        pages.visible = number_of_pages > 1 or pages.done is False
+        if pages.done is True:
+            label = 'Page {0} of {1} ({2} cases)'
+        else:
+            label = 'Page {0} of {1} ({2} cases, calculating {3})'
+        pages.page_label.value = label.format(pages.page+1, number_of_pages,
+                                              len(pages.rows), pages.message)
         
     def save_table(self, b):
         
@@ -290,50 +485,13 @@ class CasesTable(object):
                 break
         return showCase
     
-    def value_for_extra_column(self, case, column):
-        controller = self.controller
+    def html_for_value(self, column, value):
         s = '<td style="padding:0 15px 0 15px;">'
-        cyclical = False
-        if case.is_cyclical is True:
-            cyclical = True
-            case = case.original_case
-        if case.is_valid() is False:
-            if cyclical is True:
-                value = '*'
-            else:
-                value = '-'
-            return value
-        if column.header.value == 'Validity':
-            value = '+'
-        elif column.header.value == '# eigenvalues w/ positive real part':
-            value = case.positive_roots(controller.pvals)
-        else:
-            xd = str(column.dependent.value)
-            xi = str(column.independent.value)
-            value = case.ssystem.log_gain(xd, xi)
-        return value
-        
-    def html_for_extra_column(self, case, column):
-        controller = self.controller
-        s = '<td style="padding:0 15px 0 15px;">'
-        cyclical = False
-        if case.is_cyclical is True:
-            cyclical = True
-            case = case.original_case
-        if case.is_valid() is False:
-            if cyclical is True:
-                s += '*'
-            else:
-                s += '-'
-            s += '</td>'
-            return s
-        if column.header.value == 'Validity':
-            s += '+'
-        elif column.header.value == '# eigenvalues w/ positive real part':
-            s += str(case.positive_roots(controller.pvals))
+        if value == '-' or value == '*' or column[0] == 'Validity':
+            s += value
+        elif column[0] == '# eigenvalues w/ positive real part':
+            s += str(value)
         else:
-            xd = str(column.dependent.value)
-            xi = str(column.independent.value)
-            s += '%.3f' % case.ssystem.log_gain(xd, xi)
+            s += '%.3f' % value
         s += '</td>'
-        return s
\ No newline at end of file
+        return s
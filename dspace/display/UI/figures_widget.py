@@ -36,12 +36,18 @@ from IPython.display import clear_output, display
 import matplotlib as mt
 import matplotlib.pyplot as plt
 
+from dspace.plotutils.case_plot import dominant_eigenvalue
+
 import cStringIO
 import base64
 from matplotlib.backends.backend_agg import FigureCanvasAgg  
+from matplotlib.figure import Figure
 
 from subprocess import call, Popen, PIPE
 from dspace.graphs.designspace_graph import GraphGenerator
+from dspace.archive import ArchiveSection
+from dspace.executors import get_executor
+from dspace.display.background import CancellableExecutor
 
 def sort_eigenvalues(a, b):
     if a.real > b.real:
@@ -52,14 +58,42 @@ def sort_eigenvalues(a, b):
         return 0
     
 def eigenvalue_compare(eigenvalues, component='real', rank=1):
-    eig = [(eigenvalues.real[i], eigenvalues.imag[i]) for i in range(len(eigenvalues))]
-    eig = sorted(eig, key = lambda i: i[0])
-    if component == 'real':
-        value = [i[0] for i in eig]
-    else:
-        value = [i[1] for i in eig]
-    rank = min(rank, len(eig))
-    return value[-rank]
+    return dominant_eigenvalue(eigenvalues, component=component, rank=rank)
+
+class PlotSettings(object):
+    ''' The values of the plot widgets when a plot is requested, which are
+        used to draw it in the background while the widgets can change.
+    '''
+
+    def __init__(self, make_plot, b):
+        plot_data = make_plot.plot_data.children[0]
+        def plot_value(name, default=None):
+            if hasattr(plot_data, name) is False:
+                return default
+            return getattr(plot_data, name).value
+        setattr(self, 'plot_type', str(b.plot_type.value))
+        setattr(self, 'pvals', b.pvals)
+        setattr(self, 'xlabel', str(b.xlabel.value))
+        setattr(self, 'ylabel', str(b.ylabel.value))
+        rangex, rangey = make_plot.axes_ranges(b)
+        setattr(self, 'rangex', rangex)
+        setattr(self, 'rangey', rangey)
+        setattr(self, 'included_cases', make_plot.included_cases(b))
+        setattr(self, 'boundaries', b.boundaries.value)
+        setattr(self, 'title', b.title.value)
+        setattr(self, 'caption', b.caption.value)
+        setattr(self, 'intersections', plot_value('intersections'))
+        setattr(self, 'resolution', plot_value('resolution'))
+        setattr(self, 'function', str(plot_value('function')))
+        setattr(self, 'log_linear', plot_value('log_linear'))
+        setattr(self, 'parallel', plot_value('parallel', False))
+        setattr(self, 'component', str(plot_value('component')))
+        rank = plot_value('select')
+        setattr(self, 'rank', int(rank) if rank is not None else None)
+        zlim = None
+        if plot_value('zlim', True) == False:
+            zlim = [plot_data.zmin.value, plot_data.zmax.value]
+        setattr(self, 'zlim', zlim)
 
 class MakePlot(object):
     
@@ -383,37 +417,108 @@ class MakePlot(object):
     def make_plot(self, b):
         controller = self.controller
         b.description = 'Creating plot... Please Wait.'
-        b.disabled = True
-        try:
-            b.pvals = controller.pvals.copy()
-            if b.plot_type.value == 'Design Space (interactive)':
+        b.pvals = controller.pvals.copy()
+        if b.plot_type.value == 'Design Space (interactive)':
+            b.disabled = True
+            try:
                 self.make_interactive_plot(b)
-            elif b.plot_type.value == 'Design Space':
-                self.make_static_plot(b)
-            elif b.plot_type.value == 'Stability':
-                self.make_stability_plot(b)
-            elif b.plot_type.value == 'Eigenvalues':
-                self.make_eigenvalue_plot(b)
+            except Exception as e:
+                self.plot_error(b)
             else:
-                self.make_function_plot(b)
+                self.plot_done(b)
+            return
+        try:
+            settings = PlotSettings(self, b)
+            if settings.parallel is True:
+                get_executor('process').start(controller.ds)
         except Exception as e:
-            close_button = Button(description="Close")
-            error_message = '<div width="200px" style="float:center; text-align:center;">'
-            error_message += '<b>An error occured while plotting</b></div>'
-            error_window = Popup(children=[HTML(value=error_message),close_button])
-            close_button.window = error_window
-            close_button.on_click(lambda x: x.window.close())
-            if old_ipython is False:
-                error_window.box_style='danger'
-                close_button.float = 'center'
-                error_window.width='250px'
-                error_window.height='150px'
-            display(error_window)
-            b.description = 'Add Plot'
-            b.disabled = False
+            self.plot_error(b)
+            return
+        controller.tasks.submit('plot', self.make_background_plot, args=(settings,),
+                                done=lambda result: self.add_plot(b, settings, result),
+                                failed=lambda e: self.plot_error(b),
+                                progress=lambda fraction, message: self.plot_progress(b, message))
+
+    def make_background_plot(self, token, settings):
+        ''' Makes the plot requested with the settings of a button in a
+            background task, which is cancelled if another plot is requested
+            before it is done. Returns the image of the plot and the options
+            it was made with, which are added by add_plot.
+        '''
+        token.report(0., 'Calculating')
+        if settings.plot_type == 'Design Space':
+            return self.make_static_plot(settings, token=token)
+        elif settings.plot_type == 'Stability':
+            return self.make_stability_plot(settings, token=token)
+        elif settings.plot_type == 'Eigenvalues':
+            return self.make_eigenvalue_plot(settings, token=token)
         else:
-            b.description = 'Add Plot'
-            b.disabled = False
+            return self.make_function_plot(settings, token=token)
+
+    def add_plot(self, b, settings, result):
+        ''' Adds the figure made by a background plot to the figures and
+            stores the options it was made with.
+        '''
+        controller = self.controller
+        if result is not None:
+            controller.figures.add_figure(result['data'],
+                                          title=settings.title,
+                                          caption=settings.caption,
+                                          pvals=settings.pvals,
+                                          colors=result.get('colors'))
+            controller.options.update(result['options'])
+            for key, value in result.get('defaults', {}).items():
+                controller.set_defaults(key, value)
+        self.plot_done(b)
+
+    def plot_executor(self, settings, token):
+        ''' The executor of the analyses of a plot, which stops them when the
+            plot is cancelled.
+        '''
+        executor = 'process' if settings.parallel is True else None
+        if token is None:
+            return executor
+        return CancellableExecutor(token, executor)
+
+    def new_figure(self, figsize):
+        ''' A figure with its own canvas, which is not managed by pyplot so
+            that it can be drawn outside of the thread of the kernel.
+        '''
+        fig = Figure(figsize=figsize, dpi=600, facecolor='w')
+        FigureCanvasAgg(fig)
+        return fig
+
+    def render_plot(self, fig, token):
+        if token is not None:
+            token.report(0.9, 'Rendering')
+        buf = cStringIO.StringIO()
+        fig.canvas.print_png(buf)
+        data = buf.getvalue()
+        if token is not None:
+            token.check()
+        return data
+
+    def plot_progress(self, b, message):
+        b.description = 'Creating plot (' + message.lower() + ')... Please Wait.'
+
+    def plot_done(self, b):
+        b.description = 'Add Plot'
+        b.disabled = False
+
+    def plot_error(self, b):
+        close_button = Button(description="Close")
+        error_message = '<div width="200px" style="float:center; text-align:center;">'
+        error_message += '<b>An error occured while plotting</b></div>'
+        error_window = Popup(children=[HTML(value=error_message),close_button])
+        close_button.window = error_window
+        close_button.on_click(lambda x: x.window.close())
+        if old_ipython is False:
+            error_window.box_style='danger'
+            close_button.float = 'center'
+            error_window.width='250px'
+            error_window.height='150px'
+        display(error_window)
+        self.plot_done(b)
     
     def axes_ranges(self, b):
         pvals = self.controller.pvals
@@ -464,203 +569,169 @@ class MakePlot(object):
                                    'y_range':rangey})
         controller.update_child(button.name, wi)
         
-    def make_static_plot(self, b):
+    def make_static_plot(self, settings, token=None):
         controller = self.controller
+        s = settings
         if old_ipython is True:
-            fig = plt.figure(figsize=[7, 4], dpi=600, facecolor='w')
+            fig = self.new_figure([7, 4])
             ax = fig.add_axes([0.1714, 0.2, 0.6, 0.7])
             ax.set_title('Design Space plot')
         else:
-            fig = plt.figure(figsize=[5, 4], dpi=600, facecolor='w')
+            fig = self.new_figure([5, 4])
             ax = fig.add_axes([0.24, 0.2, 0.72, 0.7])
             ax.set_title('Design Space plot')
-        plot_data = self.plot_data.children[0]
-        intersects = plot_data.intersections.value
         intersections_dict = {'Single':[1],
                               'Single and Triple':[1,3],
                               'Triple':[3],
                               'All':range(1, 100)}
-        rangex, rangey = self.axes_ranges(b)
-        ec = 'k' if b.boundaries.value is True else 'none'
-        if str(b.ylabel.value) != 'None':
+        executor = self.plot_executor(s, token)
+        ec = 'k' if s.boundaries is True else 'none'
+        if s.ylabel != 'None':
             colorbar = True if old_ipython is True else False
-            colors=controller.ds.draw_2D_slice(ax, controller.pvals,
-                                               str(b.xlabel.value), str(b.ylabel.value),
-                                               rangex, rangey,
-                                               intersections=intersections_dict[intersects],
-                                               included_cases=self.included_cases(b),
+            colors=controller.ds.draw_2D_slice(ax, s.pvals,
+                                               s.xlabel, s.ylabel,
+                                               s.rangex, s.rangey,
+                                               intersections=intersections_dict[s.intersections],
+                                               included_cases=s.included_cases,
                                                ec=ec,
-                                               colorbar=colorbar)
+                                               colorbar=colorbar,
+                                               executor=executor)
         else:
-            colors=controller.ds.draw_1D_slice(ax, controller.pvals, str(b.xlabel.value),
-                                               rangex,
-                                               intersections=intersections_dict[intersects],
-                                               included_cases=self.included_cases(b))
-        canvas = FigureCanvasAgg(fig) 
-        buf = cStringIO.StringIO()
-        canvas.print_png(buf)
-        data = buf.getvalue()
-        controller.figures.add_figure(data, 
-                                      title=b.title.value,
-                                      caption=b.caption.value,
-                                      pvals=b.pvals,
-                                      colors=colors)
-        controller.options.update({'xaxis':str(b.xlabel.value),
-                                   'yaxis':str(b.ylabel.value),
-                                   'x_range':rangex, 
-                                   'y_range':rangey,
-                                   'included_cases':self.included_cases(b)})
-        plt.close()
+            colors=controller.ds.draw_1D_slice(ax, s.pvals, s.xlabel,
+                                               s.rangex,
+                                               intersections=intersections_dict[s.intersections],
+                                               included_cases=s.included_cases,
+                                               executor=executor)
+        data = self.render_plot(fig, token)
+        options = {'xaxis':s.xlabel,
+                   'yaxis':s.ylabel,
+                   'x_range':s.rangex, 
+                   'y_range':s.rangey,
+                   'included_cases':s.included_cases}
+        return {'data':data, 'colors':colors, 'options':options}
         
-    def make_stability_plot(self, b):
+    def make_stability_plot(self, settings, token=None):
         controller = self.controller
-        fig = plt.figure(figsize=[6, 4], dpi=600, facecolor='w')
+        s = settings
+        fig = self.new_figure([6, 4])
         ax = fig.add_axes([0.2, 0.2, 0.7, 0.7])
         ax.set_title('Stability plot')
-        plot_data = self.plot_data.children[0]
-        resolution = plot_data.resolution.value
-        rangex, rangey = self.axes_ranges(b)
-        ec = 'k' if b.boundaries.value is True else 'none'
-        if str(b.ylabel.value) != 'None':
-            controller.ds.draw_2D_positive_roots(ax, controller.pvals, str(b.xlabel.value), str(b.ylabel.value),
-                                                 rangex, rangey,
-                                                 resolution=resolution,
-                                                 included_cases=self.included_cases(b)
+        executor = self.plot_executor(s, token)
+        defaults = {}
+        ec = 'k' if s.boundaries is True else 'none'
+        if s.ylabel != 'None':
+            controller.ds.draw_2D_positive_roots(ax, s.pvals, s.xlabel, s.ylabel,
+                                                 s.rangex, s.rangey,
+                                                 resolution=s.resolution,
+                                                 included_cases=s.included_cases,
+                                                 executor=executor
                                                  )
             if ec == 'k':
-                controller.ds.draw_2D_slice(ax, controller.pvals, str(b.xlabel.value), str(b.ylabel.value),
-                                            rangex, rangey,
+                controller.ds.draw_2D_slice(ax, s.pvals, s.xlabel, s.ylabel,
+                                            s.rangex, s.rangey,
                                             intersections=[1],
-                                            included_cases=self.included_cases(b),
+                                            included_cases=s.included_cases,
                                             colorbar=False,
                                             facecolor='none',
-                                            ec=ec)
+                                            ec=ec,
+                                            executor=executor)
         else:
-            zlim = None
-            function = str(plot_data.function.value)
-            if plot_data.zlim.value == False:
-                zlim = [plot_data.zmin.value, plot_data.zmax.value]
-            controller.ds.draw_1D_positive_roots(ax, function, controller.pvals, 
-                                                 str(b.xlabel.value), rangex,
-                                                 ylim=zlim,
-                                                 resolution=resolution)
-            controller.set_defaults('zlim', zlim)
-        canvas = FigureCanvasAgg(fig) 
-        buf = cStringIO.StringIO()
-        canvas.print_png(buf)
-        data = buf.getvalue()
-        controller.figures.add_figure(data, title=b.title.value, caption=b.caption.value, pvals=b.pvals)
-        plt.close()
-        controller.options.update({'xaxis':str(b.xlabel.value),
-                                   'yaxis':str(b.ylabel.value),
-                                   'x_range':rangex, 
-                                   'y_range':rangey,
-                                   'included_cases':self.included_cases(b),
-                                   'resolution':resolution})
+            controller.ds.draw_1D_positive_roots(ax, s.function, s.pvals, 
+                                                 s.xlabel, s.rangex,
+                                                 ylim=s.zlim,
+                                                 resolution=s.resolution,
+                                                 executor=executor)
+            defaults['zlim'] = s.zlim
+        data = self.render_plot(fig, token)
+        options = {'xaxis':s.xlabel,
+                   'yaxis':s.ylabel,
+                   'x_range':s.rangex, 
+                   'y_range':s.rangey,
+                   'included_cases':s.included_cases,
+                   'resolution':s.resolution}
+        return {'data':data, 'options':options, 'defaults':defaults}
         
     
-    def make_function_plot(self, b):
+    def make_function_plot(self, settings, token=None):
         controller = self.controller
-        plot_data = self.plot_data.children[0]
-        log_linear = plot_data.log_linear.value
-        function = str(plot_data.function.value)
-        resolution = plot_data.resolution.value
-        parallel = plot_data.parallel.value
-        zlim = None
-        if plot_data.zlim.value == False:
-            zlim = [plot_data.zmin.value, plot_data.zmax.value]
-        fig = plt.figure(figsize=[6, 4], dpi=600, facecolor='w')
+        s = settings
+        fig = self.new_figure([6, 4])
         ax = fig.add_axes([0.2, 0.2, 0.7, 0.7])
-        fn = dspace.Expression(function)
-        rangex, rangey = self.axes_ranges(b)
+        fn = dspace.Expression(s.function)
         ax.set_title('$' + fn.latex(substitution_dictionary=controller.symbols) + '$')
-        ec = 'k' if b.boundaries.value is True else 'none'
-        if str(b.ylabel.value) != 'None':
-            controller.ds.draw_2D_ss_function(ax, function, controller.pvals, 
-                                              str(b.xlabel.value),
-                                              str(b.ylabel.value),
-                                              rangex, rangey, zlim=zlim,
-                                              log_linear=log_linear, resolution=resolution, 
-                                              parallel=parallel,
-                                              included_cases=self.included_cases(b))
+        executor = self.plot_executor(s, token)
+        ec = 'k' if s.boundaries is True else 'none'
+        if s.ylabel != 'None':
+            controller.ds.draw_2D_ss_function(ax, s.function, s.pvals, 
+                                              s.xlabel,
+                                              s.ylabel,
+                                              s.rangex, s.rangey, zlim=s.zlim,
+                                              log_linear=s.log_linear, resolution=s.resolution, 
+                                              executor=executor,
+                                              included_cases=s.included_cases)
             if ec == 'k':
-                controller.ds.draw_2D_slice(ax, controller.pvals, str(b.xlabel.value), str(b.ylabel.value),
-                                            rangex, rangey,
+                controller.ds.draw_2D_slice(ax, s.pvals, s.xlabel, s.ylabel,
+                                            s.rangex, s.rangey,
                                             intersections=[1],
-                                            included_cases=self.included_cases(b),
+                                            included_cases=s.included_cases,
                                             colorbar=False,
                                             facecolor='none',
-                                            ec=ec)
+                                            ec=ec,
+                                            executor=executor)
         else:
-            controller.ds.draw_1D_ss_function(ax, function, controller.pvals, 
-                                              str(b.xlabel.value),
-                                              rangex, ylim=zlim,
-                                              resolution=resolution, 
-                                              included_cases=self.included_cases(b))
-        canvas = FigureCanvasAgg(fig) 
-        buf = cStringIO.StringIO()
-        canvas.print_png(buf)
-        data = buf.getvalue()
-        controller.figures.add_figure(data, title=b.title.value, caption=b.caption.value, pvals=b.pvals)
-        plt.close()
-        controller.options.update({'xaxis':str(b.xlabel.value),
-                                   'yaxis':str(b.ylabel.value),
-                                   'x_range':rangex, 
-                                   'y_range':rangey,
-                                   'included_cases':self.included_cases(b),
-                                   'resolution':resolution,
-                                   'zlim':zlim})
+            controller.ds.draw_1D_ss_function(ax, s.function, s.pvals, 
+                                              s.xlabel,
+                                              s.rangex, ylim=s.zlim,
+                                              resolution=s.resolution, 
+                                              included_cases=s.included_cases,
+                                              executor=executor)
+        data = self.render_plot(fig, token)
+        options = {'xaxis':s.xlabel,
+                   'yaxis':s.ylabel,
+                   'x_range':s.rangex, 
+                   'y_range':s.rangey,
+                   'included_cases':s.included_cases,
+                   'resolution':s.resolution,
+                   'zlim':s.zlim}
+        return {'data':data, 'options':options}
         
-    def make_eigenvalue_plot(self, b):
+    def make_eigenvalue_plot(self, settings, token=None):
         controller = self.controller
-        if str(b.ylabel.value) == 'None':
+        s = settings
+        if s.ylabel == 'None':
             return
-        plot_data = self.plot_data.children[0]
-        component = str(plot_data.component.value)
-        resolution = plot_data.resolution.value
-        parallel = plot_data.parallel.value
-        rank = int(plot_data.select.value)
-        zlim = None
-        if plot_data.zlim.value == False:
-            zlim = [plot_data.zmin.value, plot_data.zmax.value]
-        fig = plt.figure(figsize=[6, 4], dpi=600, facecolor='w')
+        fig = self.new_figure([6, 4])
         ax = fig.add_axes([0.2, 0.2, 0.7, 0.7])
-        rangex, rangey = self.axes_ranges(b)
-        ax.set_title('Dominant Eigenvalue ('+component+')')
-        controller.ds.draw_2D_dominant_eigenvalues(ax, controller.pvals, 
-                                                   str(b.xlabel.value),
-                                                   str(b.ylabel.value),
-                                                   rangex, rangey, zlim=zlim,
-                                                   component=component.lower(),
-                                                   resolution=resolution, 
-                                                   parallel=parallel,
-                                                   included_cases=self.included_cases(b),
-                                                   cmp=lambda eig : 
-                                                       eigenvalue_compare(eig,
-                                                                          component=component.lower(),
-                                                                          rank=rank))
-        ec = 'k' if b.boundaries.value is True else 'none'
+        ax.set_title('Dominant Eigenvalue ('+s.component+')')
+        executor = self.plot_executor(s, token)
+        controller.ds.draw_2D_dominant_eigenvalues(ax, s.pvals, 
+                                                   s.xlabel,
+                                                   s.ylabel,
+                                                   s.rangex, s.rangey, zlim=s.zlim,
+                                                   component=s.component.lower(),
+                                                   resolution=s.resolution, 
+                                                   executor=executor,
+                                                   included_cases=s.included_cases,
+                                                   rank=s.rank)
+        ec = 'k' if s.boundaries is True else 'none'
         if ec == 'k':
-            controller.ds.draw_2D_slice(ax, controller.pvals, str(b.xlabel.value), str(b.ylabel.value),
-                                        rangex, rangey,
+            controller.ds.draw_2D_slice(ax, s.pvals, s.xlabel, s.ylabel,
+                                        s.rangex, s.rangey,
                                         intersections=[1],
-                                        included_cases=self.included_cases(b),
+                                        included_cases=s.included_cases,
                                         colorbar=False,
                                         facecolor='none',
-                                        ec=ec)
-        canvas = FigureCanvasAgg(fig) 
-        buf = cStringIO.StringIO()
-        canvas.print_png(buf)
-        data = buf.getvalue()
-        controller.figures.add_figure(data, title=b.title.value, caption=b.caption.value, pvals=b.pvals)
-        plt.close()
-        controller.options.update({'xaxis':str(b.xlabel.value),
-                                   'yaxis':str(b.ylabel.value),
-                                   'x_range':rangex, 
-                                   'y_range':rangey,
-                                   'included_cases':self.included_cases(b),
-                                   'resolution':resolution,
-                                   'zlim':zlim})
+                                        ec=ec,
+                                        executor=executor)
+        data = self.render_plot(fig, token)
+        options = {'xaxis':s.xlabel,
+                   'yaxis':s.ylabel,
+                   'x_range':s.rangex, 
+                   'y_range':s.rangey,
+                   'included_cases':s.included_cases,
+                   'resolution':s.resolution,
+                   'zlim':s.zlim}
+        return {'data':data, 'options':options}
                 
     def remove_plot(self, b):
         controller = self.controller
@@ -689,7 +760,7 @@ class DisplayFigures(object):
         controller = self.controller
         if pvals is not None:
             caption += ' Figure generated with the following parameter values: '
-            caption += '; '.join([i + ' = ' + str(controller.pvals[i]) for i in sorted(controller.pvals.keys())]) + '.'
+            caption += '; '.join([i + ' = ' + str(pvals[i]) for i in sorted(pvals.keys())]) + '.'
         self.add_figure_widget(image_data, title=title, caption = caption, pvals=pvals, colors=colors)
         
     def remove_unsaved_figure(self, b):
@@ -776,6 +847,25 @@ function toggleColumn(el, n) {
         image_widget = HTML(value=html_str)
         image_widget.width='100%'
         return image_widget
+
+    def _image_widget(self, image_data, colors=None):
+        if isinstance(image_data, ArchiveSection) is True:
+            return self._archived_image_widget(image_data, colors=colors)
+        if old_ipython is True:
+            image_widget = Image()
+            image_widget.value = image_data
+            return image_widget
+        return self._image_widget_new(image_data, colors=colors)
+
+    def _archived_image_widget(self, section, colors=None):
+        ''' A button that reads a figure of a saved analysis the first time
+            it is shown. '''
+        show_button = Button(description='Show Figure')
+        image_box = VBox(children=[show_button])
+        def show_figure(b):
+            image_box.children = [self._image_widget(section.load(), colors=colors)]
+        show_button.on_click(show_figure)
+        return image_box
         
     def add_figure_widget(self, image_data, title='', caption = '', pvals=None, colors=None):
         children = [i for i in self.unsaved.children]      
@@ -798,17 +888,13 @@ function toggleColumn(el, n) {
         restore_pvals.pvals = pvals
         if pvals is None:
             restore_pvals.visible = False
+        image_widget = self._image_widget(image_data, colors=colors)
+        tab_widget = VBox(children=[image_widget, html_widget])
         if old_ipython is True:
-            image_widget = Image()
-            image_widget.value = image_data
-            tab_widget = VBox(children=[image_widget, html_widget])
             if colors is not None:
                 html_widgets = self.colorbar_tabs(colors)
                 tab_widget.description='Figure'
                 tab_widget = Tab(children=[tab_widget]+html_widgets)
-        else:
-            image_widget = self._image_widget_new(image_data, colors=colors)
-            tab_widget = VBox(children=[image_widget, html_widget])
             toggle = Button(description='Hide')
             
         restore_pvals.on_click(self.restore_figure_pvals)
@@ -829,8 +915,6 @@ function toggleColumn(el, n) {
                 tab_widget.set_title(1, 'Colorbar')
             
     def save_figure_widget(self, image_data, title='', caption = '', pvals=None, colors=None):
-        image_widget = Image()
-        image_widget.value = image_data
         children = [i for i in self.figures_widget.children]      
         html_str = '<b>Figure '+str(len(children)+1)+'.  '+title+'</b>' + caption
         html_widget = HTML(value=html_str)
@@ -838,17 +922,13 @@ function toggleColumn(el, n) {
         restore_pvals.pvals = pvals
         if pvals is None:
             restore_pvals.visible = False
+        image_widget = self._image_widget(image_data, colors=colors)
+        tab_widget = VBox(children=[image_widget, html_widget])
         if old_ipython is True:
-            image_widget = Image()
-            image_widget.value = image_data
-            tab_widget = VBox(children=[image_widget, html_widget])
             if colors is not None:
                 html_widgets = self.colorbar_tabs(colors)
                 tab_widget.description='Figure'
                 tab_widget = Tab(children=[tab_widget]+html_widgets)
-        else:
-            image_widget = self._image_widget_new(image_data, colors=colors)
-            tab_widget = VBox(children=[image_widget, html_widget])
         restore_pvals.on_click(self.restore_figure_pvals)
         if old_ipython is True:
             wi = Popup(children=[tab_widget, restore_pvals])
@@ -42,14 +42,27 @@ from figures_widget import MakePlot, DisplayFigures
 from tables_widget import DisplayTables
 from parameters_widget import EditParameters
 
+from dspace.display.background import BackgroundTasks
+from dspace.archive import is_archive, save_analysis, load_analysis
+
 import cPickle as pickle
 import base64
 
 from os import listdir
-from os.path import isfile, join
+from os.path import isfile, join, abspath
 
 
 class WidgetSavedData(object):
+
+    settings_fields = ['equations',
+                       'name',
+                       'version',
+                       'cyclical',
+                       'codominance',
+                       'auxiliary',
+                       'constraints',
+                       'symbols',
+                       'options',]
    
     @staticmethod
     def load_widget_data(interactive, version=''):
@@ -67,6 +80,22 @@ class WidgetSavedData(object):
         else:
             version = '-V' + version
         file_name = name+version+'.dsipy'
+        interactive.set_saved_analysis(None)
+        if is_archive(file_name) is False:
+            WidgetSavedData.load_pickled_widget_data(interactive, file_name)
+            return
+        analysis = load_analysis(file_name)
+        interactive.set_saved_analysis(analysis)
+        saved = dict(analysis.settings)
+        saved['ds'] = analysis.design_space
+        saved['pvals'] = analysis.parameter_sets.get('pvals')
+        saved['figure_data'] = analysis.figures
+        saved['table_data'] = analysis.tables
+        interactive.__dict__.update(saved)
+
+    @staticmethod
+    def load_pickled_widget_data(interactive, file_name):
+        ''' Loads the data saved by versions that pickled the widget data. '''
         f = open(file_name, 'r')
         saved_data = pickle.load(f)
         f.close()
@@ -79,30 +108,32 @@ class WidgetSavedData(object):
     
     def __init__(self, interactive):
         setattr(self, 'saved', {})
-        save_fields = ['ds', 
-                       'equations',
-                       'name',
-                       'version',
-                       'pvals',
-                       'cyclical',
-                       'codominance',
-                       'auxiliary',
-                       'constraints',
-                       'table_data',
-                       'symbols',
-                       'options',]
+        save_fields = ['ds', 'pvals', 'table_data', 'figure_data'] + self.settings_fields
         self.saved.update({i:interactive.__dict__[i] for i in save_fields if i in interactive.__dict__})
-        figure_data = interactive.figure_data
-        figure_data = [tuple([base64.b64encode(i[0])] + list(i[1:])) for i in figure_data]
-        self.saved['figure_data'] = figure_data
+        setattr(self, 'source', interactive.__dict__.get('saved_analysis'))
         
     def save_data(self):
+        ''' Saves the design space, its cached cases, the parameter values,
+            the figures and the tables in separate sections of an archive,
+            so that they are decoded only when they are used. The sections
+            that are unchanged are copied from the archive the analysis was
+            loaded from. Returns the name of the file. '''
         version = self.saved['version']
         if version != '':
             version = '-V'+self.saved['version']
-        f = open(self.saved['name']+version+'.dsipy', 'w')
-        pickle.dump(self, f)
-        f.close() 
+        parameter_sets = None
+        if self.saved.get('pvals') is not None:
+            parameter_sets = {'pvals':self.saved['pvals']}
+        settings = {i:self.saved[i] for i in self.settings_fields if i in self.saved}
+        file_name = self.saved['name']+version+'.dsipy'
+        save_analysis(file_name,
+                      design_space=self.saved.get('ds'),
+                      parameter_sets=parameter_sets,
+                      figures=self.saved.get('figure_data', []),
+                      tables=self.saved.get('table_data', []),
+                      settings=settings,
+                      source=self.source)
+        return file_name
                        
 
 class InteractiveInput(object):
@@ -135,6 +166,8 @@ class InteractiveInput(object):
         setattr(self, 'tables', None)
         setattr(self, 'table_data', [])
         setattr(self, 'display_system', None)
+        setattr(self, 'tasks', BackgroundTasks())
+        setattr(self, 'saved_analysis', None)
         setattr(self, 'options', dict(kwargs))
         self.options.update(center_axes=centered_axes, 
                             xaxis=xaxis, yaxis=yaxis,
@@ -254,6 +287,14 @@ class InteractiveInput(object):
         ## b.version.value = self.version
         self.widget.selected_index = 0
         
+    def set_saved_analysis(self, analysis):
+        ''' Keeps the archive of the analysis that was loaded or saved last,
+            closing the previous one.
+        '''
+        if self.saved_analysis is not None and self.saved_analysis is not analysis:
+            self.saved_analysis.close()
+        self.saved_analysis = analysis
+
     def save_widget_data(self, b):
         save_widget = SavePopupWidget(self)
         widget_container = save_widget.save_popup_widget()
@@ -264,6 +305,7 @@ class InteractiveInput(object):
         self.ds = None
         self.figure_data = []
         self.table_data = []
+        self.set_saved_analysis(None)
         self.widget.close()
         self.widget = Tab()
         display(self.root)   
@@ -458,6 +500,7 @@ class InteractiveInput(object):
             b.description = 'Done'
             return
         self.version_field.visible = False
+        self.tasks.cancel()
         self.equations = [i.strip() for i in str(b.equations.value).split('\n') if len(i.strip()) > 0]
         self.auxiliary = [i.strip() for i in str(b.aux.value).split(',') if len(i.strip()) > 0] 
         self.constraints = [i.strip() for i in str(b.constraints.value).split(',') if len(i.strip()) > 0] 
@@ -553,7 +596,10 @@ class SavePopupWidget(object):
         self.save_data.box_style = 'success'
         self.save_data.children = [HTML(value='<center><b>Saving Data</b></center>')]
         save = WidgetSavedData(controller)
-        save.save_data()
+        file_name = save.save_data()
+        analysis = controller.saved_analysis
+        if analysis is None or abspath(analysis.path) != abspath(file_name):
+            controller.set_saved_analysis(load_analysis(file_name, design_space=controller.ds))
         controller.display_system.update_display()
         controller = self.controller
         controller.root.children = [controller.widget]
@@ -0,0 +1,228 @@
+''' Background computations for the notebook widgets.
+
+Plots and tables that are requested from a widget are computed by a worker
+thread, so that the notebook remains responsive while they are computed. Each
+request has a name and a cancellation token, and a new request with the same
+name cancels the previous one, so that only the latest request is completed
+when, for example, a slider is moved several times. Task functions receive the
+token as their first argument and should call its check method between
+expensive steps, which raises TaskCancelled once the request is stale. The
+analyses of a design space are stopped during their computation by passing
+them a CancellableExecutor, which checks the token between chunks of cases
+and while it waits for the workers of the executor.
+
+A task can publish parts of its result before it is done, for example the
+first page of a table. The done, failed, partial and progress callbacks of a
+task update widgets, so they are not called by the worker thread but
+dispatched to the thread of the kernel, through the event loop of the kernel
+when the tasks run in a notebook.
+
+'''
+
+import sys
+import threading
+import traceback
+import Queue
+
+from dspace.executors import SerialExecutor, get_executor
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancellationToken(object):
+
+    def __init__(self, name='', progress=None, partial=None):
+        setattr(self, 'name', name)
+        setattr(self, '_event', threading.Event())
+        setattr(self, '_progress', progress)
+        setattr(self, '_partial', partial)
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def check(self):
+        ''' Raises TaskCancelled if the task has been cancelled. '''
+        if self._event.is_set() is True:
+            raise TaskCancelled, 'Task ' + str(self.name) + ' was cancelled'
+
+    def report(self, fraction, message=''):
+        ''' Reports the progress of the task, with fraction a number between
+            0 and 1.
+        '''
+        if self._progress is not None:
+            self._progress(fraction, message)
+
+    def publish(self, result):
+        ''' Sends a part of the result of the task, which can be shown before
+            the task is done.
+        '''
+        if self._partial is not None:
+            self._partial(result)
+
+
+class CancellableExecutor(SerialExecutor):
+    ''' Evaluates the tasks of an analysis with another executor in chunks,
+        checking a cancellation token before each chunk.
+    '''
+
+    def __init__(self, token, executor=None, chunk_size=None):
+        executor = get_executor(executor)
+        if chunk_size is None:
+            workers = getattr(executor, 'processes', getattr(executor, 'threads', 1))
+            chunk_size = 1 if workers <= 1 else 4*workers
+        setattr(self, 'token', token)
+        setattr(self, 'executor', executor)
+        setattr(self, 'chunk_size', chunk_size)
+
+    def check(self):
+        ''' Raises TaskCancelled if the task has been cancelled. '''
+        self.token.check()
+
+    def map(self, function, design_space, items, **kwargs):
+        items = list(items)
+        results = list()
+        for i in xrange(0, len(items), self.chunk_size):
+            self.token.check()
+            chunk = items[i:i+self.chunk_size]
+            if hasattr(self.executor, '_map') is True:
+                results += self.executor._map(function, design_space, chunk,
+                                              kwargs, canceller=self)
+            else:
+                results += self.executor.map(function, design_space, chunk, **kwargs)
+        return results
+
+
+def kernel_dispatch():
+    ''' The function that schedules callback(*args) in the event loop of the
+        running IPython kernel, or None outside of a kernel.
+    '''
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return None
+    shell = get_ipython()
+    kernel = getattr(shell, 'kernel', None)
+    io_loop = getattr(kernel, 'io_loop', None)
+    if io_loop is None:
+        return None
+    return io_loop.add_callback
+
+
+class BackgroundTasks(object):
+
+    def __init__(self, enabled=True, dispatch=None):
+        if dispatch is None:
+            dispatch = kernel_dispatch()
+        setattr(self, 'enabled', enabled)
+        setattr(self, 'dispatch', dispatch)
+        setattr(self, '_queue', Queue.Queue())
+        setattr(self, '_tokens', {})
+        setattr(self, '_lock', threading.Lock())
+        setattr(self, '_worker', None)
+
+    def _start_worker(self):
+        if self._worker is not None and self._worker.is_alive() is True:
+            return
+        worker = threading.Thread(target=self._run)
+        worker.daemon = True
+        self._worker = worker
+        worker.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                self._run_task(*task)
+            finally:
+                self._queue.task_done()
+
+    def _run_task(self, token, function, args, kwargs, done, failed):
+        try:
+            token.check()
+            result = function(token, *args, **kwargs)
+            token.check()
+        except TaskCancelled:
+            return
+        except Exception as e:
+            if token.cancelled is True:
+                return
+            if failed is None:
+                traceback.print_exc(file=sys.stderr)
+            else:
+                self._dispatch(token, failed, e)
+            return
+        finally:
+            with self._lock:
+                if self._tokens.get(token.name) is token:
+                    self._tokens.pop(token.name)
+        if done is not None:
+            self._dispatch(token, done, result)
+
+    def _dispatch(self, token, callback, *args):
+        ''' Calls a callback of a task in the thread of the kernel, unless the
+            task is cancelled before the callback is reached.
+        '''
+        def call():
+            if token.cancelled is False:
+                callback(*args)
+        if self.enabled is False or self.dispatch is None:
+            call()
+        else:
+            self.dispatch(call)
+
+    def submit(self, name, function, args=(), kwargs=None, done=None,
+               failed=None, progress=None, partial=None):
+        ''' Schedules function(token, *args, **kwargs) and cancels the pending
+            or running task with the same name.
+
+        The done callback receives the result of a task that completed
+        without being cancelled, and the failed callback receives the
+        exception raised by a task that was not cancelled. The progress
+        callback receives the fraction and message reported by the task, and
+        the partial callback receives the parts of the result it publishes.
+        The callbacks are called in the thread of the kernel. Returns the
+        cancellation token of the new task.
+        '''
+        if kwargs is None:
+            kwargs = {}
+        report = None
+        if progress is not None:
+            report = lambda fraction, message: self._dispatch(token, progress,
+                                                              fraction, message)
+        publish = None
+        if partial is not None:
+            publish = lambda result: self._dispatch(token, partial, result)
+        token = CancellationToken(name=name, progress=report, partial=publish)
+        with self._lock:
+            previous = self._tokens.get(name)
+            if previous is not None:
+                previous.cancel()
+            self._tokens[name] = token
+        task = (token, function, args, kwargs, done, failed)
+        if self.enabled is False:
+            self._run_task(*task)
+            return token
+        self._start_worker()
+        self._queue.put(task)
+        return token
+
+    def cancel(self, name=None):
+        ''' Cancels the task with a name, or every task if name is None. '''
+        with self._lock:
+            if name is None:
+                tokens = self._tokens.values()
+                self._tokens.clear()
+            else:
+                tokens = [self._tokens.pop(name)] if name in self._tokens else []
+        for token in tokens:
+            token.cancel()
+
+    def is_running(self, name):
+        with self._lock:
+            return name in self._tokens
@@ -52,18 +52,58 @@ else:
 from IPython.display import clear_output, display
 import cStringIO
 from matplotlib.backends.backend_agg import FigureCanvasAgg  
+from matplotlib.figure import Figure
+
+from dspace.display.background import BackgroundTasks
 
 
 def make_2D_slice(ds=None, p_vals=None, x_variable=None, y_variable=None,
-                  range_x=None, range_y=None, intersections=None, image_widget=None, highlight='', **kwargs):
+                  range_x=None, range_y=None, intersections=None, image_widget=None, highlight='',
+                  tasks=None, **kwargs):
     for i in kwargs:
         p_vals[str(i)] = 10**kwargs[str(i)]
+    if image_widget is not None and tasks is not None:
+        tasks.submit('2D slice', _make_2D_slice_image,
+                     args=(ds, p_vals.copy(), x_variable, y_variable,
+                           range_x, range_y, intersections, highlight),
+                     done=lambda data: setattr(image_widget, 'value', data))
+        return
     x_range = range_x
     y_range = range_y
     fig = plt.Figure(figsize=[6, 4], dpi=600, facecolor='w')
     fig=plt.gcf()
     ax = fig.add_axes([0.2, 0.2, 0.7, 0.7])
     ax = plt.gca()
+    _draw_2D_slice_highlight(ds, ax, p_vals, x_variable, y_variable, x_range, y_range,
+                             intersections, highlight)
+    if image_widget is not None:
+        fig = plt.gcf()
+        canvas = FigureCanvasAgg(fig)
+        buf = cStringIO.StringIO()
+        canvas.print_png(buf)
+        data = buf.getvalue()
+        image_widget.value = data
+        plt.close()
+    return
+
+def _make_2D_slice_image(token, ds, p_vals, x_variable, y_variable, range_x, range_y,
+                         intersections, highlight):
+    ''' Draws a 2D slice in a background task and returns the image that is
+        shown in the image widget, unless a newer slice has been requested in
+        the meantime.
+    '''
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.2, 0.2, 0.7, 0.7])
+    _draw_2D_slice_highlight(ds, ax, p_vals, x_variable, y_variable, range_x, range_y,
+                             intersections, highlight)
+    token.check()
+    buf = cStringIO.StringIO()
+    canvas.print_png(buf)
+    return buf.getvalue()
+
+def _draw_2D_slice_highlight(ds, ax, p_vals, x_variable, y_variable, x_range, y_range,
+                             intersections, highlight):
     ds.draw_2D_slice(ax, p_vals, str(x_variable), str(y_variable),
                              x_range, y_range,
                      intersections=intersections)
@@ -80,20 +120,19 @@ def make_2D_slice(ds=None, p_vals=None, x_variable=None, y_variable=None,
         except:
             pass
     ax.plot(log10(p_vals[x_variable]), log10(p_vals[y_variable]), 'k.')
-    if image_widget is not None:
-        fig = plt.gcf()
-        canvas = FigureCanvasAgg(fig) 
-        buf = cStringIO.StringIO()
-        canvas.print_png(buf)
-        data = buf.getvalue()
-        image_widget.value = data
-        plt.close()
-    return
-    
-@monkeypatch_method(dspace.models.designspace.DesignSpace)   
+
+@monkeypatch_method(dspace.models.designspace.DesignSpace)
 def draw_2D_slice_notebook(self, p_vals, x_variable, y_variable,
                            range_x, range_y, slider_ranges,
-                           image_container=None, **kwargs):
+                           image_container=None, tasks=None, **kwargs):
+    ''' Creates a widget with sliders that redraws a 2D slice in the image
+        container. Slices are drawn by a background task, and only the latest
+        slice requested by the sliders is shown, unless tasks is False.
+    '''
+    if tasks is None:
+        tasks = BackgroundTasks()
+    elif tasks is False:
+        tasks = None
     plot_widget = interactive(make_2D_slice, ds=fixed(self), 
                               p_vals=fixed(p_vals),
                               x_variable=fixed(x_variable),
@@ -106,6 +145,7 @@ def draw_2D_slice_notebook(self, p_vals, x_variable, y_variable,
                                              'All':range(1, 100)},
                               highlight=Text(value=''),
                               image_widget=fixed(image_container),
+                              tasks=fixed(tasks),
                               **{i:FloatSlider(min=log10(slider_ranges[i][0]),
                                                              max=log10(slider_ranges[i][1]),
                                                              step=log10(slider_ranges[i][1]/slider_ranges[i][0])/20,
@@ -118,6 +158,6 @@ def draw_2D_slice_notebook(self, p_vals, x_variable, y_variable,
                   x_variable=x_variable, y_variable=y_variable,
                   range_x=range_x, range_y=range_y, 
                   intersections=range(1, 100), image_widget=image_container, 
-                  highlight='')
+                  highlight='', tasks=tasks)
     return plot_widget
     
\ No newline at end of file
@@ -0,0 +1,238 @@
+''' Execution backends for analyses that evaluate many cases independently.
+
+An executor maps a task function over a list of items, usually case
+numbers, for a single design space. Each task function has the signature
+function(design_space, item, **kwargs) and must be defined at module level
+so that it can be sent to worker processes.
+
+The process executor keeps a pool of worker processes, which is started the
+first time it is used and reused by later calls of map for the same design
+space. The design space is sent to each worker once, when the worker starts,
+so that the results cached by a worker are kept between calls. Each task
+sends a chunk of items with the keyword arguments, which are split in one
+chunk per worker by default. The pool is stopped by close, at the end of a
+with block, when it is started for another design space or when its design
+space is garbage collected. The 'process' executor returned by get_executor
+is shared, and is closed when the interpreter exits.
+
+    >>> with dspace.ProcessExecutor() as executor:
+    ...     ds.draw_2D_slice(ax, pvals, 'X1', 'X2', range_x, range_y,
+    ...                      executor=executor)
+
+The thread executor only helps tasks that release the GIL, such as tasks
+that wait for I/O. The analyses of the design space toolbox hold the GIL
+while they call the C library and are evaluated one at a time by it.
+
+An executor with a check method can stop an analysis before it is done, for
+example when the request that started it is stale. Analyses call
+cancellation_point between the steps that are not evaluated by map, which
+calls the check method of such an executor.
+
+'''
+
+import atexit
+import cPickle as pickle
+import multiprocessing
+import threading
+import weakref
+from multiprocessing.pool import ThreadPool
+
+_worker_design_space = None
+
+def _initialize_worker(data):
+    global _worker_design_space
+    _worker_design_space = pickle.loads(data)
+
+def _run_task(task):
+    function, items, kwargs = task
+    return [function(_worker_design_space, item, **kwargs) for item in items]
+
+
+class SerialExecutor(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        ''' Releases the workers of the executor. '''
+        pass
+
+    def map(self, function, design_space, items, **kwargs):
+        ''' Evaluates function(design_space, item, **kwargs) for each item,
+            returning the results in the same order as the items.
+        '''
+        return self._map(function, design_space, items, kwargs)
+
+    def _map(self, function, design_space, items, kwargs, canceller=None):
+        results = list()
+        for item in items:
+            cancellation_point(canceller)
+            results.append(function(design_space, item, **kwargs))
+        return results
+
+
+class ThreadExecutor(SerialExecutor):
+    ''' Evaluates the tasks in a pool of threads, which is only faster than
+        the serial executor for tasks that release the GIL, such as tasks
+        that wait for I/O.
+    '''
+
+    def __init__(self, threads=None):
+        if threads is None:
+            threads = multiprocessing.cpu_count()
+        setattr(self, 'threads', threads)
+        setattr(self, '_pool', None)
+        setattr(self, '_lock', threading.Lock())
+
+    def close(self):
+        ''' Stops the threads after their tasks are done. '''
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def _map(self, function, design_space, items, kwargs, canceller=None):
+        items = list(items)
+        if len(items) <= 1 or self.threads <= 1:
+            return super(ThreadExecutor, self)._map(function, design_space, items,
+                                                    kwargs, canceller=canceller)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.threads)
+            result = self._pool.map_async(lambda item: function(design_space, item, **kwargs),
+                                          items)
+        return _wait(result, canceller)
+
+
+class ProcessExecutor(SerialExecutor):
+    ''' Evaluates the tasks in a pool of worker processes, which is stopped
+        by close or at the end of a with block.
+    '''
+
+    def __init__(self, processes=None, chunksize=None):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        setattr(self, 'processes', processes)
+        setattr(self, 'chunksize', chunksize)
+        setattr(self, '_pool', None)
+        setattr(self, '_design_space', None)
+        setattr(self, '_lock', threading.Lock())
+
+    def _started(self, design_space):
+        if self._pool is not None and self._design_space() is design_space:
+            return self._pool
+        self._close_pool()
+        data = pickle.dumps(design_space, pickle.HIGHEST_PROTOCOL)
+        self._pool = multiprocessing.Pool(self.processes,
+                                          initializer=_initialize_worker,
+                                          initargs=(data,))
+        self._design_space = weakref.ref(design_space, self._collected)
+        return self._pool
+
+    def _collected(self, reference):
+        ## Called when the design space of the workers is garbage collected,
+        ## possibly while the lock is held by this thread, so the pool is
+        ## closed without joining the workers.
+        pool = self._pool
+        if pool is None or self._design_space is not reference:
+            return
+        self._pool = None
+        self._design_space = None
+        pool.close()
+
+    def _close_pool(self):
+        pool = self._pool
+        self._pool = None
+        self._design_space = None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def start(self, design_space):
+        ''' Starts the worker processes for a design space, unless they are
+            running. The workers of another design space are stopped.
+        '''
+        with self._lock:
+            self._started(design_space)
+
+    def close(self):
+        ''' Stops the worker processes after their tasks are done. '''
+        with self._lock:
+            self._close_pool()
+
+    def _map(self, function, design_space, items, kwargs, canceller=None):
+        items = list(items)
+        if len(items) <= 1 or self.processes <= 1:
+            return super(ProcessExecutor, self)._map(function, design_space, items,
+                                                     kwargs, canceller=canceller)
+        chunksize = self.chunksize
+        if chunksize is None:
+            chunksize = -(-len(items)//self.processes)
+        tasks = [(function, items[i:i+chunksize], kwargs)
+                 for i in xrange(0, len(items), chunksize)]
+        with self._lock:
+            result = self._started(design_space).map_async(_run_task, tasks, chunksize=1)
+        results = list()
+        for chunk in _wait(result, canceller):
+            results += chunk
+        return results
+
+
+def _wait(result, canceller, interval=0.1):
+    ''' Waits for the result of a pool, calling the cancellation point of
+        the canceller between waits. A cancelled analysis does not wait for
+        the tasks that were sent to the pool, whose results are discarded.
+    '''
+    while True:
+        cancellation_point(canceller)
+        try:
+            return result.get(interval)
+        except multiprocessing.TimeoutError:
+            pass
+
+
+_process_executor = None
+_process_executor_lock = threading.Lock()
+
+def get_executor(executor=None):
+    ''' Returns an executor object for the executor argument of an analysis.
+
+    The executor can be None or 'serial', 'thread', 'process', or an
+    object with the executor map method, which is returned unchanged. The
+    'process' executor is shared, so that its worker processes are reused.
+    '''
+    if executor is None:
+        return SerialExecutor()
+    if isinstance(executor, str) is True:
+        if executor == 'serial':
+            return SerialExecutor()
+        if executor == 'thread':
+            return ThreadExecutor()
+        if executor == 'process':
+            return _shared_process_executor()
+        raise ValueError, 'Unknown executor: ' + executor
+    if hasattr(executor, 'map') is False:
+        raise TypeError, 'executor must be a string or an executor object'
+    return executor
+
+def cancellation_point(executor):
+    ''' Calls the check method of an executor that has one, which raises an
+        exception if the analysis that uses it should stop.
+    '''
+    check = getattr(executor, 'check', None)
+    if check is not None:
+        check()
+
+def _shared_process_executor():
+    global _process_executor
+    with _process_executor_lock:
+        if _process_executor is None:
+            _process_executor = ProcessExecutor()
+            atexit.register(_process_executor.close)
+        return _process_executor
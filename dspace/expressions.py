@@ -1,18 +1,228 @@
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
+from dspace.handles import SwigObject
+from dspace.caches import _LRUCache
 
-class Expression(object):
+import re
+import numpy as np
+
+_token_pattern = re.compile(r'''\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|
+                                    (?P<name>[A-Za-z_$][A-Za-z0-9_$]*)|
+                                    (?P<operator>[-+*/^(),]))''', re.VERBOSE)
+
+_functions = {'log':np.log10,
+              'log10':np.log10,
+              'ln':np.log,
+              'exp':np.exp,
+              'sqrt':np.sqrt,
+              'abs':np.abs}
+
+_operators = {'+':np.add,
+              '-':np.subtract,
+              '*':np.multiply,
+              '/':np.divide,
+              '^':np.power}
+
+_compiled_expressions = _LRUCache(256)
+
+def _tokenize(string):
+    tokens = list()
+    position = 0
+    string = string.strip()
+    while position < len(string):
+        match = _token_pattern.match(string, position)
+        if match is None or match.end() == position:
+            raise ValueError, 'Cannot compile expression "' + string + '"'
+        position = match.end()
+        for kind in ['number', 'name', 'operator']:
+            if match.group(kind) is not None:
+                tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+class _ExpressionCompiler(object):
+    ''' Recursive descent parser that turns the string representation of an
+        expression into a tree of NumPy operations.
+
+    Each node of the tree is a function that takes a dictionary of arrays
+    keyed by variable name and returns an array, so that an expression is
+    evaluated over all points with one ufunc call per operator.
+    '''
+
+    def __init__(self, string):
+        self.string = string
+        self.tokens = _tokenize(string)
+        self.index = 0
+
+    def compile(self):
+        node = self._sum()
+        if self.index != len(self.tokens):
+            raise ValueError, 'Cannot compile expression "' + self.string + '"'
+        if isinstance(node, float):
+            return lambda values: node
+        return node
+
+    def _peek(self):
+        if self.index < len(self.tokens):
+            return self.tokens[self.index]
+        return (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.index += 1
+        return token
+
+    def _expect(self, value):
+        if self._next()[1] != value:
+            raise ValueError, 'Cannot compile expression "' + self.string + '"'
+
+    def _binary(self, operator, lhs, rhs):
+        ufunc = _operators[operator]
+        if isinstance(lhs, float) and isinstance(rhs, float):
+            return float(ufunc(lhs, rhs))
+        if isinstance(lhs, float):
+            return lambda values: ufunc(lhs, rhs(values))
+        if isinstance(rhs, float):
+            return lambda values: ufunc(lhs(values), rhs)
+        return lambda values: ufunc(lhs(values), rhs(values))
+
+    def _sum(self):
+        node = self._product()
+        while self._peek()[1] in ('+', '-'):
+            operator = self._next()[1]
+            node = self._binary(operator, node, self._product())
+        return node
+
+    def _product(self):
+        node = self._unary()
+        while self._peek()[1] in ('*', '/'):
+            operator = self._next()[1]
+            node = self._binary(operator, node, self._unary())
+        return node
+
+    def _unary(self):
+        if self._peek()[1] == '-':
+            self._next()
+            return self._binary('*', -1., self._unary())
+        if self._peek()[1] == '+':
+            self._next()
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._atom()
+        if self._peek()[1] == '^':
+            self._next()
+            node = self._binary('^', node, self._unary())
+        return node
+
+    def _atom(self):
+        kind, value = self._next()
+        if kind == 'number':
+            return float(value)
+        if kind == 'name':
+            if self._peek()[1] == '(':
+                if value not in _functions:
+                    raise ValueError, 'Cannot compile function "' + value + '"'
+                self._next()
+                argument = self._sum()
+                self._expect(')')
+                function = _functions[value]
+                if isinstance(argument, float):
+                    return float(function(argument))
+                return lambda values: function(argument(values))
+            return lambda values: np.asarray(values[value], dtype=float)
+        if value == '(':
+            node = self._sum()
+            self._expect(')')
+            return node
+        raise ValueError, 'Cannot compile expression "' + self.string + '"'
+
+
+class _LogAffineAnalyzer(_ExpressionCompiler):
+    ''' Parser that classifies each node of an expression as a constant, a
+        monomial, which is a product of powers of variables with constant
+        exponents, or a function that is affine in the logarithms of the
+        variables. Names of logarithmic gains, which start with '$L_', are
+        constants.
+    '''
+
+    def analyze(self):
+        ''' Returns 'constant', 'monomial' or 'affine' for the whole
+            expression, or None if it is none of them.
+        '''
+        kind = self._sum()
+        if self.index != len(self.tokens):
+            raise ValueError, 'Cannot compile expression "' + self.string + '"'
+        return kind
+
+    def _binary(self, operator, lhs, rhs):
+        if isinstance(lhs, float) is True:
+            lhs = 'constant'
+        if lhs is None or rhs is None:
+            return None
+        kinds = set([lhs, rhs])
+        if kinds == set(['constant']):
+            return 'constant'
+        if operator in ('+', '-'):
+            if kinds <= set(['constant', 'affine']):
+                return 'affine'
+            return None
+        if operator == '*':
+            if kinds <= set(['constant', 'monomial']):
+                return 'monomial'
+            if kinds == set(['constant', 'affine']):
+                return 'affine'
+            return None
+        if operator == '/':
+            if rhs == 'constant' and lhs in ('monomial', 'affine'):
+                return lhs
+            if rhs == 'monomial' and lhs in ('constant', 'monomial'):
+                return 'monomial'
+            return None
+        if rhs != 'constant':
+            return None
+        if lhs in ('constant', 'monomial'):
+            return lhs
+        return None
+
+    def _atom(self):
+        kind, value = self._next()
+        if kind == 'number':
+            return 'constant'
+        if kind == 'name':
+            if self._peek()[1] == '(':
+                if value not in _functions:
+                    raise ValueError, 'Cannot compile function "' + value + '"'
+                self._next()
+                argument = self._sum()
+                self._expect(')')
+                if argument == 'constant':
+                    return 'constant'
+                if value in ('log', 'log10', 'ln') and argument == 'monomial':
+                    return 'affine'
+                if value == 'sqrt' and argument == 'monomial':
+                    return 'monomial'
+                return None
+            if value.startswith('$L_') is True:
+                return 'constant'
+            return 'monomial'
+        if value == '(':
+            node = self._sum()
+            self._expect(')')
+            return node
+        raise ValueError, 'Cannot compile expression "' + self.string + '"'
+
+
+class Expression(SwigObject):
+
+    _swig_type = 'DSExpression'
     
     def __init__(self, string_repr):
         
         setattr(self, '_swigwrapper', None)
         if string_repr is not None:
             self._swigwrapper = DSExpressionByParsingString(string_repr)
-    
-    def __del__(self):
-        
-        if self._swigwrapper is not None:
-            DSExpressionFree(self._swigwrapper)
         
     def __str__(self):
         
@@ -46,8 +256,7 @@ class Expression(object):
     def subst(self, replace_dict, **kwargs):
         replace_dict = dict(replace_dict)
         replace_dict.update(kwargs)
-        new_expression = Expression('0')
-        DSExpressionFree(new_expression._swigwrapper)
+        new_expression = Expression(None)
         new_expression._swigwrapper = DSExpressionCopy(self._swigwrapper)
         for key,value in replace_dict.iteritems():
             target = Expression(str(key))
@@ -56,7 +265,6 @@ class Expression(object):
                     new_expression._swigwrapper,
                     target._swigwrapper,
                     subs._swigwrapper)
-            DSExpressionFree(new_expression._swigwrapper)
             new_expression._swigwrapper = temp
         return new_expression
         
@@ -66,6 +274,46 @@ class Expression(object):
             p_vals = VariablePool(kwargs)
         return DSExpressionEvaluateWithVariablePool(self._swigwrapper,
                                                     p_vals._swigwrapper)
+
+    def compile(self):
+        ''' Compiles the expression into a vectorized NumPy function.
+
+        The compiled function takes a dictionary of scalars or arrays keyed
+        by variable name and returns the value of the expression for every
+        element, without building a VariablePool. Compiled functions are
+        cached by the string representation of the expression.
+
+        Raises:
+            ValueError: If the expression uses an operator or function
+                that cannot be evaluated with NumPy.
+        '''
+        string = str(self)
+        function = _compiled_expressions.get(string)
+        if function is None:
+            function = _ExpressionCompiler(string).compile()
+            _compiled_expressions.put(string, function)
+        return function
+
+    def is_log_affine(self):
+        ''' Whether the expression is an affine function of the logarithms
+            of its variables, such as the logarithm of a product of powers of
+            variables. Expressions that cannot be compiled are not.
+        '''
+        try:
+            return _LogAffineAnalyzer(str(self)).analyze() in ('constant', 'affine')
+        except ValueError:
+            return False
+
+    def eval_with_arrays(self, values=None, **kwargs):
+        ''' Evaluates the expression for arrays of values keyed by variable
+            name, returning an array with the broadcast shape of the values.
+        '''
+        if values is None:
+            values = dict()
+        if len(kwargs) > 0:
+            values = dict(values)
+            values.update(kwargs)
+        return self.compile()(values)
     
     @property
     def lhs(self):
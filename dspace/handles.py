@@ -0,0 +1,198 @@
+''' Ownership of the C objects wrapped by the dspace classes.
+
+Every C object of the design space toolbox that is wrapped by a Python
+object is held by a SwigHandle. An owned handle frees its C object with the
+free function of its type when it is released or garbage collected. A
+borrowed handle refers to a C object that belongs to another object, such as
+the S-system of a case or the variable pools of a design space; it never
+frees the C object, and keeps a reference to the handle of its owner so that
+the owner is not freed while the borrowed pointer is in use.
+
+Classes that wrap C objects subclass SwigObject, whose _swigwrapper
+attribute stores the pointer in a handle. Assigning a pointer creates an
+owned handle and assigning a handle, e.g. one created by borrowed, uses it
+as is. Replacing or deleting the handle releases the previous C object.
+
+The leak tracking mode records the owned handles that have not been
+released, so that the outstanding C allocations can be reported per type.
+It is enabled by enable_leak_tracking, or by setting the DSPACE_TRACK_LEAKS
+environment variable before dspace is imported, and has no overhead when it
+is disabled. Only the objects allocated while it is enabled are reported.
+
+    >>> dspace.enable_leak_tracking(stack=True)
+    >>> ds = dspace.DesignSpace(eq)
+    >>> del ds
+    >>> print dspace.leak_report()
+
+'''
+
+import os
+import traceback
+
+from dspace.SWIG.dspace_interface import *
+
+_tracked = None
+_track_stack = False
+
+def _free_variable_pool(pointer):
+    DSVariablePoolSetReadWriteAdd(pointer)
+    DSVariablePoolFree(pointer)
+
+_FREE_FUNCTIONS = {'DSExpression':'DSExpressionFree',
+                   'DSVariablePool':'_free_variable_pool',
+                   'DSGMASystem':'DSGMASystemFree',
+                   'DSSSystem':'DSSSystemFree',
+                   'DSCase':'DSCaseFree',
+                   'DSCyclicalCase':'DSCyclicalCaseFree',
+                   'DSDesignSpace':'DSDesignSpaceFree'}
+
+
+class SwigHandle(object):
+    ''' A pointer to a C object, the name of its type and whether the
+        handle owns the C object or borrows it from another handle.
+    '''
+
+    __slots__ = ('pointer', 'type_name', 'owned', 'owner')
+
+    def __init__(self, pointer, type_name, owned=True, owner=None):
+        if type_name not in _FREE_FUNCTIONS:
+            raise ValueError, 'Unknown C type: ' + str(type_name)
+        self.pointer = pointer
+        self.type_name = type_name
+        self.owned = owned
+        self.owner = owner
+        if owned is True and _tracked is not None:
+            _track(self)
+
+    def __del__(self):
+        self.release()
+
+    def __repr__(self):
+        kind = 'owned' if self.owned is True else 'borrowed'
+        return '<SwigHandle ' + kind + ' ' + str(self.type_name) + '>'
+
+    def release(self):
+        ''' Frees the C object if the handle owns it. The handle refers to
+            no object afterwards.
+        '''
+        pointer = self.pointer
+        self.pointer = None
+        self.owner = None
+        if pointer is None or self.owned is False:
+            return
+        if _tracked is not None:
+            _tracked.pop(id(self), None)
+        free = globals().get(_FREE_FUNCTIONS[self.type_name])
+        if free is not None:
+            free(pointer)
+
+    def disown(self):
+        ''' Returns the pointer and gives up its ownership, for C functions
+            that take ownership of the object.
+        '''
+        pointer = self.pointer
+        if self.owned is True and _tracked is not None:
+            _tracked.pop(id(self), None)
+        self.pointer = None
+        self.owner = None
+        return pointer
+
+
+def owned(pointer, type_name):
+    ''' Returns a handle that frees the C object when it is released. '''
+    return SwigHandle(pointer, type_name)
+
+def borrowed(pointer, type_name, owner=None):
+    ''' Returns a handle to a C object that belongs to another object. The
+        owner is the handle of that object, which is kept alive by the
+        borrowed handle.
+    '''
+    if isinstance(owner, SwigObject) is True:
+        owner = owner._handle
+    return SwigHandle(pointer, type_name, owned=False, owner=owner)
+
+
+class SwigObject(object):
+    ''' Base class of the objects that wrap a C object of the type given by
+        the _swig_type class attribute.
+    '''
+
+    _swig_type = None
+
+    def _get_swigwrapper(self):
+        handle = self.__dict__.get('_handle')
+        if handle is None:
+            return None
+        return handle.pointer
+
+    def _set_swigwrapper(self, swigwrapper):
+        if swigwrapper is not None and isinstance(swigwrapper, SwigHandle) is False:
+            swigwrapper = SwigHandle(swigwrapper, self._swig_type)
+        self.__dict__['_handle'] = swigwrapper
+
+    _swigwrapper = property(_get_swigwrapper, _set_swigwrapper)
+
+    @property
+    def _handle(self):
+        return self.__dict__.get('_handle')
+
+
+def _track(handle):
+    stack = None
+    if _track_stack is True:
+        stack = tuple(traceback.extract_stack()[:-3])
+    _tracked[id(handle)] = (handle.type_name, stack)
+
+def enable_leak_tracking(stack=False):
+    ''' Starts recording the C objects allocated by the wrapped classes
+        until they are freed. If stack is True, the stack where each object
+        was allocated is recorded as well.
+    '''
+    global _tracked, _track_stack
+    if _tracked is None:
+        _tracked = dict()
+    _track_stack = stack
+
+def disable_leak_tracking():
+    ''' Stops recording allocations and forgets the outstanding ones. '''
+    global _tracked
+    _tracked = None
+
+def outstanding_allocations():
+    ''' Returns a dictionary with the number of C objects of each type
+        allocated while leak tracking was enabled that have not been freed.
+    '''
+    counts = dict()
+    if _tracked is None:
+        return counts
+    for type_name, stack in _tracked.values():
+        counts[type_name] = counts.get(type_name, 0) + 1
+    return counts
+
+def leak_report(limit=10):
+    ''' Returns a table with the outstanding allocations of each type and,
+        if stacks are recorded, the limit locations that allocated most of
+        them.
+    '''
+    if _tracked is None:
+        return 'Leak tracking is not enabled'
+    counts = outstanding_allocations()
+    lines = ['{0:<16}  {1:>10}'.format('Type', 'Count')]
+    for type_name in sorted(counts, key=lambda name: counts[name], reverse=True):
+        lines.append('{0:<16}  {1:>10d}'.format(type_name, counts[type_name]))
+    lines.append('{0:<16}  {1:>10d}'.format('Total', sum(counts.values())))
+    locations = dict()
+    for type_name, stack in _tracked.values():
+        if not stack:
+            continue
+        key = (type_name,) + tuple(stack[-3:])
+        locations[key] = locations.get(key, 0) + 1
+    keys = sorted(locations, key=lambda key: locations[key], reverse=True)
+    for key in keys[:limit]:
+        lines.append('')
+        lines.append(str(locations[key]) + ' ' + key[0] + ' allocated at:')
+        lines.extend([line.rstrip('\n') for line in traceback.format_list(list(key[1:]))])
+    return '\n'.join(lines)
+
+if os.environ.get('DSPACE_TRACK_LEAKS'):
+    enable_leak_tracking(stack=os.environ.get('DSPACE_TRACK_LEAKS') == 'stack')
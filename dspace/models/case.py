@@ -10,11 +10,17 @@ from dspace.models.base import Equations,Model
 from dspace.models.gma import GMASystem
 from dspace.models.ssystem import SSystem
 from dspace.expressions import Expression
+from dspace.diskcache import arguments_key
+from dspace.handles import SwigObject, borrowed
 
 from math import *
 
+import numpy as np
 
-class Case(Model):
+
+class Case(Model, SwigObject):
+
+    _swig_type = 'DSCase'
     
     def __init__(self, model, swigwrapper, name=None, constraints=None, latex_symbols=None, **kwargs):
         ''' Init method for the model base class.
@@ -37,13 +43,6 @@ class Case(Model):
                 constraints = [constraints]
             if len(constraints) > 0:
                 DSCaseAddConstraints(self._swigwrapper, constraints, len(constraints))
-            
-    def __del__(self):
-        ''' 
-        '''
-        if self._swigwrapper is not None:
-            self._ssystem.set_swigwrapper(None)
-            DSCaseFree(self._swigwrapper)
         
     def __str__(self):
         case_info = self.name.split('Case')[1]
@@ -56,39 +55,43 @@ class Case(Model):
     def __getstate__(self):
         odict = self.__dict__.copy()
         odict['_swigwrapper'] = DSSWIGDSCaseEncodedBytes(self._swigwrapper)
+        del odict['_handle']
         del odict['_ssystem']
         del odict['_independent_variables']
         return odict
     
     def __setstate__(self, state):
+        state = dict(state)
+        encoded = state.pop('_swigwrapper')
         self.__dict__.update(state)
-        encoded = state['_swigwrapper']
         self.set_swigwrapper(DSSWIGDSCaseDecodeFromByteArray(encoded)) 
                
     def set_swigwrapper(self, case_swigwrapper):
+        ''' Sets the case wrapped by this object. The variable pools and the
+            S-system of the case are created the first time they are used.
+        '''
         self._swigwrapper = case_swigwrapper
-        Xd = VariablePool()
-        Xd.set_swigwrapper(DSVariablePoolCopy(DSSSystemXd(DSCaseSSystem(case_swigwrapper))))
-        for i in VariablePool():
-            if i not in self.dependent_variables:
-                raise NameError, 'Dependent Variables are inconsistent'
-        self._dependent_variables = Xd
-        Xi = VariablePool()
-        Xi.set_swigwrapper(DSVariablePoolCopy(DSSSystemXi(DSCaseSSystem(case_swigwrapper))))
-        self._independent_variables = Xi
-        eqs = list()
-        eqs_expr = DSSSystemEquations(DSCaseSSystem(case_swigwrapper))
-        for i in xrange(0, len(super(Case, self).equations)):
-            eqs.append(DSExpressionAsString(DSExpressionAtIndexOfExpressionArray(eqs_expr, i)))
-            DSExpressionFree(DSExpressionAtIndexOfExpressionArray(eqs_expr, i))
-        DSSecureFree(eqs_expr)
+        self._ssystem = None
+        self._dependent_variables = None
+        self._independent_variables = None
+        if hasattr(self, '_disk_cache') is False:
+            self._disk_cache = None
+            self._disk_cache_key = None
+
+    def _load_ssystem(self):
         self._ssystem = SSystem(self._equations,
                                 name=self.name,
-                                swigwrapper=DSCaseSSystem(case_swigwrapper),
+                                swigwrapper=borrowed(DSCaseSSystem(self._swigwrapper),
+                                                     'DSSSystem',
+                                                     owner=self),
                                 latex_symbols=self._latex)
-    
+
     @property
     def dependent_variables(self):
+        if self._dependent_variables is None:
+            Xd = VariablePool()
+            Xd.set_swigwrapper(DSVariablePoolCopy(DSSSystemXd(DSCaseSSystem(self._swigwrapper))))
+            self._dependent_variables = Xd
         return self._dependent_variables.keys()
         
     @property
@@ -104,10 +107,16 @@ class Case(Model):
     
     @property
     def ssystem(self):
+        if self._ssystem is None:
+            self._load_ssystem()
         return self._ssystem
     
     @property
     def independent_variables(self):
+        if self._independent_variables is None:
+            Xi = VariablePool()
+            Xi.set_swigwrapper(DSVariablePoolCopy(DSSSystemXi(DSCaseSSystem(self._swigwrapper))))
+            self._independent_variables = Xi
         return self._independent_variables.keys()
     
     def _valid_parameter_set_bounded(self, p_bounds, optimize=None, minimize=True):
@@ -160,7 +169,33 @@ class Case(Model):
                                                          minimize=minimize)
         return pvals
     
+    def set_disk_cache(self, disk_cache, key):
+        ''' Sets the disk cache used to store results calculated for this
+            case, and the key that identifies the case in the cache.
+        '''
+        self._disk_cache = disk_cache
+        self._disk_cache_key = key
+
+    def _stored_result(self, kind, arguments):
+        if getattr(self, '_disk_cache', None) is None:
+            return None
+        return self._disk_cache.get(self._disk_cache_key, kind, arguments_key(arguments))
+
+    def _store_result(self, kind, arguments, value):
+        if getattr(self, '_disk_cache', None) is None:
+            return
+        self._disk_cache.put(self._disk_cache_key, kind, arguments_key(arguments), value)
+
     def valid_interior_parameter_set(self, p_bounds=None, distance=50, **kwargs):
+        arguments = (p_bounds, distance, kwargs)
+        pvals = self._stored_result('valid_interior_parameter_set', arguments)
+        if pvals is not None:
+            return pvals
+        pvals = self._valid_interior_parameter_set(p_bounds, distance, **kwargs)
+        self._store_result('valid_interior_parameter_set', arguments, pvals)
+        return pvals
+
+    def _valid_interior_parameter_set(self, p_bounds, distance, **kwargs):
         pvals = self.valid_parameter_set(p_bounds=p_bounds, **kwargs)
         for j in xrange(0, 2):
             for i in pvals:
@@ -283,6 +318,15 @@ class Case(Model):
         
     def steady_state_function(self, function, parameter_values):
         return self.ssystem.steady_state_function(function, parameter_values)
+
+    def steady_state_grid(self, parameter_values, log_in=False, log_out=False):
+        return self.ssystem.steady_state_grid(parameter_values, log_in=log_in, log_out=log_out)
+
+    def steady_state_flux_grid(self, parameter_values, log_in=False, log_out=False):
+        return self.ssystem.steady_state_flux_grid(parameter_values, log_in=log_in, log_out=log_out)
+
+    def steady_state_function_grid(self, function, parameter_values, log_in=False):
+        return self.ssystem.steady_state_function_grid(function, parameter_values, log_in=log_in)
     
     def is_consistent(self, point=None):
         
@@ -337,6 +381,14 @@ class Case(Model):
         return DSCaseIsValidInStateSpace(self._swigwrapper)
     
     def bounding_box(self, p_bounds=None, log_out=False):
+        box = self._stored_result('bounding_box', (p_bounds, log_out))
+        if box is not None:
+            return box
+        box = self._bounding_box(p_bounds, log_out)
+        self._store_result('bounding_box', (p_bounds, log_out), box)
+        return box
+
+    def _bounding_box(self, p_bounds, log_out):
         lower = VariablePool(names=self.independent_variables)
         upper = VariablePool(names=self.independent_variables)
         boundkeys = lower.keys()
@@ -407,12 +459,16 @@ class Case(Model):
             V = zip(*V)[0]
             step =(V[1]-V[0])/resolution
             X = [V[0]+step*i for i in range(resolution+1)]
-            f_val = list()
+            log_params = {key:log10(params[key]) for key in self.independent_variables}
+            log_params[slice_variable] = X
+            f_val = list(self.ssystem.steady_state_function_grid(function, log_params, log_in=True))
             roots = list()
             ssys = self.ssystem.remove_algebraic_constraints()
+            values = params.values_as_array()
+            column = params.index(slice_variable)
             for x in X:
-                params[slice_variable] = 10**x
-                f_val.append(self.ssystem.steady_state_function(function, params))
+                values[column] = 10**x
+                params.set_values(values)
                 roots.append(ssys.positive_roots(params))
             return (X, f_val, roots)
             
@@ -433,11 +489,15 @@ class Case(Model):
             lower[y_variable] = min(range_y)
             upper[y_variable] = max(range_y)
         if vtype.lower() in ['numerical', 'both'] or vtype.lower() in ['n', 'b']:
-            log_vertices=DSCaseVerticesFor2DSlice(self._swigwrapper, 
-                                                  lower._swigwrapper,
-                                                  upper._swigwrapper,
-                                                  x_variable,
-                                                  y_variable)
+            arguments = (lower, upper, x_variable, y_variable)
+            log_vertices = self._stored_result('vertices_2D_slice', arguments)
+            if log_vertices is None:
+                log_vertices=DSCaseVerticesFor2DSlice(self._swigwrapper, 
+                                                      lower._swigwrapper,
+                                                      upper._swigwrapper,
+                                                      x_variable,
+                                                      y_variable)
+                self._store_result('vertices_2D_slice', arguments, log_vertices)
             vertices = list()
             for vertex in log_vertices:
                 vertices.append([10**coordinate for coordinate in vertex])
@@ -480,6 +540,74 @@ class Case(Model):
         vertices.reverse()
         return vertices
         
+    def log_boundaries_2D_slice(self, p_vals, x_variable, y_variable):
+        ''' Coefficients of the case boundaries in a logarithmic 2D slice.
+
+        Returns the arrays (zeta, u_x, u_y) such that the case is valid
+        where zeta + u_x*log10(x) + u_y*log10(y) > 0 for every boundary,
+        with all other parameters fixed at p_vals. Returns None if the
+        case has no boundaries.
+        '''
+        point = VariablePool(names=self.independent_variables)
+        for key in point:
+            point[key] = p_vals[key]
+        point[x_variable] = 1.
+        point[y_variable] = 1.
+        zeta = DSCaseDoubleValueBoundariesAtPoint(self._swigwrapper, point._swigwrapper)
+        if zeta is None:
+            return None
+        zeta = np.array(zeta, dtype=float).ravel()
+        point[x_variable] = 10.
+        u_x = DSCaseDoubleValueBoundariesAtPoint(self._swigwrapper, point._swigwrapper)
+        u_x = np.array(u_x, dtype=float).ravel() - zeta
+        point[x_variable] = 1.
+        point[y_variable] = 10.
+        u_y = DSCaseDoubleValueBoundariesAtPoint(self._swigwrapper, point._swigwrapper)
+        u_y = np.array(u_y, dtype=float).ravel() - zeta
+        return (zeta, u_x, u_y)
+
+    def boundary_parameters(self):
+        ''' Names of the independent variables that appear in the boundaries
+            of the case, and hence can change its region in a slice.
+        '''
+        point = VariablePool(names=self.independent_variables)
+        for key in point:
+            point[key] = 1.
+        zeta = DSCaseDoubleValueBoundariesAtPoint(self._swigwrapper, point._swigwrapper)
+        if zeta is None:
+            return []
+        zeta = np.array(zeta, dtype=float).ravel()
+        names = list()
+        for key in self.independent_variables:
+            point[key] = 10.
+            values = DSCaseDoubleValueBoundariesAtPoint(self._swigwrapper, point._swigwrapper)
+            point[key] = 1.
+            if np.any(np.array(values, dtype=float).ravel() != zeta) == True:
+                names.append(key)
+        return names
+
+    def region_mask_2D_slice(self, p_vals, x_variable, y_variable, X, Y, strict=True):
+        ''' Boolean mask of the points of a logarithmic grid where the case
+            is valid.
+
+        X and Y hold the log10 values of the x and y variables. All the
+        boundaries are evaluated against the whole grid at once.
+        '''
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        boundaries = self.log_boundaries_2D_slice(p_vals, x_variable, y_variable)
+        if boundaries is None:
+            return np.ones(X.shape, dtype=bool)
+        zeta, u_x, u_y = boundaries
+        values = (zeta[:, np.newaxis] +
+                  np.outer(u_x, X.ravel()) +
+                  np.outer(u_y, Y.ravel()))
+        if strict is True:
+            mask = np.all(values > 0, axis=0)
+        else:
+            mask = np.all(values >= 0, axis=0)
+        return mask.reshape(X.shape)
+
     def vertices_3D_slice(self, p_vals, x_variable, y_variable, z_variable, 
                           range_x=None, range_y=None, range_z=None,
                           log_out=False):
@@ -647,22 +775,20 @@ class CaseIntersection(Case):
         self._cases = new_cases
         return
 
-    def __del__(self):
-        ''' 
-        '''
-        if self._swigwrapper is not None:
-            DSCaseFree(self._swigwrapper)
-            
     def set_swigwrapper(self, case_swigwrapper):
         self._swigwrapper = case_swigwrapper
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSVariablePoolCopy(DSCaseXd(case_swigwrapper)))
+        Xd.set_swigwrapper(DSVariablePoolCopy(DSCaseXd(self._swigwrapper)))
         for i in VariablePool():
             if i not in self.dependent_variables:
                 raise NameError, 'Dependent Variables are inconsistent'
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSVariablePoolCopy(DSCaseXi(case_swigwrapper)))
+        Xi.set_swigwrapper(DSVariablePoolCopy(DSCaseXi(self._swigwrapper)))
         self._independent_variables = Xi
+
+    def _load_ssystem(self):
+        ''' Pseudo cases do not have an S-system. '''
+        pass
     
     def __str__(self):
         jstr = ', '
@@ -719,21 +845,15 @@ class CaseColocalization(CaseIntersection):
         self._slice_variables = slice_variables
         return
 
-    def __del__(self):
-        ''' 
-        '''
-        if self._swigwrapper is not None:
-            DSCaseFree(self._swigwrapper)
-            
     def set_swigwrapper(self, case_swigwrapper):
         self._swigwrapper = case_swigwrapper
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSVariablePoolCopy(DSCaseXd(case_swigwrapper)))
+        Xd.set_swigwrapper(DSVariablePoolCopy(DSCaseXd(self._swigwrapper)))
         for i in VariablePool():
             if i not in self.dependent_variables:
                 raise NameError, 'Dependent Variables are inconsistent'
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSVariablePoolCopy(DSCaseXi(case_swigwrapper)))
+        Xi.set_swigwrapper(DSVariablePoolCopy(DSCaseXi(self._swigwrapper)))
         self._independent_variables = Xi
     
     def __str__(self):
@@ -787,3 +907,56 @@ class CaseColocalization(CaseIntersection):
             p_sets[str(i)] = pvals
             index += 1
         return p_sets
+
+
+class CaseHandle(object):
+    ''' Lightweight reference to a case of a design space.
+
+    A case handle only stores the design space and the case identifier, and
+    creates the case object the first time an attribute other than the case
+    number is used. Testing the validity of a case without a slice does not
+    create the case object.
+    '''
+
+    __slots__ = ('_design_space', '_case_number', '_constraints', '_case')
+
+    def __init__(self, design_space, case_number, constraints=None):
+        self._design_space = design_space
+        self._case_number = str(case_number)
+        self._constraints = constraints
+        self._case = None
+
+    def __getstate__(self):
+        return (self._design_space, self._case_number, self._constraints)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __str__(self):
+        return self._case_number
+
+    def __repr__(self):
+        return 'CaseHandle: Case ' + self._case_number
+
+    @property
+    def case_number(self):
+        return self._case_number
+
+    @property
+    def case(self):
+        if self._case is None:
+            self._case = self._design_space(self._case_number,
+                                            constraints=self._constraints)
+        return self._case
+
+    def is_valid(self, p_bounds=None, strict=True):
+        if p_bounds is None and strict is True and self._constraints is None:
+            if self._case is None and self._case_number.isdigit() is True:
+                return DSDesignSpaceCaseWithCaseNumberIsValid(self._design_space._swigwrapper,
+                                                              int(self._case_number))
+        return self.case.is_valid(p_bounds=p_bounds, strict=strict)
+
+    def __getattr__(self, name):
+        if name.startswith('__') is True:
+            raise AttributeError, name
+        return getattr(self.case, name)
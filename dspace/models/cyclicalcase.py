@@ -1,5 +1,7 @@
 import itertools
 
+import numpy as np
+
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
 from dspace.models.base import Equations,Model
@@ -7,11 +9,16 @@ from dspace.models.gma import GMASystem
 from dspace.models.case import Case, CaseIntersection
 from dspace.models.ssystem import SSystem
 from dspace.expressions import Expression
+from dspace.handles import SwigHandle, borrowed
 
 class CyclicalCase(Case):
+
+    _swig_type = 'DSCyclicalCase'
     
     def __init__(self, equations, swigwrapper, name = None, latex_symbols=None, **kwargs):
-        
+        ''' The cyclical case is borrowed from the design space or cyclical
+            case that calculated it, unless swigwrapper is an owned handle.
+        '''
         if name == None:
             name = 'Unnamed'
         super(Case, self).__init__(equations,
@@ -19,8 +26,8 @@ class CyclicalCase(Case):
                                    latex_symbols=latex_symbols)
         setattr(self, '_ssystem', None)
         setattr(self, '_independent_variables', None)
-        setattr(self, '_reduced_ssystem', None)
-        setattr(self, '_freeData', False)
+        if isinstance(swigwrapper, SwigHandle) is False:
+            swigwrapper = borrowed(swigwrapper, self._swig_type)
         self.set_swigwrapper(swigwrapper)
         
     def _cyclical_case(self, case, name):
@@ -35,7 +42,9 @@ class CyclicalCase(Case):
                     name=name,
                     latex_symbols=self._latex)
         eq6=Equations(case.equations.system, case.auxiliary_variables, latex_symbols=self._latex)
-        return CyclicalCase(eq6, sub, name = case.name)
+        return CyclicalCase(eq6,
+                            borrowed(sub, 'DSCyclicalCase', owner=self),
+                            name = case.name)
 
     def __call__(self, index_or_iterable):
         if isinstance(index_or_iterable, (int, str)) is True:
@@ -82,24 +91,20 @@ class CyclicalCase(Case):
             return cases[0]
         return cases
     
-    def __del__(self):
-        if self._freeData is True:
-            DSCyclicalCaseFree(self._swigwrapper)
-        return
-    
     def __getstate__(self):
         odict = self.__dict__.copy()
         odict['_swigwrapper'] = DSSWIGDSCyclicalCaseEncodedBytes(self._swigwrapper)
+        del odict['_handle']
         del odict['_ssystem']
         del odict['_independent_variables']
         del odict['_dependent_variables']
         return odict
     
     def __setstate__(self, state):
+        state = dict(state)
+        encoded = state.pop('_swigwrapper')
         self.__dict__.update(state)
-        encoded = state['_swigwrapper']
         self.set_swigwrapper(DSSWIGDSCyclicalCaseDecodeFromByteArray(encoded)) 
-        self._freeData = True
         
     @property
     def equations(self):
@@ -198,16 +203,14 @@ class CyclicalCase(Case):
         ## ds_swigwrapper = DSCyclicalCaseInternalDesignSpace(swigwrapper)
         
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSCyclicalCaseXd(swigwrapper))
+        Xd.set_swigwrapper(borrowed(DSCyclicalCaseXd(self._swigwrapper), 'DSVariablePool', owner=self))
         for i in VariablePool():
             if i not in self.dependent_variables:
                 raise NameError, 'Dependent Variables are inconsistent'
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSCyclicalCaseXi(swigwrapper))
+        Xi.set_swigwrapper(borrowed(DSCyclicalCaseXi(self._swigwrapper), 'DSVariablePool', owner=self))
         self._independent_variables = Xi.copy()
         self._dependent_variables = Xd.copy()       
-        Xd.set_swigwrapper(None)
-        Xi.set_swigwrapper(None)
         eqs = list()
         eqs_expr = DSSSystemEquations(DSCyclicalCaseSSystem(self._swigwrapper))
         for i in xrange(0, DSCyclicalCaseNumberOfEquations(self._swigwrapper)):
@@ -216,7 +219,7 @@ class CyclicalCase(Case):
         DSSecureFree(eqs_expr)
         self._ssystem = SSystem(self._equations,
                                 name=self.name,
-                                swigwrapper=DSSSystemCopy(DSCyclicalCaseSSystem(swigwrapper)))
+                                swigwrapper=DSSSystemCopy(DSCyclicalCaseSSystem(self._swigwrapper)))
 
     
     @property
@@ -316,6 +319,23 @@ class CyclicalCase(Case):
         DSDictionaryFree(dictionary)
         return all_vertices
     
+    def region_mask_2D_slice(self, p_vals, x_variable, y_variable, X, Y, strict=True):
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        mask = np.zeros(X.shape, dtype=bool)
+        if X.size == 0:
+            return mask
+        p_bounds = dict(p_vals)
+        p_bounds[x_variable] = [10**X.min(), 10**X.max()]
+        p_bounds[y_variable] = [10**Y.min(), 10**Y.max()]
+        subcases = self.valid_subcases(p_bounds=p_bounds)
+        if len(subcases) == 0:
+            return mask
+        for subcase in self(subcases):
+            mask |= subcase.region_mask_2D_slice(p_vals, x_variable, y_variable,
+                                                 X, Y, strict=strict)
+        return mask
+    
     def steady_state(self, parameter_values, log_out=False):
         Xd = VariablePool(names=self.dependent_variables)
         p_vals = VariablePool(names=self.independent_variables)
@@ -376,8 +396,6 @@ class CyclicalCase(Case):
         fluxes = self.steady_state_flux(parameter_values)
         roots = dict()
         case_swigwrapper = DSCyclicalCaseOriginalCase(self._swigwrapper)
-        if self._reduced_ssystem is None:
-            self._reduced_ssystem = DSSSystemByRemovingAlgebraicConstraints(DSCaseSSystem(DSCyclicalCaseOriginalCase(self._swigwrapper)))
         for i in steady_states:
             case = self(i)
             ssys = case.ssystem.remove_algebraic_constraints()
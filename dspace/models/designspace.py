@@ -4,14 +4,22 @@
 '''
 import itertools
 
+import numpy as np
+
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
 from dspace.models.base import Equations,Model
 from dspace.models.gma import GMASystem
 from dspace.models.ssystem import SSystem
-from dspace.models.case import Case, CaseIntersection, CaseColocalization
+from dspace.models.case import Case, CaseIntersection, CaseColocalization, CaseHandle
 from dspace.models.cyclicalcase import CyclicalCase
 from dspace.expressions import Expression
+from dspace.executors import get_executor, cancellation_point
+from dspace.diskcache import get_disk_cache, model_key, batch as disk_cache_batch
+from dspace.handles import borrowed
+from dspace.caches import _LRUCache
+
+from math import log10
 
 def sort_cases(x, y):
     x = x.split('_')
@@ -25,8 +33,138 @@ def sort_cases(x, y):
             return 1
     return 0
 
+def _case_is_valid(ds, case_number, p_bounds=None, strict=True):
+    return ds(case_number).is_valid(p_bounds=p_bounds, strict=strict)
+
+def _case_bounding_box(ds, case_number, p_bounds=None):
+    case = ds(case_number)
+    if isinstance(case, CyclicalCase) is True:
+        return None
+    return case.bounding_box(p_bounds=p_bounds, log_out=True)
+
+def _case_intersection_is_valid(ds, case_numbers, p_bounds=None):
+    return CaseIntersection(ds(case_numbers)).is_valid(p_bounds=p_bounds)
+
+def _apriori_intersections(number, sizes, test, lower=None, upper=None):
+    ''' Enumerates the valid intersections of number items, as tuples of
+        increasing indices, of each size in sizes larger than 1.
+
+    The candidates of size k are the unions of two valid intersections of
+    size k-1 that share their first k-2 items, whose subsets of size k-1 are
+    all valid and, if the arrays of lower and upper bounds are given, whose
+    boxes overlap. The test function receives a list of candidates and
+    returns whether each one is valid.
+    '''
+    intersections = list()
+    level = set([(k,) for k in xrange(number)])
+    for i in xrange(2, max(sizes)+1):
+        prefixes = dict()
+        for current in sorted(level):
+            prefixes.setdefault(current[:-1], []).append(current)
+        candidates = list()
+        for group in prefixes.itervalues():
+            for (first, second) in itertools.combinations(group, 2):
+                current = first + second[-1:]
+                subsets = itertools.combinations(current, i-1)
+                if all([subset in level for subset in subsets]) is False:
+                    continue
+                if lower is not None:
+                    members = list(current)
+                    if np.any(lower[members].max(axis=0) > upper[members].min(axis=0)):
+                        continue
+                candidates.append(current)
+        candidates.sort()
+        valid = test(candidates)
+        level = set()
+        for k in xrange(len(candidates)):
+            if valid[k] is True:
+                if i in sizes:
+                    intersections.append(candidates[k])
+                level.add(candidates[k])
+        if len(level) == 0:
+            break
+    return intersections
+
+
+class _CaseBoundingBoxIndex(object):
+    ''' Index of the logarithmic bounding boxes of the valid cases of a
+        design space.
+
+    The boxes are stored as arrays of lower and upper bounds, with one row
+    per case and one column per independent variable, so that the cases
+    whose boxes intersect a slice are found with a single array comparison.
+    Cases without a box, such as cyclical cases, have unbounded boxes.
+    '''
+
+    tolerance = 1e-9
+
+    def __init__(self, case_numbers, names, boxes):
+        setattr(self, 'case_numbers', list(case_numbers))
+        setattr(self, 'names', list(names))
+        setattr(self, '_rows', dict([(case_numbers[i], i) for i in xrange(len(case_numbers))]))
+        lower = np.empty((len(case_numbers), len(names)))
+        upper = np.empty((len(case_numbers), len(names)))
+        lower.fill(-np.inf)
+        upper.fill(np.inf)
+        for i in xrange(len(boxes)):
+            if boxes[i] is None:
+                continue
+            for j in xrange(len(names)):
+                if names[j] not in boxes[i]:
+                    continue
+                low, high = boxes[i][names[j]]
+                if np.isfinite(low) and np.isfinite(high) and low <= high:
+                    lower[i,j] = low
+                    upper[i,j] = high
+        setattr(self, 'lower', lower)
+        setattr(self, 'upper', upper)
+
+    def __len__(self):
+        return len(self.case_numbers)
+
+    def __contains__(self, case_number):
+        return str(case_number) in self._rows
+
+    def _slice_overlaps(self, p_bounds, rows=None):
+        lower = self.lower
+        upper = self.upper
+        if rows is not None:
+            lower = lower[rows]
+            upper = upper[rows]
+        overlaps = np.ones(len(lower), dtype=bool)
+        for j in xrange(len(self.names)):
+            if self.names[j] not in p_bounds:
+                continue
+            value = p_bounds[self.names[j]]
+            try:
+                min_value,max_value = value
+            except TypeError:
+                min_value = value
+                max_value = value
+            overlaps &= lower[:,j] <= log10(max_value) + self.tolerance
+            overlaps &= upper[:,j] >= log10(min_value) - self.tolerance
+        return overlaps
+
+    def query(self, p_bounds):
+        ''' Returns the indexed cases whose boxes intersect the slice. '''
+        overlaps = self._slice_overlaps(p_bounds)
+        return [self.case_numbers[i] for i in np.flatnonzero(overlaps)]
+
+    def candidates(self, case_numbers, p_bounds):
+        ''' Returns the case numbers that can be valid in the slice. Cases
+            that are not indexed are always kept.
+        '''
+        case_numbers = [str(i) for i in case_numbers]
+        indexed = [i for i in xrange(len(case_numbers)) if case_numbers[i] in self._rows]
+        rows = [self._rows[case_numbers[i]] for i in indexed]
+        keep = np.ones(len(case_numbers), dtype=bool)
+        keep[indexed] = self._slice_overlaps(p_bounds, rows)
+        return [case_numbers[i] for i in np.flatnonzero(keep)]
+
 
 class DesignSpace(GMASystem):
+
+    _swig_type = 'DSDesignSpace'
     
     def __init__(self, equations,
                  parameter_dict=None, 
@@ -36,6 +174,11 @@ class DesignSpace(GMASystem):
                  match_Xi=None,
                  latex_symbols=None,
                  resolve_codominance=False,
+                 case_cache_size=256,
+                 valid_cases_cache_size=64,
+                 valid_cases_quantization=None,
+                 case_index=None,
+                 disk_cache=None,
                  **kwargs):
         ''' Initializes a new object with the input parameters for a routine
             analysis.
@@ -53,6 +196,30 @@ class DesignSpace(GMASystem):
             resolve_cycles (bool): A flag indicating if cycles should be
                automatically resolved. Setting this to true adds significant
                overhead.
+
+            case_cache_size (int): The maximum number of case objects kept
+               in the least recently used case cache. Setting this to 0
+               disables the cache.
+
+            valid_cases_cache_size (int): The maximum number of valid case
+               queries kept in the least recently used cache of valid cases.
+               Setting this to 0 disables the cache.
+
+            valid_cases_quantization (float): The resolution, in decades,
+               with which the bounds of a valid case query are compared to
+               the bounds of the cached queries. If None, the bounds are
+               compared exactly.
+
+            case_index (bool): A flag indicating if strict valid case
+               queries of a slice should first discard the cases whose
+               bounding boxes miss the slice. The index is built the first
+               time it is needed. If None, the index is used for design
+               spaces with at least 1e5 cases.
+
+            disk_cache (str): The path of a file used to store valid case
+               lists, bounding boxes, valid interior parameter sets and
+               2D slice vertices between sessions, or a DiskCache object.
+               If None, results are not stored on disk.
         '''
         if parameter_dict is not None:
             equations = equations.replace_symbols(parameter_dict)
@@ -70,23 +237,38 @@ class DesignSpace(GMASystem):
         if resolve_cycles == True:
             setattr(self, '_resolve_cycles', True)
             DSDesignSpaceCalculateCyclicalCases(self._swigwrapper)
+        self.clear_case_cache()
+        self.set_case_cache_size(case_cache_size)
+        self.clear_valid_cases_cache()
+        self.set_valid_cases_cache_size(valid_cases_cache_size,
+                                        quantization=valid_cases_quantization)
+        setattr(self, '_case_index_mode', case_index)
+        setattr(self, '_model_key', model_key(self.equations.system,
+                                              self.equations.auxiliary_variables,
+                                              constraints,
+                                              Xi,
+                                              match_Xi,
+                                              resolve_cycles,
+                                              resolve_codominance))
+        self.set_disk_cache(disk_cache)
         
-    def __del__(self):
-        if self._swigwrapper is not None:
-            DSDesignSpaceFree(self._swigwrapper)
-            
     def __len__(self):
         return DSDesignSpaceNumberOfCases(self._swigwrapper)+1        
     
     def __getstate__(self):
         odict = self.__dict__.copy()
         odict['_swigwrapper'] = DSSWIGDSDesignSpaceEncodedBytes(self._swigwrapper)
+        del odict['_handle']
         del odict['_independent_variables']
+        odict.pop('_case_cache', None)
+        odict.pop('_valid_cases_cache', None)
+        odict.pop('_intersections_cache', None)
         return odict
     
     def __setstate__(self, state):
+        state = dict(state)
+        encoded = state.pop('_swigwrapper')
         self.__dict__.update(state)
-        encoded = state['_swigwrapper']
         self.set_swigwrapper(DSSWIGDSDesignSpaceDecodeFromByteArray(encoded))
     
     def _case_with_signature(self, signature, constraints):
@@ -118,6 +300,140 @@ class DesignSpace(GMASystem):
         index = DSCaseNumberForSignature(siglist, DSDesignSpaceGMASystem(self._swigwrapper))
         return [self(str(index)+subcase, constraints=constraints)]
     
+    @property
+    def case_cache_info(self):
+        return self._case_cache.info()
+
+    def set_case_cache_size(self, size):
+        self._case_cache.resize(size)
+
+    def clear_case_cache(self):
+        self._case_cache.clear()
+
+    @property
+    def valid_cases_cache_info(self):
+        return self._valid_cases_cache.info()
+
+    def set_valid_cases_cache_size(self, size, quantization=None):
+        ''' Sets the size of the cache of valid case queries.
+
+        The quantization is the resolution, in decades, with which the
+        bounds of a query are compared to the bounds of cached queries.
+        Setting it to None compares the bounds exactly.
+        '''
+        self._valid_cases_cache.resize(size)
+        self._valid_cases_quantization = quantization
+        self._valid_cases_cache.clear()
+
+    def clear_valid_cases_cache(self):
+        self._valid_cases_cache.clear()
+        self._intersections_cache.clear()
+
+    def set_disk_cache(self, disk_cache):
+        ''' Sets the file path or DiskCache object used to store results
+            between sessions. Setting it to None disables the disk cache.
+        '''
+        self._disk_cache = get_disk_cache(disk_cache)
+        self.clear_case_cache()
+
+    def _stored_result(self, kind, key):
+        if self._disk_cache is None:
+            return None
+        return self._disk_cache.get(self._model_key, kind, key)
+
+    def _store_result(self, kind, key, value):
+        if self._disk_cache is None:
+            return
+        self._disk_cache.put(self._model_key, kind, key, value)
+
+    @property
+    def case_index(self):
+        ''' The bounding box index of the valid cases, built on first use. '''
+        if self._case_index is None:
+            self.build_case_index()
+        return self._case_index
+
+    def build_case_index(self, executor=None):
+        ''' Calculates the logarithmic bounding box of every valid case and
+            stores them in the bounding box index used to prefilter slices.
+        '''
+        index = self._stored_result('case_index', None)
+        if index is None:
+            with disk_cache_batch(self._disk_cache):
+                case_numbers = self.valid_cases(expand_cycles=False)
+                executor = get_executor(executor)
+                boxes = executor.map(_case_bounding_box, self, case_numbers)
+                index = _CaseBoundingBoxIndex(case_numbers,
+                                              self.independent_variables,
+                                              boxes)
+                self._store_result('case_index', None, index)
+        self._case_index = index
+
+    def clear_case_index(self):
+        self._case_index = None
+
+    def _uses_case_index(self):
+        if self._case_index_mode is None:
+            return self.number_of_cases >= 1e5
+        return self._case_index_mode is True
+
+    def filter_valid_cases(self, case_numbers, p_bounds, strict=True):
+        ''' Returns the cases of a list that are valid in a slice.
+
+        When the bounding box index is used, the cases whose boxes miss the
+        slice are discarded before testing the remaining cases.
+        '''
+        case_numbers = [str(i) for i in case_numbers]
+        if strict is True and self._uses_case_index() is True:
+            case_numbers = self.case_index.candidates(case_numbers, p_bounds)
+        return [i for i in case_numbers if self(i).is_valid(p_bounds=p_bounds, strict=strict) is True]
+
+    def case_boundary_parameters(self, case_number):
+        ''' Names of the independent variables that can change the region of
+            a case in a slice. The names are calculated once per case.
+        '''
+        case_number = str(case_number)
+        names = self._boundary_parameters.get(case_number)
+        if names is None:
+            case = self(case_number)
+            if isinstance(case, CyclicalCase) is True:
+                names = self.independent_variables
+            else:
+                names = case.boundary_parameters()
+            self._boundary_parameters[case_number] = names
+        return names
+
+    def _intersection_key(self, bounds_key, case_numbers):
+        ''' Key of the validity of an intersection of cases, which only
+            depends on the bounds of the variables in their boundaries.
+        '''
+        bounds = bounds_key[0]
+        if bounds is not None:
+            names = set()
+            for case_number in case_numbers:
+                names.update(self.case_boundary_parameters(case_number))
+            bounds = tuple([i for i in bounds if i[0] in names])
+        return (bounds,) + bounds_key[1:] + (frozenset(case_numbers),)
+
+    def _valid_cases_key(self, p_bounds, strict, expand_cycles):
+        if p_bounds is None:
+            return (None, strict, expand_cycles)
+        quantization = self._valid_cases_quantization
+        bounds = list()
+        for key in sorted(p_bounds.keys()):
+            if key not in self._independent_variables:
+                continue
+            try:
+                min_value,max_value = p_bounds[key]
+            except TypeError:
+                min_value = p_bounds[key]
+                max_value = p_bounds[key]
+            values = [float(min_value), float(max_value)]
+            if quantization is not None:
+                values = [int(round(log10(i)/quantization)) if i > 0 else i for i in values]
+            bounds.append((key, values[0], values[1]))
+        return (tuple(bounds), strict, expand_cycles)
+
     def __call__(self, index_or_iterable, by_signature=False, constraints=None):
         if isinstance(index_or_iterable, (int, str)) is True:
             iterable = [index_or_iterable]
@@ -136,6 +452,11 @@ class DesignSpace(GMASystem):
                 if index[0] == ':':
                     cases += self._case_with_signature(index[1:], constraints)
                     continue
+                key = (index, None if constraints is None else tuple(constraints))
+                case = self._case_cache.get(key)
+                if case is not None:
+                    cases.append(case)
+                    continue
                 case_swig = DSDesignSpaceCaseWithCaseIdentifier(self._swigwrapper, index)
                 if case_swig is None:
                     raise ValueError, 'Case "' + index + '" does not exits'
@@ -148,12 +469,14 @@ class DesignSpace(GMASystem):
                               case.auxiliary_variables)
                 cyclical_swig = DSDesignSpaceCyclicalCaseWithCaseIdentifier(self._swigwrapper, index)
                 if cyclical_swig is not None:
-                    cyclical = CyclicalCase(eq, cyclical_swig,
-                                            name = case.name + ' (cyclical)',
-                                            latex_symbols=self._latex)
-                    cases.append(cyclical)
-                else:
-                    cases.append(case)
+                    case = CyclicalCase(eq,
+                                        borrowed(cyclical_swig, 'DSCyclicalCase', owner=self),
+                                        name = case.name + ' (cyclical)',
+                                        latex_symbols=self._latex)
+                if self._disk_cache is not None:
+                    case.set_disk_cache(self._disk_cache, model_key(self._model_key, key))
+                self._case_cache.put(key, case)
+                cases.append(case)
             else:
                 raise TypeError, 'input argument must be a case identifier or case signature'
         if len(cases) == 1:
@@ -221,16 +544,34 @@ class DesignSpace(GMASystem):
         self._swigwrapper = ds_swigwrapper
         
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSGMASystemXd(DSDesignSpaceGMASystem(ds_swigwrapper)))
+        Xd.set_swigwrapper(borrowed(DSGMASystemXd(DSDesignSpaceGMASystem(self._swigwrapper)),
+                                    'DSVariablePool',
+                                    owner=self))
         ## for i in VariablePool():
         ##     if i not in self.dependent_variables:
         ##         raise NameError, 'Dependent Variables are inconsistent'
         self._dependent_variables = Xd.copy()
-        Xd.set_swigwrapper(None)
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSDesignSpaceXi(ds_swigwrapper))
+        Xi.set_swigwrapper(borrowed(DSDesignSpaceXi(self._swigwrapper), 'DSVariablePool', owner=self))
         self._independent_variables = Xi.copy()
-        Xi.set_swigwrapper(None)
+        if hasattr(self, '_case_cache') is False:
+            self._case_cache = _LRUCache(256)
+        if hasattr(self, '_valid_cases_cache') is False:
+            self._valid_cases_cache = _LRUCache(64)
+            self._valid_cases_quantization = None
+        if hasattr(self, '_intersections_cache') is False:
+            self._intersections_cache = _LRUCache(4096)
+        if hasattr(self, '_case_index') is False:
+            self._case_index = None
+            self._case_index_mode = None
+        if hasattr(self, '_disk_cache') is False:
+            self._disk_cache = None
+            self._model_key = None
+        if hasattr(self, '_boundary_parameters') is False:
+            self._boundary_parameters = dict()
+        self._case_cache.clear()
+        self._valid_cases_cache.clear()
+        self._intersections_cache.clear()
         
     @property
     def dependent_variables(self):
@@ -338,9 +679,64 @@ class DesignSpace(GMASystem):
     def valid_cases(self, p_bounds=None, expand_cycles=True, strict = True):
         if self._resolve_cycles is False:
             expand_cycles = False
+        key = self._valid_cases_key(p_bounds, strict, expand_cycles)
+        cases = self._cached_valid_cases(key)
+        if cases is None:
+            with disk_cache_batch(self._disk_cache):
+                cases = self._valid_cases(p_bounds, expand_cycles, strict)
+                self._cache_valid_cases(key, cases)
+        return list(cases)
+
+    def _cached_valid_cases(self, key):
+        cases = self._valid_cases_cache.get(key)
+        if cases is None and self._valid_cases_quantization is None:
+            cases = self._stored_result('valid_cases', key)
+            if cases is not None:
+                self._valid_cases_cache.put(key, cases)
+        return cases
+
+    def _cache_valid_cases(self, key, cases):
+        self._valid_cases_cache.put(key, cases)
+        if self._valid_cases_quantization is None:
+            self._store_result('valid_cases', key, cases)
+
+    def strict_and_nonstrict_valid_cases(self, p_bounds=None, expand_cycles=True):
+        ''' Returns the cases that are valid in the slice and the cases that
+            are only valid at its boundaries.
+
+        The non-strict valid cases are calculated by the C library. The
+        strict subset is obtained by testing only those cases when they are
+        a small fraction of the design space, and by the strict query of the
+        C library otherwise.
+        '''
+        if self._resolve_cycles is False:
+            expand_cycles = False
+        if p_bounds is None or expand_cycles is True:
+            return self.valid_cases(p_bounds=p_bounds, expand_cycles=expand_cycles), []
+        nonstrict = self.valid_cases(p_bounds=p_bounds, expand_cycles=False, strict=False)
+        key = self._valid_cases_key(p_bounds, True, False)
+        strict = self._cached_valid_cases(key)
+        if strict is None:
+            with disk_cache_batch(self._disk_cache):
+                if 10*len(nonstrict) < self.number_of_cases:
+                    strict = self.filter_valid_cases(nonstrict, p_bounds)
+                else:
+                    strict = self._valid_cases(p_bounds, False, True)
+                self._cache_valid_cases(key, strict)
+        strict = list(strict)
+        strict_set = set(strict)
+        return strict, [i for i in nonstrict if i not in strict_set]
+
+    def _valid_cases(self, p_bounds, expand_cycles, strict):
         if expand_cycles is True:
             return self._valid_cases_expand_cycles(p_bounds)
         if p_bounds is not None:
+            if strict is True and self._uses_case_index() is True:
+                candidates = self.case_index.query(p_bounds)
+                if 10*len(candidates) < self.number_of_cases:
+                    cases = self.filter_valid_cases(candidates, p_bounds)
+                    cases.sort(cmp=sort_cases)
+                    return cases
             return self._valid_cases_bounded(p_bounds, strict)
         all_cases = DSDesignSpaceCalculateAllValidCases(self._swigwrapper)
         number_valid = DSDesignSpaceNumberOfValidCases(self._swigwrapper)
@@ -354,6 +750,50 @@ class DesignSpace(GMASystem):
         cases.sort(cmp=sort_cases)
         return cases
     
+    def iter_cases(self, valid_only=True, chunk_size=1000, p_bounds=None, strict=True,
+                   executor=None, handles=False):
+        ''' Iterates over the case numbers of the design space in chunks.
+
+        Each iteration yields a list of at most chunk_size case identifiers,
+        in increasing order, so that very large design spaces can be walked
+        without calculating every valid case at once. If valid_only is True,
+        only the cases that are valid, or valid in the slice defined by
+        p_bounds, are yielded. Cycles are not expanded. If handles is True,
+        each chunk is a list of CaseHandle objects instead.
+        '''
+        if chunk_size < 1:
+            raise ValueError, 'chunk_size must be a positive integer'
+        executor = get_executor(executor)
+        number_of_cases = self.number_of_cases
+        start = 1
+        while start <= number_of_cases:
+            stop = min(start + chunk_size, number_of_cases + 1)
+            if valid_only is False:
+                chunk = [str(i) for i in xrange(start, stop)]
+            elif p_bounds is None:
+                chunk = [str(i) for i in xrange(start, stop)
+                         if DSDesignSpaceCaseWithCaseNumberIsValid(self._swigwrapper, i) is True]
+            else:
+                chunk = [str(i) for i in xrange(start, stop)]
+                if strict is True and self._uses_case_index() is True:
+                    chunk = self.case_index.candidates(chunk, p_bounds)
+                valid = executor.map(_case_is_valid, self, chunk,
+                                     p_bounds=p_bounds, strict=strict)
+                chunk = [chunk[i] for i in xrange(len(chunk)) if valid[i] is True]
+            start = stop
+            if len(chunk) == 0:
+                continue
+            if handles is True:
+                chunk = [CaseHandle(self, i) for i in chunk]
+            yield chunk
+
+    def case_handles(self, case_numbers, constraints=None):
+        ''' Returns lightweight CaseHandle objects for a list of cases. '''
+        if constraints is not None:
+            if isinstance(constraints, list) is False:
+                constraints = [constraints]
+        return [CaseHandle(self, i, constraints=constraints) for i in case_numbers]
+
     def _cyclical_case_as_subcases(self, case_num, case_numbers):
         if case_num not in case_numbers:
             return case_numbers
@@ -373,55 +813,74 @@ class DesignSpace(GMASystem):
             case_numbers = self._cyclical_case_as_subcases(i, case_numbers)
         return case_numbers
         
-    def valid_intersecting_cases(self, intersects, case_numbers, p_bounds=None, strict=True):
+    def _case_bounding_boxes(self, case_numbers, p_bounds, executor):
+        ''' Logarithmic bounding boxes of the cases in a slice, as arrays of
+            lower and upper bounds with one column per free parameter. Cases
+            whose box cannot be determined get an unbounded box.
+        '''
+        with disk_cache_batch(self._disk_cache):
+            boxes = executor.map(_case_bounding_box, self, case_numbers, p_bounds=p_bounds)
+        names = sorted(set([key for box in boxes if box is not None for key in box]))
+        lower = np.empty((len(case_numbers), len(names)))
+        upper = np.empty((len(case_numbers), len(names)))
+        lower.fill(-np.inf)
+        upper.fill(np.inf)
+        for i in xrange(len(boxes)):
+            if boxes[i] is None:
+                continue
+            for j in xrange(len(names)):
+                if names[j] not in boxes[i]:
+                    continue
+                low, high = boxes[i][names[j]]
+                if np.isfinite(low) and np.isfinite(high) and low <= high:
+                    lower[i,j] = low
+                    upper[i,j] = high
+        return lower, upper
+
+    def valid_intersecting_cases(self, intersects, case_numbers, p_bounds=None, strict=True,
+                                 executor=None):
+        ''' Enumerates the valid intersections of the cases.
+
+        Intersections of k cases are only tested if every intersection of
+        k-1 of those cases is valid and the bounding boxes of the cases
+        overlap. The validity of every tested intersection is memoized on
+        the bounds of the variables that appear in the boundaries of its
+        cases, so that changing one parameter of the slice only retests the
+        intersections of cases that depend on it.
+        '''
         if isinstance(intersects, list) is False:
             intersects = [intersects]
         if len(case_numbers) == 0:
             return None
         intersections = list()        
-        Cases = self(case_numbers)
-        ## for i in xrange(len(Cases)):
-        ##     case = Cases[i]
-        ##     case_num = case.case_number
-        ##     case_numbers = self._cyclical_case_as_subcases(case_num, case_numbers)
-        valid_cases=set(range(len(case_numbers)))
-        if p_bounds is not None:
-            lower = VariablePool(names=self.independent_variables)
-            upper = VariablePool(names=self.independent_variables)
-            for key in lower:
-                lower[key] = 1e-20
-                upper[key] = 1e20
-                for (key,value) in p_bounds.iteritems():
-                    try:
-                        min_value,max_value = value
-                    except TypeError:
-                        min_value = value
-                        max_value = value
-                    if min_value > max_value:
-                        raise ValueError, 'parameter slice bounds are inverted: min is larger than max'
-                        lower[key] = min_value
-                        upper[key] = max_value
+        executor = get_executor(executor)
         if 1 in intersects:
-            [intersections.append(i) for i in case_numbers if self(i).is_valid(p_bounds=p_bounds, strict=strict) is True]
-        sets = [set([i]) for i in valid_cases]
-        for i in xrange(2, max(intersects)+1):
-            sets_to_check = sets
-            sets = []
-            identifiers = range(0, len(sets_to_check))
-            comb = itertools.combinations(identifiers, 2)
-            for j in comb:
-                current_set = set()
-                for k in j:
-                    current_set = current_set.union(sets_to_check[k])
-                if len(current_set) != i:
-                    continue
-                if current_set in sets:
-                    continue
-                case_int = CaseIntersection([self(case_numbers[k]) for k in current_set])                
-                if case_int.is_valid(p_bounds=p_bounds) is True:
-                    if i in intersects:
-                        intersections.append([case_numbers[k] for k in current_set])
-                    sets.append(current_set)
+            valid = executor.map(_case_is_valid, self, case_numbers,
+                                 p_bounds=p_bounds, strict=strict)
+            [intersections.append(case_numbers[k]) for k in xrange(len(case_numbers)) if valid[k] is True]
+        number = len(case_numbers)
+        if max(intersects) < 2 or number < 2:
+            return intersections
+        free = len(self.independent_variables)
+        if p_bounds is not None:
+            free = len([key for key in p_bounds if isinstance(p_bounds[key], (list, tuple))])
+        lower, upper = None, None
+        if 4*free < number-1:
+            lower, upper = self._case_bounding_boxes(case_numbers, p_bounds, executor)
+        bounds_key = self._valid_cases_key(p_bounds, True, False)
+        def test(candidates):
+            keys = [self._intersection_key(bounds_key, [case_numbers[k] for k in current]) for current in candidates]
+            valid = [self._intersections_cache.get(key) for key in keys]
+            unknown = [k for k in xrange(len(candidates)) if valid[k] is None]
+            results = executor.map(_case_intersection_is_valid, self,
+                                   [[case_numbers[l] for l in candidates[k]] for k in unknown],
+                                   p_bounds=p_bounds)
+            for (k, result) in zip(unknown, results):
+                valid[k] = result
+                self._intersections_cache.put(keys[k], result)
+            return valid
+        for current in _apriori_intersections(number, intersects, test, lower, upper):
+            intersections.append([case_numbers[l] for l in current])
         return intersections
     
     def co_localize_cases(self, case_numbers, slice_parameters, 
@@ -491,8 +950,10 @@ class DesignSpace(GMASystem):
                     sets.append(current_set)
         return intersections
     
-    def intersecting_cases(self, intersects, case_numbers, p_bounds=None, strict=True):
-         valid_ints = self.valid_intersecting_cases(intersects, case_numbers, p_bounds=p_bounds, strict=strict)
+    def intersecting_cases(self, intersects, case_numbers, p_bounds=None, strict=True,
+                           executor=None):
+         valid_ints = self.valid_intersecting_cases(intersects, case_numbers, p_bounds=p_bounds, strict=strict,
+                                                    executor=executor)
          if valid_ints is None:
              return None
          case_ints = [CaseIntersection(self(i)) for i in valid_ints]
@@ -507,10 +968,13 @@ class DesignSpace(GMASystem):
             return None
         case = Case(self, DSDesignSpaceCaseWithCaseNumber(self._swigwrapper, case), name)
         eq6=Equations(case.equations.system, case.auxiliary_variables)
-        return CyclicalCase(eq6, sub, name = case.name, latex_symbols=self._latex)
+        return CyclicalCase(eq6,
+                            borrowed(sub, 'DSCyclicalCase', owner=self),
+                            name = case.name,
+                            latex_symbols=self._latex)
     
     def line_1D_positive_roots(self, function, p_vals, slice_variable, 
-                               range_slice, resolution=100):
+                               range_slice, resolution=100, executor=None):
         
         p_bounds = dict(p_vals)
         p_bounds[slice_variable] = range_slice
@@ -521,6 +985,7 @@ class DesignSpace(GMASystem):
         line_styles = ['-', '--', '..']
         colors = ['k', 'r', 'y']
         for case in valid_cases:
+            cancellation_point(executor)
             X, Y, R = self(case).line_1D_positive_roots(function, p_vals, slice_variable,
                                                         range_slice, resolution=resolution)
             X_dict[case] = X
@@ -6,10 +6,13 @@
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
 from dspace.models.base import Equations,Model
+from dspace.handles import SwigObject, borrowed
 
 
 
-class GMASystem(Model):
+class GMASystem(Model, SwigObject):
+
+    _swig_type = 'DSGMASystem'
     
     def __init__(self, equations, name=None, swigwrapper=None, **kwargs):
         super(GMASystem, self).__init__(equations, name=name, **kwargs)
@@ -21,24 +24,19 @@ class GMASystem(Model):
         else:
             self._parse_equations(**kwargs)
         
-    def __del__(self):
-        if self._swigwrapper is not None:
-            DSGMASystemFree(self._swigwrapper)
-        
     def set_swigwrapper(self, gma_swigwrapper):
         self._swigwrapper = gma_swigwrapper
         
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSGMASystemXd(gma_swigwrapper))
+        Xd.set_swigwrapper(borrowed(DSGMASystemXd(self._swigwrapper), 'DSVariablePool', owner=self))
         for i in VariablePool():
             if i not in self.dependent_variables:
                 raise NameError, 'Dependent Variables are inconsistent'
 
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSVariablePoolCopy(DSGMASystemXi(gma_swigwrapper)))
+        Xi.set_swigwrapper(DSVariablePoolCopy(DSGMASystemXi(self._swigwrapper)))
         self._dependent_variables = Xd.copy()
         self._independent_variables = Xi
-        Xd.set_swigwrapper(None)
         
     def _parse_equations(self, **kwargs):
         auxiliary_variables = self.auxiliary_variables
@@ -8,23 +8,23 @@ from dspace.variables import VariablePool
 from dspace.models.base import Equations,Model
 from dspace.models.gma import GMASystem
 from dspace.expressions import Expression
+from dspace.handles import borrowed
 
 import numpy as np
         
 class SSystem(GMASystem):
 
-    def __del__(self):
-        if self._swigwrapper is not None:
-            DSSSystemFree(self._swigwrapper)
+    _swig_type = 'DSSSystem'
     
     def set_swigwrapper(self, ssys_swigwrapper):
         self._swigwrapper = ssys_swigwrapper
+        self._log_linear = None
         if self._swigwrapper is None:
             return
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSVariablePoolCopy(DSSSystemXd(ssys_swigwrapper)))
+        Xd.set_swigwrapper(DSVariablePoolCopy(DSSSystemXd(self._swigwrapper)))
         Xi = VariablePool()
-        Xi.set_swigwrapper(DSVariablePoolCopy(DSSSystemXi(ssys_swigwrapper)))
+        Xi.set_swigwrapper(DSVariablePoolCopy(DSSSystemXi(self._swigwrapper)))
         self._independent_variables = Xi
         self._dependent_variables = Xd
         
@@ -132,14 +132,13 @@ class SSystem(GMASystem):
         if DSSSystemHasSolution(self._swigwrapper) is False:
             return None
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSSSystemXd(self._swigwrapper))
+        Xd.set_swigwrapper(borrowed(DSSSystemXd(self._swigwrapper), 'DSVariablePool', owner=self))
         steady_states = DSSSystemSteadyStateValues(self._swigwrapper, parameter_values._swigwrapper)
         var_names = Xd.keys()
         if log_out is False:
             steady_states = {var_names[i]:10**steady_states[i][0] for i in xrange(len(var_names))}
         else:
             steady_states = {var_names[i]:steady_states[i][0] for i in xrange(len(var_names))}
-        Xd.set_swigwrapper(None)
         return steady_states
     
     def value_for_auxiliary_variables(self, Xdt0, Xi0, log_out=False):
@@ -167,29 +166,194 @@ class SSystem(GMASystem):
         
     def steady_state_flux(self, parameter_values, log_out=False):
         Xd = VariablePool()
-        Xd.set_swigwrapper(DSSSystemXd(self._swigwrapper))
+        Xd.set_swigwrapper(borrowed(DSSSystemXd(self._swigwrapper), 'DSVariablePool', owner=self))
         flux = DSSSystemSteadyStateFlux(self._swigwrapper, parameter_values._swigwrapper)
         var_names = Xd.keys()
         if log_out is False:
             steady_states = {('V_' + var_names[i]):10**flux[i][0] for i in xrange(len(var_names))}
         else:
             steady_states = {('V_' + var_names[i]):flux[i][0] for i in xrange(len(var_names))}
-        Xd.set_swigwrapper(None)
         return steady_states
     
-    def steady_state_function(self, function, parameter_values):
+    def _log_linear_solution(self):
+        ''' Matrices of the log-linear steady-state solution, pulled from the
+            C library once and cached as NumPy arrays.
+
+        The logarithm of the steady state is y_d = M*(b - A_i*y_i), where
+        b = log(beta/alpha), and the logarithm of the fluxes is
+        log(alpha) + G_d*y_d + G_i*y_i.
+        '''
+        if self._log_linear is not None:
+            return self._log_linear
+        if DSSSystemHasSolution(self._swigwrapper) is False:
+            return None
+        n = len(self.dependent_variables)
+        m = len(self.independent_variables)
+        def as_array(matrix, columns):
+            if matrix is None:
+                return np.zeros((n, columns))
+            return np.array(matrix, dtype=float).reshape((n, columns))
+        M = as_array(self.m, n)
+        Ai = as_array(self.Ai, m)
+        Ad = as_array(self.Ad, n)
+        Gd = as_array(self.Gd, n)
+        Gi = as_array(self.Gi, m)
+        log_alpha = np.log10(as_array(self.alpha, 1))
+        log_beta = np.log10(as_array(self.beta, 1))
+        self._log_linear = dict(M=M,
+                                b=log_beta-log_alpha,
+                                Ai=Ai,
+                                Ad=Ad,
+                                Gd=Gd,
+                                Gi=Gi,
+                                log_alpha=log_alpha,
+                                log_gains=-np.dot(M, Ai))
+        return self._log_linear
+
+    def _log_parameter_array(self, parameter_values, log_in=False):
+        ''' Converts parameter values into a (number of independent variables,
+            number of points) array of logarithmic values.
+
+        The parameter values can either be a dictionary (or VariablePool)
+        of scalars and arrays, that are broadcast against each other, or
+        an array whose last dimension is ordered as the independent
+        variables.  Returns the array and the shape of the grid.
+        '''
+        names = self.independent_variables
+        if isinstance(parameter_values, dict) is True:
+            missing = [i for i in names if i not in parameter_values]
+            if len(missing) > 0:
+                raise ValueError, 'Missing values for parameters: ' + ', '.join(missing)
+            columns = np.broadcast_arrays(*[np.asarray(parameter_values[i], dtype=float) for i in names])
+            shape = columns[0].shape if len(columns) > 0 else ()
+            values = np.array([i.ravel() for i in columns]).reshape((len(names), -1))
+        else:
+            values = np.asarray(parameter_values, dtype=float)
+            if values.shape[-1] != len(names):
+                raise ValueError, 'Parameter array must have one column per independent variable'
+            shape = values.shape[:-1]
+            values = values.reshape((-1, len(names))).T
+        if log_in is False:
+            values = np.log10(values)
+        return values, shape
+
+    def _log_steady_state_grid(self, log_parameters):
+        solution = self._log_linear_solution()
+        return np.dot(solution['M'],
+                      solution['b'] - np.dot(solution['Ai'], log_parameters))
+
+    def steady_state_grid(self, parameter_values, log_in=False, log_out=False):
+        ''' Evaluates the steady state over many parameter sets at once.
+
+        The log-linear solution of the S-system is pulled from the C library
+        once, and every point is evaluated with NumPy matrix products.
+
+        Args:
+            parameter_values (dict or array): Values for the independent
+                variables, either as a dictionary of scalars and arrays or
+                an array whose last dimension follows the order of the
+                independent variables.
+
+        Kwargs:
+            log_in (bool): If True, the parameter values are the base-10
+                logarithm of the parameters.
+
+            log_out (bool): If True, the base-10 logarithm of the steady
+                state is returned.
+
+        Returns:
+            A dictionary of arrays, keyed by dependent variable name, with the
+            shape of the parameter grid. None if the S-system has no solution.
+        '''
+        if self._log_linear_solution() is None:
+            return None
+        log_parameters, shape = self._log_parameter_array(parameter_values, log_in=log_in)
+        log_ss = self._log_steady_state_grid(log_parameters)
+        if log_out is False:
+            log_ss = 10**log_ss
+        var_names = self.dependent_variables
+        return {var_names[i]:log_ss[i].reshape(shape) for i in xrange(len(var_names))}
+
+    def steady_state_flux_grid(self, parameter_values, log_in=False, log_out=False):
+        ''' Evaluates the steady-state fluxes over many parameter sets at once.
+
+        Accepts the same arguments as steady_state_grid, and returns a
+        dictionary of arrays keyed by 'V_' followed by the dependent variable
+        name.
+        '''
+        solution = self._log_linear_solution()
+        if solution is None:
+            return None
+        log_parameters, shape = self._log_parameter_array(parameter_values, log_in=log_in)
+        log_ss = self._log_steady_state_grid(log_parameters)
+        log_flux = (solution['log_alpha'] +
+                    np.dot(solution['Gd'], log_ss) +
+                    np.dot(solution['Gi'], log_parameters))
+        if log_out is False:
+            log_flux = 10**log_flux
+        var_names = self.dependent_variables
+        return {('V_' + var_names[i]):log_flux[i].reshape(shape) for i in xrange(len(var_names))}
+
+    def steady_state_function_grid(self, function, parameter_values, log_in=False):
+        ''' Evaluates a function of the steady state over many parameter sets.
+
+        Accepts the same parameter values as steady_state_grid. The function
+        can refer to the independent variables, the steady-state
+        concentrations and fluxes, and the logarithmic gains using the
+        '$L_<dependent>_<independent>' notation. Returns an array with the
+        shape of the parameter grid.
+        '''
         if isinstance(function, Expression):
             expr = function
         else:
             expr = Expression(function)
-        p_vals = parameter_values.copy()
-        p_vals.update(self.steady_state(parameter_values, log_out=False))
-        p_vals.update(self.steady_state_flux(parameter_values, log_out=False))
-        for i in self.dependent_variables:
-            for j in self.independent_variables:
-                p_vals['$L_'+i+'_'+j] = self.log_gain(i,j)
-        value = expr.eval_with_values(p_vals=p_vals)
-        return value
+        solution = self._log_linear_solution()
+        if solution is None:
+            return None
+        log_parameters, shape = self._log_parameter_array(parameter_values, log_in=log_in)
+        log_ss = self._log_steady_state_grid(log_parameters)
+        log_flux = (solution['log_alpha'] +
+                    np.dot(solution['Gd'], log_ss) +
+                    np.dot(solution['Gi'], log_parameters))
+        Xd = self.dependent_variables
+        Xi = self.independent_variables
+        columns = dict()
+        for i in xrange(len(Xi)):
+            columns[Xi[i]] = 10**log_parameters[i]
+        for i in xrange(len(Xd)):
+            columns[Xd[i]] = 10**log_ss[i]
+            columns['V_' + Xd[i]] = 10**log_flux[i]
+        for i in xrange(len(Xd)):
+            for j in xrange(len(Xi)):
+                columns['$L_'+Xd[i]+'_'+Xi[j]] = solution['log_gains'][i,j]
+        if isinstance(parameter_values, dict) is True:
+            for key in parameter_values:
+                if key not in columns:
+                    columns[key] = np.asarray(parameter_values[key], dtype=float).ravel()
+        number_of_points = log_parameters.shape[1]
+        try:
+            compiled = expr.compile()
+        except ValueError:
+            compiled = None
+        if compiled is not None:
+            values = np.broadcast_to(compiled(columns), (number_of_points,))
+            return np.array(values, dtype=float).reshape(shape)
+        p_vals = VariablePool(names=expr.variables)
+        names = p_vals.keys()
+        table = np.zeros((number_of_points, len(names)))
+        for i in xrange(len(names)):
+            table[:,i] = columns[names[i]]
+        values = np.zeros(number_of_points)
+        for k in xrange(number_of_points):
+            p_vals.set_values(table[k])
+            values[k] = expr.eval_with_values(p_vals=p_vals)
+        return values.reshape(shape)
+
+    def steady_state_function(self, function, parameter_values):
+        value = self.steady_state_function_grid(function, parameter_values)
+        if value is None:
+            return None
+        return float(value)
 
     def positive_roots(self, parameter_values, show_marginal=True):
         
@@ -201,15 +365,64 @@ class SSystem(GMASystem):
             positive_roots = str(positive_roots) + '*'
         return positive_roots
         
-    def eigenvalues(self, parameter_values):
-        
+    def _log_jacobian_grid(self, log_parameters):
+        ''' Jacobian matrices of the system in logarithmic coordinates at the
+            steady states of many parameter sets.
+
+        Returns a (number of points, n, n) array, where each matrix is the
+        kinetic order matrix Ad scaled by the turnover rates V/X.
+        '''
+        solution = self._log_linear_solution()
+        log_ss = self._log_steady_state_grid(log_parameters)
+        log_flux = (solution['log_alpha'] +
+                    np.dot(solution['Gd'], log_ss) +
+                    np.dot(solution['Gi'], log_parameters))
+        turnover = 10**(log_flux - log_ss)
+        return turnover.T[:, :, np.newaxis] * solution['Ad'][np.newaxis, :, :]
+
+    def positive_roots_grid(self, parameter_values, log_in=False):
+        ''' Counts the eigenvalues with positive real part over many
+            parameter sets.
+
+        Accepts the same parameter values as steady_state_grid. Returns a
+        tuple with the number of positive roots and a boolean array
+        indicating marginal stability (eigenvalues on the imaginary axis),
+        both with the shape of the parameter grid, or None if the
+        S-System has no solution.
+        '''
+        eigenvalues = self.eigenvalues_batch(parameter_values, log_in=log_in)
+        if eigenvalues is None:
+            return None
+        shape = eigenvalues.shape[:-1]
+        eigenvalues = eigenvalues.reshape((-1, eigenvalues.shape[-1]))
+        scale = np.maximum(1., np.abs(eigenvalues).max(axis=1))
+        tolerance = 1e-10*scale[:, np.newaxis]
+        count = (eigenvalues.real > tolerance).sum(axis=1)
+        marginal = (np.abs(eigenvalues.real) <= tolerance).any(axis=1)
+        return count.reshape(shape), marginal.reshape(shape)
+
+    def eigenvalues_batch(self, parameter_values, log_in=False):
+        ''' Eigenvalues of the system at the steady states of many parameter
+            sets.
+
+        Accepts the same parameter values as steady_state_grid, e.g. an
+        (N, number of independent variables) array. The Jacobians of all
+        points are stacked and their eigenvalues computed in a single call.
+        Returns a complex array with the shape of the parameter grid and a
+        last dimension with one entry per dependent variable, or None if
+        the S-System has no solution.
+        '''
         if DSVariablePoolNumberOfVariables(DSSSystemXd_a(self._swigwrapper)) > 0:
             raise TypeError, 'S-System must be reduced to ODE-only system'
-        ss = self.steady_state(parameter_values)
-        fluxes = self.steady_state_flux(parameter_values)
-        turnover = np.array(zip([fluxes['V_'+i]/ss[i] for i in self.dependent_variables]))
-        FAd = turnover * np.array(self.Ad)
-        eigenvalues = np.linalg.eig(FAd)[0]
+        if self._log_linear_solution() is None:
+            return None
+        log_parameters, shape = self._log_parameter_array(parameter_values, log_in=log_in)
+        eigenvalues = np.linalg.eigvals(self._log_jacobian_grid(log_parameters))
+        return eigenvalues.reshape(shape + (len(self.dependent_variables),))
+
+    def eigenvalues(self, parameter_values):
+        
+        eigenvalues = self.eigenvalues_batch(parameter_values)
         return eigenvalues
     
     def routh_index(self, parameter_values):
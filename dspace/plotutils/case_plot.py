@@ -6,12 +6,14 @@
 import numpy as np
 import matplotlib as mt
 import matplotlib.pyplot as plt
+import matplotlib.tri
 from mpl_toolkits.mplot3d import Axes3D
 import mpl_toolkits.mplot3d as a3
 from math import log10
 
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
+from dspace.expressions import Expression
 import dspace.models.case
 
 from dspace.plotutils.monkey_patching import monkeypatch_method
@@ -79,21 +81,17 @@ def routh_data(case, p_vals, x_variable, y_variable, points, x, y, path):
 
     f_val = list()
     params = VariablePool(p_vals)
-    V = zip(*points)    
     X,Y = np.meshgrid(x, y)
-    Z = mt.mlab.griddata(V[0], V[1], np.repeat(1, len(V[0])), X, Y)
-    levels = list()
+    inside = lattice_inside_mask(path, X, Y)
+    Z = np.zeros((len(y), len(x)))
     ssystem = case.ssystem.remove_algebraic_constraints()
-    mask=np.ones((len(y), len(x)))
-    for (i, yi) in enumerate(y):
+    for (i, j) in zip(*np.nonzero(inside)):
+        params[x_variable] = 10**x[j]
         params[y_variable] = 10**y[i]
-        for (j, xj) in enumerate(x):
-            params[x_variable] = 10**x[j]
-            Z[i,j] = ssystem.routh_index(params)
-            if path.contains_point((xj, yi)) == 1:
-                if Z[i,j] not in levels:
-                    levels.append(Z[i,j])
-                mask[i,j] = 0
+        Z[i,j] = ssystem.routh_index(params)
+    values, first = np.unique(Z[inside], return_index=True)
+    levels = [values[k] for k in np.argsort(first)]
+    mask = ~inside
     Z = np.ma.masked_array(Z, mask=mask)
     return X,Y,Z,levels
 
@@ -183,25 +181,48 @@ def sampled_data(case, function, p_vals, x_variable, y_variable, points, x, y, p
         Z = [Z, Z_alt]
     return X,Y,Z,clim
 
+def log_parameter_grid(case, p_vals, x_variable, y_variable, x, y):
+    ''' Dictionary of logarithmic parameter values for the steady-state grid
+        evaluation, where the x and y variables take arrays of values.
+    '''
+    params = {key:log10(p_vals[key]) for key in case.independent_variables}
+    params[x_variable] = x
+    params[y_variable] = y
+    return params
+
+def lattice_inside_mask(path, X, Y):
+    ''' Boolean mask of the lattice points of the meshgrid X, Y that are
+        inside the path, evaluated in a single call.
+    '''
+    points = np.column_stack((np.ravel(X), np.ravel(Y)))
+    if len(points) == 0:
+        return np.zeros(np.shape(X), dtype=bool)
+    return path.contains_points(points).reshape(np.shape(X))
+
+def lattice_boundary_mask(path, x, y, resolution):
+    ''' Boolean mask of the lattice points closest to the boundary of the
+        path, sampled with the resolution of the lattice.
+    '''
+    boundary = np.zeros((len(y), len(x)), dtype=bool)
+    if len(x) == 0 or len(y) == 0:
+        return boundary
+    interpolated_path = path.interpolated((len(path.vertices)-1)*resolution)
+    vertices = interpolated_path.vertices
+    j = np.argmin(abs(x[np.newaxis,:]-vertices[:,0][:,np.newaxis]), axis=1)
+    i = np.argmin(abs(y[np.newaxis,:]-vertices[:,1][:,np.newaxis]), axis=1)
+    boundary[i,j] = True
+    return boundary
+
 def interpolated_data_new(case, function, p_vals, x_variable, y_variable,
                           range_x, range_y, x_indices, y_indices, path,
                           resolution, alt_function=None):
-    f_val = list()
-    alt_f_val = list()
-    params = VariablePool(names=case.independent_variables)
-    for key in params:
-        params[key] = p_vals[key]
-    clim = None
     points = path.vertices
-    for (x_value,y_value) in points:
-        params[x_variable] = 10**x_value
-        params[y_variable] = 10**y_value
-        value = case.ssystem.steady_state_function(function, params)        
-        f_val.append(value)
-        if alt_function is not None:
-            alt_value = case.ssystem.steady_state_function(alt_function, params)
-            alt_f_val.append(alt_value)
     V = zip(*points)
+    params = log_parameter_grid(case, p_vals, x_variable, y_variable,
+                                np.array(V[0]), np.array(V[1]))
+    f_val = case.ssystem.steady_state_function_grid(function, params, log_in=True)
+    if alt_function is not None:
+        alt_f_val = case.ssystem.steady_state_function_grid(alt_function, params, log_in=True)
     delta_x = (range_x[1]-range_x[0])/resolution
     delta_y = (range_y[1]-range_y[0])/resolution
     x = np.linspace(range_x[0] + delta_x*x_indices[0], range_x[0] + delta_x * x_indices[1], 1+x_indices[1] - x_indices[0])
@@ -212,41 +233,23 @@ def interpolated_data_new(case, function, p_vals, x_variable, y_variable,
     Z = mt.mlab.griddata(V[0], V[1], f_val, X, Y, interp='linear')
     if alt_function is not None:
         Z_alt = mt.mlab.griddata(V[0], V[1], alt_f_val, X, Y, interp='linear')
-    for (i, yi) in enumerate(y):
-        for (j, xj) in enumerate(x):
-            if path.contains_point((xj, yi)) == False:
-                Z[i,j] = np.nan
-                continue
-            if clim is None:
-                clim = [Z[i,j], Z[i,j]]
-            else:
-                clim[0] = min(clim[0], Z[i,j])
-                clim[1] = max(clim[1], Z[i,j])
+    Z[~lattice_inside_mask(path, X, Y)] = np.nan
     Z = np.ma.array(Z, mask=np.isnan(Z))
-    interpolated_path = path.interpolated((len(path.vertices)-1)*resolution)
-    for (xj, yi) in interpolated_path.vertices:
-        j = np.argmin(abs(x-xj))
-        i = np.argmin(abs(y-yi))
-        params[x_variable] = 10**x[j]
-        params[y_variable] = 10**y[i]
-        Z[i,j] = case.ssystem.steady_state_function(function, params)
-        if alt_function is not None:
-            Z_alt[i,j] = case.ssystem.steady_state_function(alt_function, params)
-        if clim is None:
-            clim = [Z[i,j], Z[i,j]]
-        else:
-            clim[0] = min(clim[0], Z[i,j])
-            clim[1] = max(clim[1], Z[i,j])
+    boundary = lattice_boundary_mask(path, x, y, resolution)
+    params = log_parameter_grid(case, p_vals, x_variable, y_variable,
+                                X[boundary], Y[boundary])
+    Z[boundary] = case.ssystem.steady_state_function_grid(function, params, log_in=True)
+    if alt_function is not None:
+        Z_alt[boundary] = case.ssystem.steady_state_function_grid(alt_function, params, log_in=True)
+    clim = None
+    if Z.count() > 0:
+        clim = [Z.min(), Z.max()]
     if alt_function is not None:
         Z = [Z, Z_alt]
     return X,Y,Z,clim
 
 def sample_data_new(case, function, p_vals, x_variable, y_variable,
                      range_x, range_y, x_indices, y_indices, path, resolution, alt_function=None):
-    f_val = list()
-    alt_f_val = list()
-    
-    params = VariablePool(p_vals)  
     delta_x = (range_x[1]-range_x[0])/resolution
     delta_y = (range_y[1]-range_y[0])/resolution
     x = np.linspace(range_x[0] + delta_x*x_indices[0], 
@@ -256,52 +259,189 @@ def sample_data_new(case, function, p_vals, x_variable, y_variable,
                     range_y[0] + delta_y * y_indices[1], 
                     1+y_indices[1] - y_indices[0])
     X,Y = np.meshgrid(x, y)
-    Z = np.zeros((len(y), len(x)))
+    inside = lattice_inside_mask(path, X, Y)
+    inside |= lattice_boundary_mask(path, x, y, resolution)
+    params = log_parameter_grid(case, p_vals, x_variable, y_variable,
+                                X[inside], Y[inside])
+    Z = np.empty(X.shape)
+    Z.fill(np.nan)
+    Z[inside] = case.ssystem.steady_state_function_grid(function, params, log_in=True)
+    Z = np.ma.array(Z, mask=np.isnan(Z))
     if alt_function is not None:
-        Z = np.zeros((len(x), len(y))) #mt.mlab.griddata(x, y, np.repeat(0, len(x)), X, Y)
+        Z_alt = np.empty(X.shape)
+        Z_alt.fill(np.nan)
+        Z_alt[inside] = case.ssystem.steady_state_function_grid(alt_function, params, log_in=True)
+        Z_alt = np.ma.array(Z_alt, mask=np.isnan(Z_alt))
     clim = None
-    for (i, yi) in enumerate(y):
-        params[y_variable] = 10**yi
-        for (j, xj) in enumerate(x):
-            if path.contains_point((xj, yi)) == False:
-                Z[i,j] = np.nan
-                continue
-            params[x_variable] = 10**xj
-            Z[i,j] = case.ssystem.steady_state_function(function, params)
-            if alt_function is not None:
-                Z_alt[i,j] = case.ssystem.steady_state_function(alt_function, params)
-            if clim is None:
-                clim = [Z[i,j], Z[i,j]]
-            else:
-                clim[0] = min(clim[0], Z[i,j])
-                clim[1] = max(clim[1], Z[i,j])
-    Z = np.ma.array(Z, mask=np.isnan(Z))
-    interpolated_path = path.interpolated((len(path.vertices)-1)*resolution)
-    for (xj, yi) in interpolated_path.vertices:
-        j = np.argmin(abs(x-xj))
-        i = np.argmin(abs(y-yi))
-        params[x_variable] = 10**x[j]
-        params[y_variable] = 10**y[i]
-        ## print xj, yi
-        Z[i,j] = case.ssystem.steady_state_function(function, params)
-        if alt_function is not None:
-            Z_alt[i,j] = case.ssystem.steady_state_function(alt_function, params)
-        if clim is None:
-            clim = [Z[i,j], Z[i,j]]
-        else:
-            clim[0] = min(clim[0], Z[i,j])
-            clim[1] = max(clim[1], Z[i,j])
+    if Z.count() > 0:
+        clim = [Z.min(), Z.max()]
     if alt_function is not None:
         Z = [Z, Z_alt]
     return X,Y,Z,clim
+
+def adaptive_data_new(case, function, p_vals, x_variable, y_variable,
+                      range_x, range_y, x_indices, y_indices, path, resolution,
+                      tolerance=1e-3, alt_function=None):
+    ''' Samples the steady-state function on the lattice of sample_data_new
+        by refining a quadtree of lattice cells.
+
+    The function is evaluated at the corners of each cell and compared with
+    the bilinear interpolation of the corners at the center and at the
+    midpoints of the edges of the cell. Cells where the difference is within
+    the tolerance are filled by interpolation and the rest are split in four,
+    so that functions that are affine in logarithmic coordinates are
+    evaluated at a few points per case. Cells that do not contain lattice
+    points of the case region are skipped.
+
+    The tolerance is relative to the range of the values of each function
+    that have been evaluated in the case region, so that it does not depend
+    on the magnitude of the function. A function that is constant over the
+    evaluated points is interpolated only where the samples are equal.
+    '''
+    delta_x = (range_x[1]-range_x[0])/resolution
+    delta_y = (range_y[1]-range_y[0])/resolution
+    x = np.linspace(range_x[0] + delta_x*x_indices[0], 
+                    range_x[0] + delta_x * x_indices[1], 
+                    1+x_indices[1] - x_indices[0])
+    y = np.linspace(range_y[0] + delta_y*y_indices[0], 
+                    range_y[0] + delta_y * y_indices[1], 
+                    1+y_indices[1] - y_indices[0])
+    X,Y = np.meshgrid(x, y)
+    inside = lattice_inside_mask(path, X, Y)
+    inside |= lattice_boundary_mask(path, x, y, resolution)
+    functions = [function] if alt_function is None else [function, alt_function]
+    values = [np.empty(X.shape) for f in functions]
+    [i.fill(np.nan) for i in values]
+    evaluated = np.zeros(X.shape, dtype=bool)
+    counts = np.zeros((len(y)+1, len(x)+1), dtype=int)
+    counts[1:,1:] = np.cumsum(np.cumsum(inside, axis=0), axis=1)
+    def evaluate(rows, cols):
+        points = set([(i, j) for (i, j) in zip(rows, cols) if evaluated[i, j] == False])
+        if len(points) == 0:
+            return
+        rows, cols = [np.array(i) for i in zip(*points)]
+        params = log_parameter_grid(case, p_vals, x_variable, y_variable,
+                                    x[cols], y[rows])
+        for k in xrange(len(functions)):
+            values[k][rows, cols] = case.ssystem.steady_state_function_grid(functions[k], params, log_in=True)
+        evaluated[rows, cols] = True
+    cells = [(0, len(y)-1, 0, len(x)-1)]
+    while len(cells) > 0:
+        cells = [(i0, i1, j0, j1) for (i0, i1, j0, j1) in cells 
+                 if counts[i1+1, j1+1]-counts[i0, j1+1]-counts[i1+1, j0]+counts[i0, j0] > 0]
+        leaves = [(i0, i1, j0, j1) for (i0, i1, j0, j1) in cells if i1-i0 <= 2 and j1-j0 <= 2]
+        cells = [(i0, i1, j0, j1) for (i0, i1, j0, j1) in cells if i1-i0 > 2 or j1-j0 > 2]
+        points = [(i, j) for (i0, i1, j0, j1) in leaves 
+                  for i in xrange(i0, i1+1) for j in xrange(j0, j1+1) if inside[i, j] == True]
+        if len(points) > 0:
+            evaluate(*zip(*points))
+        rows = [i for (i0, i1, j0, j1) in cells for i in (i0, i0, i1, i1, (i0+i1)//2, (i0+i1)//2, (i0+i1)//2, i0, i1)]
+        cols = [j for (i0, i1, j0, j1) in cells for j in (j0, j1, j0, j1, (j0+j1)//2, j0, j1, (j0+j1)//2, (j0+j1)//2)]
+        evaluate(rows, cols)
+        scales = list()
+        for Z in values:
+            known = Z[evaluated & np.isfinite(Z)]
+            scales.append(np.ptp(known) if len(known) > 0 else 0.)
+        refined = list()
+        for (i0, i1, j0, j1) in cells:
+            im = (i0+i1)//2
+            jm = (j0+j1)//2
+            u = (x[j0:j1+1]-x[j0])/(x[j1]-x[j0]) if j1 > j0 else np.zeros(1)
+            v = (y[i0:i1+1]-y[i0])/(y[i1]-y[i0]) if i1 > i0 else np.zeros(1)
+            V, U = np.meshgrid(v, u, indexing='ij')
+            blocks = list()
+            accurate = True
+            for k in xrange(len(values)):
+                Z = values[k]
+                block = (Z[i0,j0]*(1-U)*(1-V) + Z[i0,j1]*U*(1-V) + 
+                         Z[i1,j0]*(1-U)*V + Z[i1,j1]*U*V)
+                tests = [(im, jm), (im, j0), (im, j1), (i0, jm), (i1, jm)]
+                error = max([abs(Z[i, j]-block[i-i0, j-j0]) for (i, j) in tests])
+                accurate = accurate and bool(error <= tolerance*scales[k])
+                blocks.append(block)
+            if accurate is True:
+                for k in xrange(len(values)):
+                    unset = ~evaluated[i0:i1+1, j0:j1+1]
+                    values[k][i0:i1+1, j0:j1+1][unset] = blocks[k][unset]
+                continue
+            i_splits = [(i0, im), (im, i1)] if i1-i0 > 1 else [(i0, i1)]
+            j_splits = [(j0, jm), (jm, j1)] if j1-j0 > 1 else [(j0, j1)]
+            refined += [(a, b, c, d) for (a, b) in i_splits for (c, d) in j_splits]
+        cells = refined
+    for Z in values:
+        Z[~inside] = np.nan
+    values = [np.ma.array(Z, mask=np.isnan(Z)) for Z in values]
+    Z = values[0]
+    clim = None
+    if Z.count() > 0:
+        clim = [Z.min(), Z.max()]
+    if alt_function is not None:
+        Z = values
+    return X,Y,Z,clim
     
+def affine_data(case, function, p_vals, x_variable, y_variable, path, tolerance=1e-9):
+    ''' Values of the steady-state function at the vertices of the case
+        region, if the function is affine in logarithmic coordinates.
+
+    The function is affine if its expression is the logarithm of a product
+    of powers of variables and constants, or an affine combination of such
+    logarithms, since the steady state of a case is a power law. Returns
+    the coordinates and values at the vertices, or None if the function is
+    not affine or is not finite at the vertices. The values at the vertices,
+    the centroid and the edge midpoints are asserted to lie on a plane,
+    within the tolerance relative to their magnitude.
+    '''
+    if isinstance(function, Expression) is False:
+        function = Expression(function)
+    if function.is_log_affine() is False:
+        return None
+    vertices = np.array(path.vertices, dtype=float)
+    if len(vertices) > 1 and np.allclose(vertices[0], vertices[-1]) == True:
+        vertices = vertices[:-1]
+    if len(vertices) < 3:
+        return None
+    midpoints = (vertices + np.roll(vertices, -1, axis=0))/2
+    points = np.vstack((vertices, vertices.mean(axis=0)[np.newaxis,:], midpoints))
+    params = log_parameter_grid(case, p_vals, x_variable, y_variable,
+                                points[:,0], points[:,1])
+    values = case.ssystem.steady_state_function_grid(function, params, log_in=True)
+    if values is None:
+        return None
+    values = np.asarray(values, dtype=float)
+    if np.all(np.isfinite(values)) == False:
+        return None
+    A = np.column_stack((np.ones(len(points)), points))
+    coefficients = np.linalg.lstsq(A, values, rcond=-1)[0]
+    residual = np.abs(np.dot(A, coefficients) - values).max()
+    assert residual <= tolerance*max(1., np.abs(values).max()), \
+           'Function ' + str(function) + ' is not affine in logarithmic coordinates'
+    return vertices[:,0], vertices[:,1], values[:len(vertices)]
+
+def region_triangulation(X, Y):
+    ''' Fan triangulation of a convex case region from its vertices. '''
+    triangles = [[0, i, i+1] for i in xrange(1, len(X)-1)]
+    return mt.tri.Triangulation(X, Y, triangles)
+
+def dominant_eigenvalue(eigenvalues, component='real', rank=1):
+    ''' Component of the eigenvalue with the rank-th largest real part,
+        taken along the last axis of an array of eigenvalues.
+    '''
+    eigenvalues = np.asarray(eigenvalues)
+    order = np.argsort(eigenvalues.real, axis=-1, kind='mergesort')
+    rank = min(rank, eigenvalues.shape[-1])
+    index = order[..., -rank][..., np.newaxis]
+    value = np.take_along_axis(eigenvalues, index, axis=-1)[..., 0]
+    if component == 'real':
+        return value.real
+    return value.imag
 
 @monkeypatch_method(dspace.models.case.Case)
-def draw_2D_dominant_eigenvalue_data(self, p_vals, x_variable, y_variable,
-                                     range_x, range_y, cmp=None,
-                                     resolution=100, component='real'): 
-    params = VariablePool(p_vals)
-    clim = None  
+def eigenvalues_2D_lattice(self, p_vals, x_variable, y_variable,
+                           range_x, range_y, resolution=100):
+    ''' Eigenvalues of the case at the lattice points inside its region,
+        returned with the lattice, the mask of the points inside the region
+        and the path of the region.
+    '''
     x_indices, y_indices, path = generate_plot_lattice_bounds_new(self, p_vals,
                                                   x_variable, y_variable,
                                                   range_x, range_y, resolution)
@@ -318,55 +458,51 @@ def draw_2D_dominant_eigenvalue_data(self, p_vals, x_variable, y_variable,
     x = np.round(x, 10)
     y = np.round(y, 10)
     X,Y = np.meshgrid(x, y)
-    Z = np.zeros((len(y), len(x)))
+    inside = lattice_inside_mask(path, X, Y)
+    inside |= lattice_boundary_mask(path, x, y, resolution)
     ssys = self.ssystem.remove_algebraic_constraints()
-    for (i, yi) in enumerate(y):
-        params[y_variable] = 10**yi
-        for (j, xj) in enumerate(x):
-            if path.contains_point((xj, yi)) == False:
-                Z[i,j] = np.nan
-                continue
-            params[x_variable] = 10**xj
-            eigen_values = ssys.eigenvalues(params)
-            if cmp is None:
-                if component == 'real':
-                    Z[i,j] = max(eigen_values.real)
-                else:
-                    Z[i,j] = max(eigen_values.imag)
-            else:
-                Z[i,j] = cmp(eigen_values)
-            if clim is None:
-                clim = [Z[i,j], Z[i,j]]
-            else:
-                clim[0] = min(clim[0], Z[i,j])
-                clim[1] = max(clim[1], Z[i,j])
-    Z = np.ma.array(Z, mask=np.isnan(Z))
-    interpolated_path = path.interpolated((len(path.vertices)-1)*resolution)
-    for (xj, yi) in interpolated_path.vertices:
-        j = np.argmin(abs(x-xj))
-        i = np.argmin(abs(y-yi))
-        params[x_variable] = 10**x[j]
-        params[y_variable] = 10**y[i]
-        eigen_values = ssys.eigenvalues(params)
-        if cmp is None:
-            if component == 'real':
-                Z[i,j] = max(eigen_values.real)
-            else:
-                Z[i,j] = max(eigen_values.imag)
-        else:
-            Z[i,j] = cmp(eigen_values)
-        if clim is None:
-            clim = [Z[i,j], Z[i,j]]
+    params = log_parameter_grid(self, p_vals, x_variable, y_variable,
+                                X[inside], Y[inside])
+    eigen_values = ssys.eigenvalues_batch(params, log_in=True)
+    return (X, Y, inside, eigen_values, path)
+
+def dominant_eigenvalue_lattice_data(X, Y, inside, eigen_values, path, cmp=None,
+                                     component='real', rank=None):
+    ''' Values of the dominant eigenvalue at the points of a lattice from
+        the eigenvalues returned by eigenvalues_2D_lattice.
+    '''
+    clim = None
+    Z = np.empty(X.shape)
+    Z.fill(np.nan)
+    if eigen_values is not None:
+        if cmp is not None:
+            Z[inside] = [cmp(i) for i in eigen_values]
+        elif rank is not None:
+            Z[inside] = dominant_eigenvalue(eigen_values, component=component, rank=rank)
+        elif component == 'real':
+            Z[inside] = eigen_values.real.max(axis=1)
         else:
-            clim[0] = min(clim[0], Z[i,j])
-            clim[1] = max(clim[1], Z[i,j])
+            Z[inside] = eigen_values.imag.max(axis=1)
+    Z = np.ma.array(Z, mask=np.isnan(Z))
+    if Z.count() > 0:
+        clim = [Z.min(), Z.max()]
     return (X, Y, Z, clim, path)
+
+@monkeypatch_method(dspace.models.case.Case)
+def draw_2D_dominant_eigenvalue_data(self, p_vals, x_variable, y_variable,
+                                     range_x, range_y, cmp=None,
+                                     resolution=100, component='real',
+                                     rank=None): 
+    data = self.eigenvalues_2D_lattice(p_vals, x_variable, y_variable,
+                                       range_x, range_y, resolution=resolution)
+    return dominant_eigenvalue_lattice_data(*data, cmp=cmp, component=component,
+                                            rank=rank)
         
 @monkeypatch_method(dspace.models.case.Case)
 def draw_2D_dominant_eigenvalue(self, ax, p_vals, x_variable, y_variable,
                                 range_x, range_y, resolution=100,
                                 zlim=None, component='real', cmp=None,
-                                **kwargs):
+                                rank=None, **kwargs):
     
     X, Y, Z, clim, path = self.draw_2D_dominant_eigenvalue_data(p_vals,
                                                                 x_variable,
@@ -376,6 +512,7 @@ def draw_2D_dominant_eigenvalue(self, ax, p_vals, x_variable, y_variable,
                                                                 resolution=resolution,
                                                                 component=component,
                                                                 cmp=cmp,
+                                                                rank=rank,
                                                                 )
     if 'cmap' in kwargs:
         cmap = kwargs.pop('cmap') 
@@ -392,19 +529,43 @@ def draw_2D_dominant_eigenvalue(self, ax, p_vals, x_variable, y_variable,
 @monkeypatch_method(dspace.models.case.Case)
 def draw_2D_ss_function_data(self, function, p_vals, x_variable, y_variable,
                              range_x, range_y, 
-                             resolution=100, log_linear=False): 
+                             resolution=100, log_linear=False,
+                             adaptive=False, tolerance=1e-3, exact=False): 
+    ''' Samples the steady-state function over the case region.
+
+    If adaptive is True, the lattice is sampled by adaptive_data_new, with
+    the tolerance relative to the range of the function in the region.
+
+    If exact is True and the function is affine in logarithmic coordinates,
+    returns its values at the vertices of the region instead of a lattice,
+    with X, Y and Z as one dimensional arrays. The draw_2D_ss_function
+    methods use the vertices by default, and draw them with
+    draw_2D_ss_function_from_data.
+    '''
     ## points, x, y, path = generate_plot_lattice_bounds(self, p_vals,
     ##                                                   x_variable, y_variable,
     ##                                                   range_x, range_y, resolution)
     x, y, path = generate_plot_lattice_bounds_new(self, p_vals,
                                                           x_variable, y_variable,
                                                           range_x, range_y, resolution)
+    if exact is True and log_linear is False and adaptive is False:
+        data = affine_data(self, function, p_vals, x_variable, y_variable, path)
+        if data is not None:
+            X, Y, Z = data
+            return (X, Y, Z, [Z.min(), Z.max()], path)
     if log_linear is True:
         X,Y,Z,clim = interpolated_data_new(self, function, p_vals,
                                            x_variable, y_variable,
                                            [log10(i) for i in range_x], 
                                            [log10(i) for i in range_y],
                                            x, y, path, resolution)
+    elif adaptive is True:
+        X,Y,Z,clim = adaptive_data_new(self, function, p_vals,
+                                       x_variable, y_variable,
+                                       [log10(i) for i in range_x], 
+                                       [log10(i) for i in range_y],
+                                       x, y, path, resolution,
+                                       tolerance=tolerance)
     else:
         X,Y,Z,clim = sample_data_new(self, function, p_vals,
                                      x_variable, y_variable,
@@ -417,7 +578,13 @@ def draw_2D_ss_function_data(self, function, p_vals, x_variable, y_variable,
 @monkeypatch_method(dspace.models.case.Case)
 def draw_2D_ss_function_from_data(self, ax, X, Y, Z, clim, path, zlim=None, surface=False, **kwargs):
     patch = mt.patches.PathPatch(path, fc='none', ec='none', lw=0.)
-    if surface is True:
+    if np.ndim(X) == 1:
+        triangulation = region_triangulation(X, Y)
+        if surface is True:
+            pc = ax.plot_trisurf(triangulation, Z, edgecolor='none')
+        else:
+            pc = ax.tripcolor(triangulation, Z, shading='gouraud', **kwargs)
+    elif surface is True:
         pc = ax.plot_surface(X, Y, Z, edgecolor='none')
     else:
         pc = ax.pcolormesh(X, Y, Z, rasterized=True, **kwargs)
@@ -432,7 +599,8 @@ def draw_2D_ss_function_from_data(self, ax, X, Y, Z, clim, path, zlim=None, surf
     
 @monkeypatch_method(dspace.models.case.Case)
 def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
-                        range_x, range_y, resolution=100, log_linear=False, zlim=None, **kwargs):
+                        range_x, range_y, resolution=100, log_linear=False, zlim=None,
+                        adaptive=False, tolerance=1e-3, exact=True, **kwargs):
     
     X, Y, Z, clim, path = self.draw_2D_ss_function_data(function, 
                                                          p_vals,
@@ -441,7 +609,10 @@ def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
                                                          range_x,
                                                          range_y,
                                                          resolution=resolution,
-                                                         log_linear=log_linear
+                                                         log_linear=log_linear,
+                                                         adaptive=adaptive,
+                                                         tolerance=tolerance,
+                                                         exact=exact
                                                          )
     if 'cmap' in kwargs:
         cmap = kwargs.pop('cmap') 
@@ -629,10 +800,9 @@ def draw_1D_ss_function(self, ax, function, p_vals, slice_variable, range_slice,
     if len(V) == 1:
         return None
     X = np.linspace(V[0], V[1], resolution)
-    f_val = list()
-    for x in X:
-        params[slice_variable] = 10**x
-        f_val.append(self.ssystem.steady_state_function(function, params))
+    log_params = {key:log10(params[key]) for key in self.independent_variables}
+    log_params[slice_variable] = X
+    f_val = self.ssystem.steady_state_function_grid(function, log_params, log_in=True)
     pt = ax.plot(X, f_val, **kwargs)
     ax.set_xlim(np.log10(range_slice))
     return pt
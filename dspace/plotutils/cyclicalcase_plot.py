@@ -194,9 +194,12 @@ def draw_1D_ss_function(self, ax, function, p_vals, slice_variable, range_slice,
     V = self.vertices_1D_slice(params, slice_variable, range_slice=range_slice, log_out=True)
     V = zip(*V)[0]
     X = np.linspace(V[0], V[1], resolution)
+    values = params.values_as_array()
+    column = params.index(slice_variable)
     f_val = list()
     for x in X:
-        params[slice_variable] = 10**x
+        values[column] = 10**x
+        params.set_values(values)
         f_val.append(self.ssystem.steady_state_function(function, params))
     pt = ax.plot(X, f_val, **kwargs)
     ax.set_xlim(np.log10(range_x))
@@ -16,6 +16,7 @@ from math import log10, floor, ceil
 from dspace.SWIG.dspace_interface import *
 from dspace.variables import VariablePool
 from dspace.expressions import Expression
+from dspace.executors import get_executor, cancellation_point
 from dspace.models.cyclicalcase import CyclicalCase
 import dspace.models.case
 import dspace.models.designspace
@@ -24,6 +25,7 @@ from dspace.plotutils.monkey_patching import monkeypatch_method
 from dspace.models.designspace import DesignSpace
 
 import dspace.plotutils.case_plot
+from dspace.plotutils.case_plot import dominant_eigenvalue_lattice_data
 from dspace.models.designspace import sort_cases
 
 import StringIO
@@ -66,34 +68,89 @@ def key_sort_function(x, y):
  
 
 class SliderCallback(object):
+    ''' Redraws a 2D slice when the sliders of an interactive plot change.
+
+    In incremental mode, the region of each case intersection is kept as a
+    polygon and only the regions of cases whose boundaries depend on a moved
+    parameter are recalculated and updated in place. The validity of the
+    cases in the slice is kept as well, and only the cases that can be
+    valid and depend on a moved parameter are tested again. Slider events that
+    arrive within the debounce interval, in milliseconds, are coalesced into
+    a single redraw. Plots that cannot be updated incrementally, such as
+    those with cyclical cases or rasterized regions, are redrawn from
+    scratch.
+    '''
     
     def __init__(self, ds, slider_dictionary, c_axs,  colordict, *args, **kwargs):
         self.ds = ds
         self.sliders = slider_dictionary
         self.c_axs = c_axs
+        self.incremental = kwargs.pop('incremental', True)
+        self.debounce = kwargs.pop('debounce', 50)
         self.args = args
         self.kwargs = kwargs
         kwargs['color_dict'] = colordict
         kwargs['colorbar'] = False
+        self.regions = None
+        self.validity = None
+        self.dependent_cases = None
+        self.drawn_pvals = None
+        self.colorbar_labels = None
+        self.timer = None
         
     def __call__(self, val):
+        ax = self.args[0]
+        if self.debounce > 0 and self.drawn_pvals is not None:
+            if self.timer is None:
+                timer = ax.figure.canvas.new_timer(interval=self.debounce)
+                if type(timer) is not mt.backend_bases.TimerBase:
+                    timer.single_shot = True
+                    timer.add_callback(self.update)
+                    self.timer = timer
+            if self.timer is not None:
+                self.timer.stop()
+                self.timer.start()
+                return
+        self.update()
+
+    def update(self):
         ax = self.args[0]
         pvals = self.args[1]
         sliders = self.sliders
-        number_c_axs = len(self.c_axs)
         color_dict = self.kwargs['color_dict']
         for i in sliders:
             pvals[i] = 10**sliders[i].val
-        ax.clear()
-        for i in self.c_axs:
-            i.clear()
-        color_dict.update(self.ds.draw_2D_slice(*self.args, **self.kwargs))
+        changed = None
+        if self.drawn_pvals is not None:
+            changed = [i for i in sliders if pvals[i] != self.drawn_pvals[i]]
+            if len(changed) == 0:
+                return
+        drawn = None
+        if self.incremental is True:
+            drawn = self.update_regions(changed)
+        if drawn is None:
+            ax.clear()
+            colors = self.ds.draw_2D_slice(*self.args, **self.kwargs)
+            if colors is not None:
+                color_dict.update(colors)
+            self.regions = None
+            self.validity = None
+        self.drawn_pvals = dict(pvals)
         labels = color_dict.keys()
         try:
             labels.sort(cmp=key_sort_function)
         except:
             pass
         labels.reverse()
+        if labels != self.colorbar_labels:
+            self.draw_colorbars(labels)
+        ax.figure.canvas.draw_idle()
+
+    def draw_colorbars(self, labels):
+        ax = self.args[0]
+        color_dict = self.kwargs['color_dict']
+        for i in self.c_axs:
+            i.clear()
         num = 0 
         j = 0
         while num < len(labels):
@@ -107,7 +164,138 @@ class SliderCallback(object):
             self.ds.draw_region_colorbar(c_ax, temp_dict)
             num += 20 
             j += 1
-        plt.draw()
+        self.colorbar_labels = labels
+
+    def update_regions(self, changed):
+        ''' Updates the polygons of the case intersections of the slice,
+            recalculating only the regions of cases with a moved parameter
+            in their boundaries. Returns None if the slice cannot be updated
+            incrementally.
+        '''
+        ds = self.ds
+        ax, pvals, x_variable, y_variable, range_x, range_y = self.args[:6]
+        kwargs = dict(self.kwargs)
+        color_dict = kwargs.pop('color_dict')
+        intersections = kwargs.pop('intersections', [1,2,3,4,5])
+        if isinstance(intersections, list) is False:
+            intersections = [intersections]
+        cmap = kwargs.pop('cmap', mt.cm.gist_rainbow)
+        for key in ['colorbar', 'expand_cycles', 'executor']:
+            kwargs.pop(key, None)
+        if len(self.args) > 6 or kwargs.get('resolution') is not None:
+            return None
+        if kwargs.get('included_cases') is not None or 'show_equations' in kwargs:
+            return None
+        kwargs.pop('resolution', None)
+        kwargs.pop('included_cases', None)
+        if 'ec' not in kwargs:
+            kwargs['ec'] = 'none'
+        p_bounds = dict(pvals)
+        p_bounds[x_variable] = range_x
+        p_bounds[y_variable] = range_y
+        validity = None
+        if changed is not None and self.regions is not None:
+            validity = self.update_validity(changed, p_bounds)
+        if validity is None:
+            validity = ds.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
+        valid_cases, valid_nonstrict = validity
+        self.validity = (valid_cases, valid_nonstrict)
+        case_numbers = valid_cases+valid_nonstrict
+        if len(case_numbers) == 0:
+            return None
+        if any([isinstance(case, CyclicalCase) for case in ds(case_numbers)]) is True:
+            return None
+        ## Every case in the slice is valid in the non-strict sense, so only
+        ## the intersections of several cases are tested, and those of cases
+        ## that do not depend on a moved parameter are memoized by ds.
+        valid_ints = list()
+        if 1 in intersections:
+            valid_ints += case_numbers
+        if max(intersections) > 1:
+            valid_ints += ds.valid_intersecting_cases([i for i in intersections if i > 1],
+                                                      case_numbers, p_bounds=p_bounds,
+                                                      strict=False)
+        affected = None
+        if changed is not None and self.regions is not None:
+            affected = set([i for i in case_numbers
+                            if len(set(changed).intersection(ds.case_boundary_parameters(i))) > 0])
+        if self.regions is None:
+            ax.clear()
+            self.regions = dict()
+            ax.set_xlim([log10(min(range_x)), log10(max(range_x))])
+            ax.set_ylim([log10(min(range_y)), log10(max(range_y))])
+            x_label = x_variable
+            y_label = y_variable
+            if x_variable in ds._latex:
+                x_label = '$'+ds._latex[x_variable]+'$'
+            if y_variable in ds._latex:
+                y_label = '$'+ds._latex[y_variable]+'$'
+            ax.set_xlabel(r'$\log_{10}$(' + x_label + ')')
+            ax.set_ylabel(r'$\log_{10}$(' + y_label + ')')
+        regions = dict()
+        for index in xrange(len(valid_ints)):
+            members = valid_ints[index]
+            if isinstance(members, list) is False:
+                members = [members]
+            members = [str(i) for i in members]
+            key = ', '.join([i+'*' if i in valid_nonstrict else i for i in members])
+            if key not in color_dict:
+                color_dict[key] = cmap((1.*index)/len(valid_ints))
+            region = self.regions.pop(key, None)
+            if region is not None and affected is not None:
+                if len(affected.intersection(members)) == 0:
+                    regions[key] = region
+                    continue
+            if len(members) == 1:
+                case = ds(members[0])
+            else:
+                case = dspace.models.case.CaseIntersection(ds(members))
+            V = case.vertices_2D_slice(pvals, x_variable, y_variable,
+                                       range_x=range_x, range_y=range_y,
+                                       log_out=True)
+            if len(V) == 0:
+                if region is not None:
+                    region.remove()
+                continue
+            if region is None:
+                V = zip(*V)
+                region = ax.fill(V[0], V[1], fc=color_dict[key], **kwargs)[0]
+            else:
+                region.set_xy(V)
+            regions[key] = region
+        for region in self.regions.values():
+            region.remove()
+        self.regions = regions
+        return regions
+
+    def update_validity(self, changed, p_bounds):
+        ''' Returns the strict and non-strict valid cases of the slice from
+            the validity of the previous slice, testing only the cases that
+            are valid somewhere and whose boundaries depend on a changed
+            parameter. Returns None if the validity is not known.
+        '''
+        ds = self.ds
+        if self.validity is None or ds._resolve_cycles is True:
+            return None
+        if self.dependent_cases is None:
+            dependent_cases = dict()
+            for case_number in ds.valid_cases(expand_cycles=False):
+                for name in ds.case_boundary_parameters(case_number):
+                    dependent_cases.setdefault(name, set()).add(case_number)
+            self.dependent_cases = dependent_cases
+        affected = set()
+        for name in changed:
+            affected.update(self.dependent_cases.get(name, ()))
+        valid_cases, valid_nonstrict = self.validity
+        valid_cases = [i for i in valid_cases if i not in affected]
+        valid_nonstrict = [i for i in valid_nonstrict if i not in affected]
+        retest = ds.filter_valid_cases(sorted(affected), p_bounds, strict=False)
+        strict = set(ds.filter_valid_cases(retest, p_bounds, strict=True))
+        valid_cases += [i for i in retest if i in strict]
+        valid_nonstrict += [i for i in retest if i not in strict]
+        valid_cases.sort(cmp=sort_cases)
+        valid_nonstrict.sort(cmp=sort_cases)
+        return valid_cases, valid_nonstrict
              
 @monkeypatch_method(dspace.models.designspace.DesignSpace)
 def draw_region_colorbar(self, ax, color_dict, **kwargs):
@@ -182,9 +370,71 @@ def draw_2D_log_gain_repertoire(self, ax, x_variable, y_variable, z_variable,
 
     
 
+def stability_row_keys(codes, format_row):
+    ''' Keys for the columns of an integer array of stability codes, where
+        each row holds the codes of one case. Each distinct column is
+        formatted once.
+    '''
+    rows, inverse = np.unique(codes.T, axis=0, return_inverse=True)
+    keys = np.array([format_row(row) for row in rows], dtype=object)
+    return keys[inverse.ravel()]
+
+def stability_label_image(keys, covered):
+    ''' Integer label image and label dictionary of an array of keys,
+        numbered in the order in which they first appear.
+    '''
+    Z = np.zeros(keys.shape, dtype=np.int) - 1
+    values = dict()
+    if covered.any() == False:
+        return Z, values
+    names, first, inverse = np.unique(keys[covered].astype(str),
+                                      return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.zeros(len(names), dtype=np.int)
+    rank[order] = np.arange(len(names))
+    Z[covered] = rank[inverse.ravel()]
+    values = {str(names[order[k]]):k for k in xrange(len(names))}
+    return Z, values
+
+def case_region_mask(ds, case_number, **kwargs):
+    return ds(case_number).region_mask_2D_slice(**kwargs).ravel()
+
+@monkeypatch_method(dspace.models.designspace.DesignSpace)
+def region_labels_2D_slice(self, case_numbers, p_vals, x_variable, y_variable, X, Y,
+                           strict=True, executor=None):
+    ''' Integer label image of the regions of a logarithmic 2D slice.
+
+    Each case is rasterized from its boundary inequalities onto the grid
+    X, Y (log10 values of the x and y variables). Returns the label image,
+    where -1 marks points outside every case, and the list of the
+    combinations of indices into case_numbers that correspond to each
+    label.
+    '''
+    X = np.asarray(X, dtype=float)
+    labels = np.empty(X.shape, dtype=np.int)
+    labels.fill(-1)
+    if len(case_numbers) == 0:
+        return labels, []
+    executor = get_executor(executor)
+    membership = np.array(executor.map(case_region_mask, self, case_numbers,
+                                       p_vals=p_vals,
+                                       x_variable=x_variable,
+                                       y_variable=y_variable,
+                                       X=X, Y=Y, strict=strict)).T
+    covered = membership.any(axis=1)
+    if covered.any() == False:
+        return labels, []
+    rows, inverse = np.unique(membership[covered], axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    combinations = [tuple([int(k) for k in np.nonzero(row)[0]]) for row in rows]
+    flat_labels = labels.ravel()
+    flat_labels[covered] = inverse
+    return flat_labels.reshape(X.shape), combinations
+
 @monkeypatch_method(dspace.models.designspace.DesignSpace)   
 def draw_2D_routh_index(self, ax, p_vals, x_variable, y_variable, range_x, range_y, color_dict=None,
-                           colorbar=True, resolution=100, cmap=mt.cm.Spectral_r):
+                           colorbar=True, resolution=100, cmap=mt.cm.Spectral_r,
+                           executor=None):
     
     if color_dict is None:
         color_dict = dict()
@@ -192,42 +442,30 @@ def draw_2D_routh_index(self, ax, p_vals, x_variable, y_variable, range_x, range
     p_bounds[x_variable] = range_x
     p_bounds[y_variable] = range_y
     valid_cases = self.valid_cases(p_bounds=p_bounds)
-    ssystems = list()
-    for case_number in valid_cases:
-        case = self(case_number)
-        V = case.vertices_2D_slice(p_vals, x_variable, y_variable, 
-                               range_x=[range_x[0]/2, range_x[1]*2], range_y=[range_y[0]/2, range_y[1]*2],
-                               log_out=True)
-        path=mt.path.Path(V, closed=False) 
-        ssystems.append((path, case.ssystem.remove_algebraic_constraints()))
+    cases = [self(case_number) for case_number in valid_cases]
+    ssystems = [case.ssystem.remove_algebraic_constraints() for case in cases]
     x = np.linspace(log10(range_x[0]), log10(range_x[1]), resolution)
     y = np.linspace(log10(range_y[0]), log10(range_y[1]), resolution)
     X, Y = np.meshgrid(x, y)
-    Z=np.zeros((len(x), len(y)), dtype=np.int)
-    values = dict()
+    labels, combinations = self.region_labels_2D_slice(valid_cases, p_vals,
+                                                       x_variable, y_variable,
+                                                       X, Y, executor=executor)
+    keys = np.empty(labels.shape, dtype=object)
     params = VariablePool(p_vals)
-    Zj = set()
-    for i in xrange(len(y)):
-        yi = y[i]
-        params[y_variable] = 10**yi
-        for j in xrange(len(x)):
-            xj = x[j]
-            params[x_variable] = 10**xj
-            Zj.clear()
-            for path, ssystem in ssystems:
-                if path.contains_point((xj, yi)):
-                    Zj.add(ssystem.routh_index(params))
-            nums = [num for num in Zj]
-            if len(nums) == 0:
-                continue
-            key = str(nums[0])
-            for index in xrange(1, len(nums)):
-                key += ','+str(nums[index])
-            try:
-                Z[i,j] = values[key]
-            except KeyError:
-                Z[i,j] = len(values)
-                values[key] = len(values)
+    format_row = lambda row: ','.join([str(num) for num in sorted(set(row))])
+    for index in xrange(len(combinations)):
+        cancellation_point(executor)
+        combination = combinations[index]
+        rows, cols = np.nonzero(labels == index)
+        codes = np.zeros((len(combination), len(rows)), dtype=np.int)
+        for point in xrange(len(rows)):
+            params[x_variable] = 10**x[cols[point]]
+            params[y_variable] = 10**y[rows[point]]
+            for k in xrange(len(combination)):
+                codes[k, point] = ssystems[combination[k]].routh_index(params)
+        keys[rows, cols] = stability_row_keys(codes, format_row)
+    Z, values = stability_label_image(keys, labels >= 0)
+    Z[Z < 0] = 0
     colors = dict()
     for i in values:
         colors[values[i]] = cmap(values[i]/(len(values)))
@@ -256,7 +494,7 @@ def draw_2D_routh_index(self, ax, p_vals, x_variable, y_variable, range_x, range
 def draw_2D_positive_roots(self, ax, p_vals, x_variable, y_variable, range_x, 
                            range_y, color_dict=None, colorbar=True, 
                            resolution=100, cmap=mt.cm.jet,
-                           included_cases=None):
+                           included_cases=None, executor=None):
     
     if color_dict is None:
         color_dict = dict()
@@ -271,62 +509,64 @@ def draw_2D_positive_roots(self, ax, p_vals, x_variable, y_variable, range_x,
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
         valid_cases = self.valid_cases(p_bounds=p_bounds)
+    cases = [self(case_number) for case_number in valid_cases]
     ssystems = list()
-    for case_number in valid_cases:
-        case = self(case_number)
+    for case in cases:
         if isinstance(case, CyclicalCase) is True:
-            V = case.vertices_2D_slice(p_vals, x_variable, y_variable, 
-                                       range_x=[range_x[0]/2, range_x[1]*2],
-                                       range_y=[range_y[0]/2, range_y[1]*2],
-                                       log_out=True)
-            for subcase in V:
-                path=mt.path.Path(V[subcase], closed=False) 
-                ssystems.append((path, case))
+            ssystems.append(case)
         else:
-            V = case.vertices_2D_slice(p_vals, x_variable, y_variable, 
-                                       range_x=[range_x[0]/2, range_x[1]*2],
-                                       range_y=[range_y[0]/2, range_y[1]*2],
-                                       log_out=True)
-            path=mt.path.Path(V, closed=False) 
-            ssystems.append((path, case.ssystem.remove_algebraic_constraints()))
+            ssystems.append(case.ssystem.remove_algebraic_constraints())
     x = np.linspace(log10(range_x[0]), log10(range_x[1]), resolution)
     y = np.linspace(log10(range_y[0]), log10(range_y[1]), resolution)
     X, Y = np.meshgrid(x, y)
-    Z=np.zeros((len(x), len(y)), dtype=np.int)
-    Z = Z - 1
-    values = dict()
+    labels, combinations = self.region_labels_2D_slice(valid_cases, p_vals,
+                                                       x_variable, y_variable,
+                                                       X, Y, executor=executor)
+    keys = np.empty(labels.shape, dtype=object)
     params = VariablePool(p_vals)
-    for i in xrange(len(y)):
-        yi = y[i]
-        params[y_variable] = 10**yi
-        for j in xrange(len(x)):
-            xj = x[j]
-            params[x_variable] = 10**xj
+    log_params = {key:log10(p_vals[key]) for key in p_vals}
+    marginal_code = 1 + len(self.dependent_variables)
+    def format_row(row):
+        nums = list()
+        for code in sorted(row):
+            if code >= marginal_code:
+                nums.append(str(code-marginal_code)+'*')
+            else:
+                nums.append(str(code))
+        return ','.join(nums)
+    for index in xrange(len(combinations)):
+        cancellation_point(executor)
+        combination = combinations[index]
+        rows, cols = np.nonzero(labels == index)
+        grids = None
+        if all([isinstance(ssystems[k], CyclicalCase) is False for k in combination]) is True:
+            log_params[x_variable] = x[cols]
+            log_params[y_variable] = y[rows]
+            grids = [ssystems[k].positive_roots_grid(log_params, log_in=True) for k in combination]
+            if any([grid is None for grid in grids]) is True:
+                grids = None
+        if grids is not None:
+            codes = np.array([count + marginal_code*marginal for (count, marginal) in grids])
+            keys[rows, cols] = stability_row_keys(codes, format_row)
+            continue
+        for (i, j) in zip(rows, cols):
+            params[x_variable] = 10**x[j]
+            params[y_variable] = 10**y[i]
             Zj = []
-            for path, system in ssystems:
-                if path.contains_point((xj, yi)):
-                    roots = system.positive_roots(params)
-                    if isinstance(roots, dict) is True:
-                        for subcase in roots:
-                            Zj.append(roots[subcase])
-                    else:
-                        Zj.append(roots)
+            for k in combination:
+                roots = ssystems[k].positive_roots(params)
+                if isinstance(roots, dict) is True:
+                    for subcase in roots:
+                        Zj.append(roots[subcase])
+                else:
+                    Zj.append(roots)
             Zj.sort()
-            nums = [num for num in Zj]
-            if len(nums) == 0:
-                continue
-            key = str(nums[0])
-            for index in xrange(1, len(nums)):
-                key += ','+str(nums[index])
-            try:
-                Z[i,j] = values[key]
-            except KeyError:
-                Z[i,j] = len(values)
-                values[key] = len(values)
+            keys[i,j] = ','.join([str(num) for num in Zj])
+    Z, values = stability_label_image(keys, labels >= 0)
     colors = dict()
     for i in values:
         colors[values[i]] = cmap(values[i]/(len(values)))
@@ -356,7 +596,15 @@ def draw_2D_slice(self, ax, p_vals, x_variable, y_variable,
                   range_x, range_y, color_dict=None,
                   intersections=[1,2,3,4,5], included_cases=None, 
                   expand_cycles=True,
-                  colorbar=True, cmap=mt.cm.gist_rainbow, **kwargs):
+                  colorbar=True, cmap=mt.cm.gist_rainbow, resolution=None,
+                  executor=None, **kwargs):
+    ''' Draws the regions of the valid cases in a 2D slice.
+
+    By default each case intersection is drawn as a polygon. If a
+    resolution is given, the regions are instead rasterized from the case
+    boundaries onto a resolution x resolution grid, which avoids the
+    vertex enumeration and intersection tests for each case.
+    '''
     pvals = dspace.VariablePool(names=self.independent_variables)
     if set(pvals.keys()) != set(p_vals.keys()):
         raise ValueError, 'Incomplete parameter set'
@@ -370,23 +618,18 @@ def draw_2D_slice(self, ax, p_vals, x_variable, y_variable,
         included_cases = [i.case_number for i in self(included_cases)]
         if self.number_of_cases < 1e5:
             valid_cases = self.valid_cases(p_bounds=p_bounds)
-            valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_nonstrict = [i for i in valid_cases if i in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
             valid_nonstrict = [i for i in valid_cases if i not in valid_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     if len(valid_cases)+len(valid_nonstrict) == 0:
         # fill black
         return
-    case_int_list = self.intersecting_cases(intersections, valid_cases+valid_nonstrict, 
-                                            p_bounds=p_bounds, strict=False)
     colors = dict()
     if color_dict is None:
         color_dict = dict()
@@ -394,11 +637,45 @@ def draw_2D_slice(self, ax, p_vals, x_variable, y_variable,
         kwargs['ec']='none'
     ## hatched_cases = self.cycles_to_subcases(hatched_cases)
     for case_num in hatched_cases:
+        cancellation_point(executor)
         case = self(case_num)
         case.draw_2D_slice(ax, p_vals, x_variable, y_variable,
                            range_x, range_y, fc='none', 
                            ec=(0.8, 0.8, 0.8, 1.), hatch='/', lw=0.5)
+    if resolution is not None:
+        x = np.linspace(log10(range_x[0]), log10(range_x[1]), resolution)
+        y = np.linspace(log10(range_y[0]), log10(range_y[1]), resolution)
+        X, Y = np.meshgrid(x, y)
+        case_numbers = valid_cases+valid_nonstrict
+        labels, combinations = self.region_labels_2D_slice(case_numbers, p_vals,
+                                                           x_variable, y_variable,
+                                                           X, Y, executor=executor)
+        drawn = [k for k in xrange(len(combinations)) if len(combinations[k]) in intersections]
+        Z = np.ma.masked_all(labels.shape)
+        fc = list()
+        for index in xrange(len(drawn)):
+            case_nums = [str(case_numbers[k]) for k in combinations[drawn[index]]]
+            for i in xrange(len(case_nums)):
+                if expand_cycles is False:
+                    case_nums[i] = case_nums[i].split('_')[0]
+                if case_nums[i] in valid_nonstrict:
+                    case_nums[i] = case_nums[i]+'*'
+            key = ', '.join(case_nums)
+            if key not in color_dict:
+                color_dict[key] = cmap((1.*index)/len(drawn))
+            Z[labels == drawn[index]] = index
+            fc.append(color_dict[key])
+            colors[key] = color_dict[key]
+        if len(fc) > 0:
+            ax.pcolormesh(X, Y, Z, cmap=mt.colors.ListedColormap(fc),
+                          vmin=-0.5, vmax=len(fc)-0.5, rasterized=True)
+        case_int_list = []
+    else:
+        case_int_list = self.intersecting_cases(intersections, valid_cases+valid_nonstrict, 
+                                                p_bounds=p_bounds, strict=False,
+                                                executor=executor)
     for case_int in case_int_list:
+        cancellation_point(executor)
         key = str(case_int)
         case_nums = key.split(', ')
         for i in xrange(len(case_nums)):
@@ -489,7 +766,7 @@ def draw_2D_slice_interactive(self, p_vals, x_variable, y_variable,
 def draw_3D_slice(self, ax, p_vals, x_variable, y_variable,z_variable, range_x,
                   range_y, range_z, color_dict=None,
                   intersections=[1,2,3,4,5], included_cases=None, 
-                  colorbar=True, cmap=mt.cm.gist_rainbow, **kwargs):
+                  colorbar=True, cmap=mt.cm.gist_rainbow, executor=None, **kwargs):
     pvals = dspace.VariablePool(names=self.independent_variables)
     if set(pvals.keys()) != set(p_vals.keys()):
         raise ValueError, 'Incomplete parameter set'
@@ -503,25 +780,24 @@ def draw_3D_slice(self, ax, p_vals, x_variable, y_variable,z_variable, range_x,
         included_cases = [i.case_number for i in self(included_cases)]
         if self.number_of_cases < 1e5:
             valid_cases = self.valid_cases(p_bounds=p_bounds)
-            valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_nonstrict = [i for i in valid_cases if i in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
             valid_nonstrict = [i for i in valid_cases if i not in valid_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     case_int_list = self.intersecting_cases(intersections, 
                                             valid_cases,
-                                            p_bounds=p_bounds)
+                                            p_bounds=p_bounds,
+                                            executor=executor)
     case_int_list = self(valid_cases)
     if color_dict is None:
         color_dict = dict()
     for case_int in case_int_list:
+        cancellation_point(executor)
         key = str(case_int)
         if key not in color_dict:
             color_dict[key] = cmap((1.*case_int_list.index(case_int))/len(case_int_list))
@@ -546,87 +822,21 @@ def draw_3D_slice(self, ax, p_vals, x_variable, y_variable,z_variable, range_x,
         self.draw_region_colorbar(c_ax, color_dict)
     return color_dict
 
-def calculate_case_2D_function(case, function, p_vals, x_variable, y_variable, 
-                        range_x, range_y, resolution, log_linear):
-    X, Y, Z, clim, patch = case.draw_2D_ss_function_data(function, 
-                                                         p_vals, x_variable, y_variable,
-                                                         range_x, range_y, 
-                                                         resolution=resolution,
-                                                         log_linear=log_linear
-                                                         )
-    return case, X, Y, Z, clim, patch
+def case_2D_ss_function_data(ds, case_number, **kwargs):
+    return ds(case_number).draw_2D_ss_function_data(**kwargs)
 
-@monkeypatch_method(dspace.models.designspace.DesignSpace)   
-def _draw_2D_ss_function_parallel(self, ax, all_cases, function, p_vals, x_variable, y_variable, 
-                        range_x, range_y, resolution=100, log_linear=False, 
-                        zlim=None, included_cases=None, colorbar=True,
-                        cmap=mt.cm.jet, surface=False, **kwargs):
-    try:
-        from joblib import Parallel, delayed, cpu_count
-    except:
-        return None
-    min_lim = 1e20
-    max_lim = -1e20
-    patches = []
-    cores = cpu_count()
-    results = Parallel(n_jobs=min(cores, len(all_cases)))(delayed(calculate_case_2D_function)(self(i), 
-                                                                      function,
-                                                                      p_vals, 
-                                                                      x_variable,
-                                                                      y_variable,
-                                                                      range_x,
-                                                                      range_y,
-                                                                      resolution,
-                                                                      log_linear)
-                                                                      for i in all_cases)
-    for i in results:
-        case, X, Y, Z, clim, path = i
-        pc = case.draw_2D_ss_function_from_data(ax, X, Y, Z, clim, path, 
-                                                cmap=cmap, 
-                                                zlim=zlim, surface=surface,
-                                                **kwargs)
-        if isinstance(pc, list) is True:
-            for apc in pc:
-                lims = apc.get_clim()
-                min_lim = min(min_lim, lims[0])
-                max_lim = max(max_lim, lims[1])
-                patches.append(apc)
-        else:
-            lims = pc.get_clim()
-            min_lim = min(min_lim, lims[0])
-            max_lim = max(max_lim, lims[1])
-            patches.append(pc)
-    if zlim is None:
-        if min_lim == max_lim:
-            delta_z = 1e-3
-            min_lim = min_lim-delta_z
-            max_lim = max_lim+delta_z
-        ndigits = -int(floor(log10(max_lim - min_lim)))
-        zlim = [round(min_lim, ndigits), round(max_lim, ndigits)]
-    if zlim[0] == zlim[1]:
-        delta_z = 1e-3
-        zlim = [zlim[0]-delta_z, zlim[1]+delta_z]
-    for pc in patches:
-        pc.set_clim(zlim)
-    ax.set_xlim([log10(min(range_x)), log10(max(range_x))])
-    ax.set_ylim([log10(min(range_y)), log10(max(range_y))])
-    if x_variable in self._latex:
-        x_variable = '$'+self._latex[x_variable]+'$'
-    if y_variable in self._latex:
-        y_variable = '$'+self._latex[y_variable]+'$'
-    ax.set_xlabel(r'$\log_{10}$(' + x_variable + ')')
-    ax.set_ylabel(r'$\log_{10}$(' + y_variable + ')')
-    if colorbar is True:
-        c_ax,kw=mt.colorbar.make_axes(ax)
-        self.draw_function_colorbar(c_ax, zlim, cmap)
-        c_ax.set_aspect(15./(zlim[1]-zlim[0]))
-    return patches
+def case_2D_dominant_eigenvalue_data(ds, case_number, **kwargs):
+    return ds(case_number).draw_2D_dominant_eigenvalue_data(**kwargs)
+
+def case_2D_eigenvalues_lattice(ds, case_number, **kwargs):
+    return ds(case_number).eigenvalues_2D_lattice(**kwargs)
             
 @monkeypatch_method(dspace.models.designspace.DesignSpace)   
 def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable, 
                         range_x, range_y, resolution=100, log_linear=False, 
                         zlim=None, included_cases=None, colorbar=True,
-                        cmap=mt.cm.jet, parallel=False, surface=False, **kwargs):                         
+                        cmap=mt.cm.jet, parallel=False, surface=False, executor=None,
+                        adaptive=False, tolerance=1e-3, exact=True, **kwargs):                         
     p_bounds = dict(p_vals)
     p_bounds[x_variable] = range_x
     p_bounds[y_variable] = range_y
@@ -639,12 +849,10 @@ def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     min_lim = 1e20
     max_lim = -1e20
     constant_vars = dict(p_vals)
@@ -654,6 +862,7 @@ def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
     ## expr = expr.subst(**constant_vars)
     all_cases = list()
     for case in valid_cases+valid_nonstrict:
+        cancellation_point(executor)
         if case in valid_nonstrict:
             vertices = self(case).vertices_2D_slice(p_vals, x_variable, y_variable,
                                                     range_x=range_x, range_y=range_y)
@@ -662,32 +871,38 @@ def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
             all_cases.append(case)
         else:
             all_cases.append(case)
-    if parallel is False:
-        patches = None
-    else:  
-        patches = self._draw_2D_ss_function_parallel(ax,
-                                                     all_cases,
-                                                     function, 
-                                                     p_vals,
-                                                     x_variable, 
-                                                     y_variable,
-                                                     range_x,
-                                                     range_y,
-                                                     resolution=resolution,
-                                                     log_linear=log_linear,
-                                                     zlim=zlim,
-                                                     included_cases=included_cases,
-                                                     colorbar=colorbar,
-                                                     cmap=cmap, surface=surface,
-                                                     **kwargs)
-    if patches is not None:
-        return patches  
+    if parallel is True and executor is None:
+        executor = 'process'
+    executor = get_executor(executor)
+    cases = self(all_cases)
+    sampled = [all_cases[i] for i in xrange(len(all_cases)) if isinstance(cases[i], CyclicalCase) is False]
+    data = executor.map(case_2D_ss_function_data, self, sampled,
+                        function=str(expr),
+                        p_vals=p_vals,
+                        x_variable=x_variable,
+                        y_variable=y_variable,
+                        range_x=range_x,
+                        range_y=range_y,
+                        resolution=resolution,
+                        log_linear=log_linear,
+                        adaptive=adaptive,
+                        tolerance=tolerance,
+                        exact=exact)
+    data = dict(zip(sampled, data))
+    cmap.set_bad((0., 0., 0., 0.))
     patches = list()
-    for case in all_cases:
-        pc = self(case).draw_2D_ss_function(ax, expr, p_vals, x_variable, y_variable,
-                                            range_x, range_y, resolution=resolution,
-                                            log_linear=log_linear, cmap=cmap, 
-                                            surface=surface, **kwargs)
+    for i in xrange(len(all_cases)):
+        cancellation_point(executor)
+        if all_cases[i] in data:
+            X, Y, Z, clim, path = data[all_cases[i]]
+            pc = cases[i].draw_2D_ss_function_from_data(ax, X, Y, Z, clim, path,
+                                                        cmap=cmap, surface=surface,
+                                                        **kwargs)
+        else:
+            pc = cases[i].draw_2D_ss_function(ax, expr, p_vals, x_variable, y_variable,
+                                              range_x, range_y, resolution=resolution,
+                                              log_linear=log_linear, cmap=cmap, 
+                                              surface=surface, **kwargs)
         if isinstance(pc, list) is True:
             for apc in pc:
                 lims = apc.get_clim()
@@ -729,7 +944,8 @@ def draw_2D_ss_function(self, ax, function, p_vals, x_variable, y_variable,
 def draw_2D_dominant_eigenvalues(self, ax, p_vals, x_variable, y_variable, 
                                  range_x, range_y, resolution=100, component='real', 
                                  zlim=None, included_cases=None, colorbar=True,
-                                 cmap=mt.cm.jet, parallel=False, cmp=None, **kwargs):                         
+                                 cmap=mt.cm.jet, parallel=False, cmp=None, rank=None,
+                                 executor=None, **kwargs):                         
     p_bounds = dict(p_vals)
     p_bounds[x_variable] = range_x
     p_bounds[y_variable] = range_y
@@ -742,16 +958,15 @@ def draw_2D_dominant_eigenvalues(self, ax, p_vals, x_variable, y_variable,
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     min_lim = 1e20
     max_lim = -1e20
     all_cases = list()
     for case in valid_cases+valid_nonstrict:
+        cancellation_point(executor)
         if case in valid_nonstrict:
             vertices = self(case).vertices_2D_slice(p_vals, x_variable, y_variable,
                                                     range_x=range_x, range_y=range_y)
@@ -760,35 +975,37 @@ def draw_2D_dominant_eigenvalues(self, ax, p_vals, x_variable, y_variable,
             all_cases.append(case)
         else:
             all_cases.append(case)
-    if parallel is False:
-        patches = None
-    else:  
-        patches = None
-        ## self._draw_2D_ss_function_parallel(ax,
-        ##                                              all_cases,
-        ##                                              function, 
-        ##                                              p_vals,
-        ##                                              x_variable, 
-        ##                                              y_variable,
-        ##                                              range_x,
-        ##                                              range_y,
-        ##                                              resolution=resolution,
-        ##                                              log_linear=log_linear,
-        ##                                              zlim=zlim,
-        ##                                              included_cases=included_cases,
-        ##                                              colorbar=colorbar,
-        ##                                              cmap=cmap, **kwargs)
-    if patches is not None:
-        return patches  
+    if parallel is True and executor is None:
+        executor = 'process'
+    executor = get_executor(executor)
+    if cmp is None:
+        data = executor.map(case_2D_dominant_eigenvalue_data, self, all_cases,
+                            p_vals=p_vals,
+                            x_variable=x_variable,
+                            y_variable=y_variable,
+                            range_x=range_x,
+                            range_y=range_y,
+                            resolution=resolution,
+                            component=component,
+                            rank=rank)
+    else:
+        ## cmp can be any callable, which may not be sent to worker processes,
+        ## so it is applied here to the eigenvalues computed by the executor.
+        data = executor.map(case_2D_eigenvalues_lattice, self, all_cases,
+                            p_vals=p_vals,
+                            x_variable=x_variable,
+                            y_variable=y_variable,
+                            range_x=range_x,
+                            range_y=range_y,
+                            resolution=resolution)
+        data = [dominant_eigenvalue_lattice_data(*i, cmp=cmp) for i in data]
+    cmap.set_bad((0., 0., 0., 0.))
     patches = list()
-    for case in all_cases:
-        pc = self(case).draw_2D_dominant_eigenvalue(ax, p_vals, 
-                                                    x_variable, y_variable,
-                                                    range_x, range_y,
-                                                    resolution=resolution,
-                                                    component=component,
-                                                    cmap=cmap, cmp=cmp,
-                                                    **kwargs)
+    for i in xrange(len(all_cases)):
+        cancellation_point(executor)
+        X, Y, Z, clim, path = data[i]
+        pc = self(all_cases[i]).draw_2D_ss_function_from_data(ax, X, Y, Z, clim, path,
+                                                              cmap=cmap, **kwargs)
         if isinstance(pc, list) is True:
             for apc in pc:
                 lims = apc.get_clim()
@@ -829,7 +1046,7 @@ def draw_2D_dominant_eigenvalues(self, ax, p_vals, x_variable, y_variable,
 @monkeypatch_method(dspace.models.designspace.DesignSpace)
 def draw_1D_slice(self, ax, p_vals, slice_variable, range_slice, color_dict=None,
                   intersections=[1,2,3,4,5], colorbar=True, cmap=mt.cm.gist_rainbow,
-                  included_cases = None, **kwargs):
+                  included_cases = None, executor=None, **kwargs):
     
     p_bounds = dict(p_vals)
     p_bounds[slice_variable] = range_slice
@@ -838,27 +1055,26 @@ def draw_1D_slice(self, ax, p_vals, slice_variable, range_slice, color_dict=None
         included_cases = [i.case_number for i in self(included_cases)]
         if self.number_of_cases < 1e5:
             valid_cases = self.valid_cases(p_bounds=p_bounds)
-            valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_nonstrict = [i for i in valid_cases if i in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
             valid_nonstrict = [i for i in valid_cases if i not in valid_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     if len(valid_cases)+len(valid_nonstrict) == 0:
         # fill black
         return
     case_int_list = self.intersecting_cases(intersections, valid_cases+valid_nonstrict, 
-                                            p_bounds=p_bounds, strict=False)
+                                            p_bounds=p_bounds, strict=False,
+                                            executor=executor)
     if color_dict is None:
         color_dict = dict()
         
     for case_int in case_int_list:
+        cancellation_point(executor)
         key = str(case_int)
         if key not in color_dict:
             color_dict[key] = cmap((1.*case_int_list.index(case_int))/len(case_int_list))
@@ -878,25 +1094,23 @@ def draw_1D_slice(self, ax, p_vals, slice_variable, range_slice, color_dict=None
 @monkeypatch_method(dspace.models.designspace.DesignSpace)
 def draw_1D_ss_function(self, ax, function, p_vals, 
                         slice_variable, range_slice, 
-                        resolution=100, colors=None, included_cases=None, ylim = None, **kwargs):
+                        resolution=100, colors=None, included_cases=None, ylim = None,
+                        executor=None, **kwargs):
     p_bounds = dict(p_vals)
     p_bounds[slice_variable] = range_slice
     if included_cases is not None:
         included_cases = [i.case_number for i in self(included_cases)]
         if self.number_of_cases < 1e5:
             valid_cases = self.valid_cases(p_bounds=p_bounds)
-            valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
             hatched_cases = [i for i in valid_cases if i not in included_cases]
             valid_nonstrict = [i for i in valid_cases if i in included_cases]
             valid_cases = [i for i in valid_cases if i in included_cases]
             valid_nonstrict = [i for i in valid_cases if i not in valid_cases]
         else:
-            valid_cases = [i for i in included_cases if self(i).is_valid(p_bounds=p_bounds)]
+            valid_cases = self.filter_valid_cases(included_cases, p_bounds)
             valid_nonstrict = []
     else:
-        valid_cases = self.valid_cases(p_bounds=p_bounds)
-        valid_nonstrict = self.valid_cases(p_bounds=p_bounds, strict=False)
-        valid_nonstrict = [i for i in valid_nonstrict if i not in valid_cases]
+        valid_cases, valid_nonstrict = self.strict_and_nonstrict_valid_cases(p_bounds=p_bounds)
     if len(valid_cases)+len(valid_nonstrict) == 0:
         # fill black
         return
@@ -906,6 +1120,7 @@ def draw_1D_ss_function(self, ax, function, p_vals,
     if 'color' not in kwargs:
         kwargs['color'] = 'k'
     for case in valid_cases:
+        cancellation_point(executor)
         if colors is not None:
             if case in colors:
                 kwargs['color'] = colors[case]
@@ -946,9 +1161,10 @@ def draw_1D_ss_function(self, ax, function, p_vals,
 @monkeypatch_method(dspace.models.designspace.DesignSpace) 
 def draw_1D_positive_roots(self, ax, function, p_vals, slice_variable, 
                            range_slice, resolution=100, ylim=None,
-                           line_dict=None, **kwargs):
+                           line_dict=None, executor=None, **kwargs):
     lines = self.line_1D_positive_roots(function, p_vals, slice_variable,
-                                        range_slice, resolution=int(resolution))
+                                        range_slice, resolution=int(resolution),
+                                        executor=executor)
     line_styles = ['-', '--', '..']
     colors = ['k', 'r', 'y']
     unique_R = {i[2] for i in lines}
@@ -0,0 +1,219 @@
+''' Instrumentation of the calls to the design space toolbox C library.
+
+The profile context manager replaces the functions of the SWIG interface,
+in every dspace module that imported them, with wrappers that count the
+calls to each function, the time spent in it and an estimate of the bytes of
+Python data marshalled to and from C. The original functions are restored
+when the last active profile ends, so the instrumentation has no overhead
+when no profile is active. A profile only records the calls made by the
+thread that entered it, so the calls of background tasks and of the worker
+threads of a thread executor are not recorded, and neither are the calls
+made by worker processes of a process executor.
+
+    >>> with dspace.profile() as p:
+    ...     ds.draw_2D_slice(ax, pvals, 'X3', 'X4', [1e-3, 1e3], [1e-3, 1e3])
+    >>> print p.report()
+
+'''
+
+import sys
+import threading
+import timeit
+import types
+
+import dspace.SWIG.dspace_interface as dspace_interface
+
+_lock = threading.RLock()
+_active_profiles = []
+_thread_state = threading.local()
+_patched = []
+
+
+def marshalled_size(value):
+    ''' Estimates the number of bytes of a Python value that is converted
+        by the SWIG interface. SWIG pointers are counted as the size of a
+        pointer.
+    '''
+    if value is None:
+        return 0
+    if isinstance(value, (str, unicode)) is True:
+        return len(value)
+    if isinstance(value, (bool, int, long, float)) is True:
+        return 8
+    if isinstance(value, (list, tuple)) is True:
+        return sum([marshalled_size(i) for i in value])
+    if isinstance(value, dict) is True:
+        return sum([marshalled_size(i) + marshalled_size(value[i]) for i in value])
+    return 8
+
+
+class Profile(object):
+
+    def __init__(self, functions=None):
+        ''' Initializes a profile of the SWIG functions with the given
+            names, or of every function of the interface if functions is
+            None.
+        '''
+        if functions is not None:
+            functions = set(functions)
+        setattr(self, 'functions', functions)
+        setattr(self, 'stats', dict())
+        setattr(self, 'time', 0.)
+        setattr(self, '_start', None)
+        setattr(self, '_profiles', [])
+
+    def __enter__(self):
+        self._start = timeit.default_timer()
+        _activate(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _deactivate(self)
+        self.time += timeit.default_timer() - self._start
+        self._start = None
+        return False
+
+    def record(self, name, elapsed, size):
+        if self.functions is not None and name not in self.functions:
+            return
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = [0, 0., 0]
+            self.stats[name] = stats
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += size
+
+    def clear(self):
+        self.stats.clear()
+        self.time = 0.
+
+    @property
+    def total_time(self):
+        ''' The total time spent in the C library during the profile. '''
+        return sum([stats[1] for stats in self.stats.itervalues()])
+
+    def as_dict(self):
+        ''' Returns a dictionary with the number of calls, the cumulative
+            time in seconds and the bytes marshalled for each function.
+        '''
+        return {name:dict(calls=stats[0], time=stats[1], bytes=stats[2])
+                for name, stats in self.stats.iteritems()}
+
+    def report(self, sort='time', limit=None):
+        ''' Returns a table of the profiled functions sorted by 'time',
+            'calls' or 'bytes', with at most limit rows.
+        '''
+        columns = dict(calls=0, time=1, bytes=2)
+        if sort not in columns:
+            raise ValueError, 'sort must be "time", "calls" or "bytes"'
+        names = sorted(self.stats.keys(),
+                       key=lambda name: self.stats[name][columns[sort]],
+                       reverse=True)
+        if limit is not None:
+            names = names[:limit]
+        width = max([len(name) for name in names] + [8])
+        lines = ['{0:<{1}}  {2:>10}  {3:>12}  {4:>12}  {5:>7}'.format('Function', width,
+                                                                      'Calls', 'Time (s)',
+                                                                      'Bytes', '% Time')]
+        total = self.time
+        if self._start is not None:
+            total += timeit.default_timer() - self._start
+        for name in names:
+            calls, elapsed, size = self.stats[name]
+            fraction = 100.*elapsed/total if total > 0 else 0.
+            lines.append('{0:<{1}}  {2:>10d}  {3:>12.6f}  {4:>12d}  {5:>7.2f}'.format(name, width,
+                                                                                     calls, elapsed,
+                                                                                     size, fraction))
+        lines.append('C library time: {0:.6f} s of {1:.6f} s'.format(self.total_time, total))
+        return '\n'.join(lines)
+
+
+def _thread_profiles():
+    ''' The active profiles that were entered by the current thread. '''
+    profiles = getattr(_thread_state, 'profiles', None)
+    if profiles is None:
+        profiles = []
+        _thread_state.profiles = profiles
+    return profiles
+
+def _wrap(name, function):
+    def instrumented(*args):
+        profiles = getattr(_thread_state, 'profiles', None)
+        if profiles is None or len(profiles) == 0:
+            return function(*args)
+        start = timeit.default_timer()
+        try:
+            result = function(*args)
+        finally:
+            elapsed = timeit.default_timer() - start
+        size = marshalled_size(args) + marshalled_size(result)
+        for profile in tuple(profiles):
+            profile.record(name, elapsed, size)
+        return result
+    instrumented.__name__ = name
+    instrumented.__doc__ = function.__doc__
+    instrumented._original = function
+    return instrumented
+
+def _interface_functions():
+    functions = dict()
+    for name, value in vars(dspace_interface).iteritems():
+        if name.startswith('DS') is False or callable(value) is False:
+            continue
+        if isinstance(value, (type, types.ClassType)) is True:
+            continue
+        functions[name] = value
+    return functions
+
+def _patch():
+    functions = _interface_functions()
+    wrappers = dict()
+    by_identity = dict()
+    for name, function in functions.iteritems():
+        wrappers[name] = _wrap(name, function)
+        by_identity[id(function)] = name
+    modules = [module for name, module in sys.modules.items()
+               if module is not None and (name == 'dspace' or name.startswith('dspace.'))]
+    for module in modules:
+        namespace = vars(module)
+        for attribute, value in namespace.items():
+            name = by_identity.get(id(value))
+            if name is None or functions[name] is not value:
+                continue
+            namespace[attribute] = wrappers[name]
+            _patched.append((namespace, attribute, value))
+
+def _unpatch():
+    while len(_patched) > 0:
+        namespace, attribute, value = _patched.pop()
+        if getattr(namespace.get(attribute), '_original', None) is value:
+            namespace[attribute] = value
+
+def _activate(profile):
+    with _lock:
+        if len(_active_profiles) == 0:
+            _patch()
+        _active_profiles.append(profile)
+        profile._profiles = _thread_profiles()
+        profile._profiles.append(profile)
+
+def _deactivate(profile):
+    with _lock:
+        if profile in _active_profiles:
+            _active_profiles.remove(profile)
+        if profile in profile._profiles:
+            profile._profiles.remove(profile)
+        if len(_active_profiles) == 0:
+            _unpatch()
+
+def profile(functions=None):
+    ''' Returns a context manager that profiles the calls to the C library
+        made by the current thread while it is active, and that is the
+        Profile object with the results.
+
+    Kwargs:
+        functions (list): The names of the SWIG functions to report. All
+            functions are reported by default.
+    '''
+    return Profile(functions=functions)
@@ -6,6 +6,8 @@
 
 from collections import OrderedDict
 
+import numpy as np
+
 ##
 # Required C api functionality.
 ##
@@ -17,7 +19,8 @@ SWIG_REQUIREMENTS = ['DSVariablePoolSetReadWriteAdd',
                      'DSVariablePoolSetValueForVariableWithName',
                      'DSVariablePoolAddVariableWithName',
                      'DSVariablePoolHasVariableWithName',
-                     'DSVariablePoolIndexOfVariableWithName'
+                     'DSVariablePoolIndexOfVariableWithName',
+                     'DSVariablePoolValuesAsVector'
                      ]
 
 module = __import__('dspace.SWIG.dspace_interface', fromlist=SWIG_REQUIREMENTS)
@@ -25,13 +28,17 @@ module = __import__('dspace.SWIG.dspace_interface', fromlist=SWIG_REQUIREMENTS)
 for function in SWIG_REQUIREMENTS:
     globals()[function] = getattr(module,function)
 
-class VariablePool(dict):
+from dspace.handles import SwigObject
+
+class VariablePool(dict, SwigObject):
     ''' A python class that serves as a wrapper to the DSVariablePool object
         in the designspace C library. The Variable Pool object is a subclass of
         dict and is used to reference dependent and independent variables, as 
         well as system parameters. The dict object is ordered by the internal
         C data structure.
     '''
+
+    _swig_type = 'DSVariablePool'
     
     def __init__(self, names=None, **kwargs):
         ''' Init method only accepts a list of names. A dictionary cannot be used
@@ -54,20 +61,14 @@ class VariablePool(dict):
             self[key] = value
     
     def set_swigwrapper(self, swigwrapper):
+        ''' Sets the wrapped C variable pool, which is freed with the object
+            unless swigwrapper is a borrowed handle.'''
         self._swigwrapper = swigwrapper
         if self._swigwrapper is None:
             return
-        for i in xrange(0, DSVariablePoolNumberOfVariables(swigwrapper)):
-                variable = DSVariablePoolVariableAtIndex(swigwrapper, i)
+        for i in xrange(0, DSVariablePoolNumberOfVariables(self._swigwrapper)):
+                variable = DSVariablePoolVariableAtIndex(self._swigwrapper, i)
                 self[variable[0]] = variable[1]
-
-    def __del__(self):
-        ''' Method to destroy a VariablePool object. The wrapped C construct must be
-            freed to avoid memory leaks.'''
-        if self._swigwrapper is None:
-            return
-        DSVariablePoolSetReadWriteAdd(self._swigwrapper)
-        DSVariablePoolFree(self._swigwrapper)
         
     def __setattr__(self, name, value):
         ''' Restricts the attribute modification. The VariablePool can only have a
@@ -84,6 +85,13 @@ class VariablePool(dict):
             self[key] = value
         
     def __setitem__(self, name, value):
+        if dict.__contains__(self, name) is True and self._swigwrapper is not None:
+            value = float(value)
+            DSVariablePoolSetValueForVariableWithName(self._swigwrapper,
+                                                      name,
+                                                      value)
+            dict.__setitem__(self, name, value)
+            return
         if hasattr(self, '_swigwrapper') is False:
             setattr(self, '_swigwrapper', None)
         if hasattr(self, '_keys') is False:
@@ -120,4 +128,25 @@ class VariablePool(dict):
 
     def index(self, name):
         return self.keys().index(name)
-        
\ No newline at end of file
+
+    def set_values(self, values):
+        ''' Sets the values of all the variables from a sequence or array
+            of values in the order of the keys.
+        '''
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) != len(self._keys):
+            raise ValueError, 'Number of values does not match the number of variables'
+        values = values.tolist()
+        swigwrapper = self._swigwrapper
+        for (name, value) in zip(self._keys, values):
+            DSVariablePoolSetValueForVariableWithName(swigwrapper, name, value)
+        dict.update(self, zip(self._keys, values))
+
+    def values_as_array(self):
+        ''' Returns the values of the variables as an array in the order of
+            the keys.
+        '''
+        if self._swigwrapper is None:
+            return np.zeros(0)
+        return np.array(DSVariablePoolValuesAsVector(self._swigwrapper, False), dtype=float).ravel()
+
@@ -28,4 +28,5 @@ setup(name = 'dspace',
                 'dspace.graphs',
                 'dspace.display', 
                 'dspace.display.UI',
-                'dspace.examples'])
+                'dspace.examples',
+                'dspace.benchmarks'])
@@ -0,0 +1,59 @@
+''' Adaptive sampling of a steady-state function stays close to the full
+    lattice relative to the range of the function, whatever its magnitude.
+'''
+
+import unittest
+
+import numpy as np
+
+import dspace
+import dspace.plotutils
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+PARAMETERS = {'a1':0.1, 'a2':1e-2, 'X3':1, 'b1':0.45, 'b2':0.45}
+
+
+class AdaptiveSamplingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.pvals = dspace.VariablePool(names=self.ds.independent_variables)
+        self.pvals.update(PARAMETERS)
+        self.range_x = [1e-4, 1e4]
+        self.range_y = [1e-4, 1e4]
+        p_bounds = dict(self.pvals)
+        p_bounds['X3'] = self.range_x
+        p_bounds['a2'] = self.range_y
+        self.cases = [self.ds(i) for i in self.ds.valid_cases(p_bounds=p_bounds)]
+
+    def compare(self, function, tolerance):
+        for case in self.cases:
+            sampled = case.draw_2D_ss_function_data(function, self.pvals, 'X3', 'a2',
+                                                    self.range_x, self.range_y,
+                                                    resolution=50)
+            adaptive = case.draw_2D_ss_function_data(function, self.pvals, 'X3', 'a2',
+                                                     self.range_x, self.range_y,
+                                                     resolution=50, adaptive=True,
+                                                     tolerance=tolerance)
+            Z = sampled[2]
+            self.assertTrue(np.array_equal(Z.mask, adaptive[2].mask))
+            if Z.count() == 0:
+                continue
+            error = np.abs(adaptive[2] - Z).max()
+            self.assertTrue(error <= 10*tolerance*np.ptp(Z.compressed()) + 1e-12,
+                            function + ' in case ' + case.case_number)
+
+    def test_log_function(self):
+        self.compare('log(X1)', 1e-3)
+
+    def test_large_function(self):
+        self.compare('1e4*X2', 1e-3)
+
+    def test_small_function(self):
+        self.compare('1e-6*X1', 1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+''' An analysis saved with save_analysis is restored by load_analysis. '''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import dspace
+from dspace.archive import FORMAT_VERSION, is_archive
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+PARAMETERS = {'a1':0.1, 'a2':1e-2, 'X3':1, 'b1':0.45, 'b2':0.45}
+
+
+class SavedAnalysisTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'analysis.dsa')
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS), name='example')
+        self.pvals = dspace.VariablePool(names=self.ds.independent_variables)
+        self.pvals.update(PARAMETERS)
+        self.valid_cases = self.ds.valid_cases()
+        self.case = self.ds(self.valid_cases[0])
+        self.figures = [('PNG image data', 'Title', 'Caption', self.pvals)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def save(self, path=None, **kwargs):
+        dspace.save_analysis(path or self.path,
+                             design_space=kwargs.pop('design_space', self.ds),
+                             parameter_sets={'pvals':self.pvals},
+                             figures=kwargs.pop('figures', self.figures),
+                             tables=['<table></table>'],
+                             settings={'name':'example'},
+                             **kwargs)
+
+    def test_round_trip(self):
+        self.save()
+        self.assertTrue(is_archive(self.path))
+        analysis = dspace.load_analysis(self.path)
+        try:
+            self.assertEqual(analysis.version, FORMAT_VERSION)
+            ds = analysis.design_space
+            self.assertEqual(ds.number_of_cases, self.ds.number_of_cases)
+            self.assertEqual(ds.valid_cases(), self.valid_cases)
+            self.assertTrue(str(self.case.case_number) in analysis.case_numbers)
+            case = analysis.case(self.case.case_number)
+            self.assertEqual(case.signature, self.case.signature)
+            self.assertEqual(dict(analysis.parameter_sets['pvals']), dict(self.pvals))
+            image, title, caption, pvals = analysis.figures[0]
+            self.assertEqual(image.load(), 'PNG image data')
+            self.assertEqual((title, caption), ('Title', 'Caption'))
+            self.assertEqual(dict(pvals), dict(self.pvals))
+            self.assertEqual(analysis.tables, ['<table></table>'])
+            self.assertEqual(analysis.settings, {'name':'example'})
+        finally:
+            analysis.close()
+
+    def test_save_over_source(self):
+        self.save()
+        analysis = dspace.load_analysis(self.path)
+        try:
+            figures = analysis.figures + [('Second image', 'Second', '', None)]
+            self.save(design_space=analysis.design_space, figures=figures, source=analysis)
+            self.assertEqual(figures[0][0].load(), 'PNG image data')
+            self.assertEqual([figure[0].load() for figure in analysis.figures],
+                             ['PNG image data', 'Second image'])
+            self.assertTrue(str(self.case.case_number) in analysis.case_numbers)
+        finally:
+            analysis.close()
+        analysis = dspace.load_analysis(self.path)
+        try:
+            self.assertEqual(len(analysis.figures), 2)
+            self.assertEqual(analysis.design_space.valid_cases(), self.valid_cases)
+        finally:
+            analysis.close()
+
+    def test_saved_and_calculated_cases(self):
+        self.save()
+        analysis = dspace.load_analysis(self.path)
+        try:
+            key = (str(self.case.case_number), None)
+            self.assertTrue(key in analysis._case_sections)
+            ds = analysis.design_space
+            case = analysis.case(self.case.case_number)
+            self.assertTrue(ds._case_cache.get(key) is case)
+            other = [str(i) for i in xrange(1, ds.number_of_cases+1)
+                     if (str(i), None) not in analysis._case_sections][0]
+            self.assertEqual(str(analysis.case(other).case_number), other)
+        finally:
+            analysis.close()
+
+    def test_not_an_archive(self):
+        f = open(self.path, 'wb')
+        f.write('not an archive')
+        f.close()
+        self.assertFalse(is_archive(self.path))
+        self.assertRaises(ValueError, dspace.load_analysis, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+''' Background tasks complete only the latest request with a name, and the
+    analyses they run stop when their request is cancelled.
+'''
+
+import threading
+import unittest
+
+from dspace.display.background import BackgroundTasks, CancellableExecutor
+from dspace.display.background import CancellationToken, TaskCancelled
+from dspace.executors import ProcessExecutor
+
+
+class Model(object):
+
+    def __init__(self, offset):
+        self.offset = offset
+
+
+def add_offset(model, item, scale=1):
+    return scale*item + model.offset
+
+def wait_forever(model, item):
+    import time
+    time.sleep(60)
+
+
+class Dispatcher(object):
+    ''' Keeps the callbacks of the tasks, which are then called as the event
+        loop of the kernel would.
+    '''
+
+    def __init__(self):
+        self.callbacks = []
+
+    def __call__(self, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class BackgroundTasksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatcher = Dispatcher()
+        self.tasks = BackgroundTasks(dispatch=self.dispatcher)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.results = []
+        self.errors = []
+
+    def tearDown(self):
+        self.release.set()
+        self.tasks.cancel()
+
+    def blocking(self, token, value):
+        self.started.set()
+        self.release.wait(10)
+        token.check()
+        return value
+
+    def returning(self, token, value):
+        return value
+
+    def failing(self, token, value):
+        raise ValueError, value
+
+    def submit(self, function, value, name='task'):
+        return self.tasks.submit(name, function, args=(value,),
+                                 done=self.results.append,
+                                 failed=self.errors.append)
+
+    def wait(self):
+        self.tasks._queue.join()
+        self.dispatcher.run()
+
+    def test_latest_wins(self):
+        first = self.submit(self.blocking, 1)
+        self.assertTrue(self.started.wait(10))
+        second = self.submit(self.returning, 2)
+        third = self.submit(self.returning, 3)
+        self.assertTrue(first.cancelled)
+        self.assertTrue(second.cancelled)
+        self.assertFalse(third.cancelled)
+        self.release.set()
+        self.wait()
+        self.assertEqual(self.results, [3])
+        self.assertFalse(self.tasks.is_running('task'))
+
+    def test_names_are_independent(self):
+        self.submit(self.returning, 1, name='plot')
+        self.submit(self.returning, 2, name='table')
+        self.wait()
+        self.assertEqual(sorted(self.results), [1, 2])
+
+    def test_cancel(self):
+        token = self.submit(self.blocking, 1)
+        self.assertTrue(self.started.wait(10))
+        self.assertTrue(self.tasks.is_running('task'))
+        self.tasks.cancel('task')
+        self.assertTrue(token.cancelled)
+        self.assertFalse(self.tasks.is_running('task'))
+        self.release.set()
+        self.wait()
+        self.assertEqual(self.results, [])
+        self.assertEqual(self.errors, [])
+
+    def test_callbacks_are_dispatched(self):
+        self.submit(self.returning, 1)
+        self.submit(self.failing, 'error', name='other')
+        self.tasks._queue.join()
+        self.assertEqual(self.results, [])
+        self.assertEqual(self.errors, [])
+        self.dispatcher.run()
+        self.assertEqual(self.results, [1])
+        self.assertEqual([str(e) for e in self.errors], ['error'])
+
+    def test_cancelled_before_dispatch(self):
+        token = self.submit(self.returning, 1)
+        self.tasks._queue.join()
+        token.cancel()
+        self.dispatcher.run()
+        self.assertEqual(self.results, [])
+
+    def test_progress(self):
+        reports = []
+        def reporting(token):
+            token.report(0.5, 'half')
+            return None
+        self.tasks.submit('task', reporting,
+                          progress=lambda fraction, message: reports.append((fraction, message)))
+        self.wait()
+        self.assertEqual(reports, [(0.5, 'half')])
+
+    def test_partial_results(self):
+        parts = []
+        def publishing(token):
+            for i in xrange(3):
+                token.publish(i)
+            return 3
+        self.tasks.submit('task', publishing, partial=parts.append,
+                          done=self.results.append)
+        self.tasks._queue.join()
+        self.assertEqual(parts, [])
+        self.dispatcher.run()
+        self.assertEqual(parts, [0, 1, 2])
+        self.assertEqual(self.results, [3])
+
+    def test_disabled(self):
+        tasks = BackgroundTasks(enabled=False, dispatch=self.dispatcher)
+        tasks.submit('task', self.returning, args=(1,), done=self.results.append)
+        self.assertEqual(self.results, [1])
+        self.assertEqual(self.dispatcher.callbacks, [])
+
+
+class CancellableExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model(10)
+        self.items = range(25)
+
+    def test_map(self):
+        token = CancellationToken('task')
+        executor = CancellableExecutor(token, chunk_size=4)
+        self.assertEqual(executor.map(add_offset, self.model, self.items, scale=2),
+                         [2*i + 10 for i in self.items])
+
+    def test_cancelled_between_chunks(self):
+        token = CancellationToken('task')
+        calls = []
+        def cancel_after(model, item):
+            calls.append(item)
+            if len(calls) == 6:
+                token.cancel()
+            return item
+        executor = CancellableExecutor(token, chunk_size=4)
+        self.assertRaises(TaskCancelled, executor.map, cancel_after, self.model, self.items)
+        self.assertEqual(calls, range(6))
+
+    def test_cancelled_process_executor(self):
+        token = CancellationToken('task')
+        processes = ProcessExecutor(processes=2)
+        executor = CancellableExecutor(token, processes)
+        self.assertEqual(executor.chunk_size, 8)
+        timer = threading.Timer(0.5, token.cancel)
+        timer.start()
+        try:
+            self.assertRaises(TaskCancelled, executor.map, wait_forever,
+                              self.model, range(4))
+        finally:
+            timer.cancel()
+            processes._pool.terminate()
+            processes._pool = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+''' Benchmark results are compared with a baseline only for the models and
+    benchmarks that were requested.
+'''
+
+import unittest
+
+from dspace.benchmarks.suite import compare_results, _current_rss
+
+
+def result(model, benchmark, time=None, error=None):
+    if error is not None:
+        return dict(model=model, benchmark=benchmark, error=error)
+    return dict(model=model, benchmark=benchmark, min=time)
+
+def results(entries, models=None, benchmarks=None):
+    return dict(metadata=dict(models=models, benchmarks=benchmarks), results=entries)
+
+
+class CompareResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = results([result('example_1', 'valid_cases', 0.1),
+                                 result('example_1', 'draw_2D_slice', 0.5),
+                                 result('chain_4', 'valid_cases', 0.2),
+                                 result('chain_4', 'draw_2D_slice', 1e-4)])
+
+    def reasons(self, regressions):
+        return sorted((r['model'], r['benchmark'], r['reason']) for r in regressions)
+
+    def test_no_regressions(self):
+        current = results([result('example_1', 'valid_cases', 0.11),
+                           result('example_1', 'draw_2D_slice', 0.4),
+                           result('chain_4', 'valid_cases', 0.2),
+                           result('chain_4', 'draw_2D_slice', 1e-3)])
+        self.assertEqual(compare_results(current, self.baseline), [])
+
+    def test_slower_and_failed(self):
+        current = results([result('example_1', 'valid_cases', 0.2),
+                           result('example_1', 'draw_2D_slice', error='ValueError: x'),
+                           result('chain_4', 'valid_cases', 0.2),
+                           result('chain_4', 'draw_2D_slice', 1e-3)])
+        regressions = compare_results(current, self.baseline)
+        self.assertEqual(self.reasons(regressions),
+                         [('example_1', 'draw_2D_slice', 'error'),
+                          ('example_1', 'valid_cases', 'slower')])
+        slower = [r for r in regressions if r['reason'] == 'slower'][0]
+        self.assertAlmostEqual(slower['ratio'], 2.)
+        self.assertEqual(compare_results(current, self.baseline, tolerance=1.5),
+                         [r for r in regressions if r['reason'] == 'error'])
+
+    def test_missing_from_every_model(self):
+        current = results([result('example_1', 'valid_cases', 0.1)])
+        self.assertEqual(self.reasons(compare_results(current, self.baseline)),
+                         [('chain_4', 'draw_2D_slice', 'missing'),
+                          ('chain_4', 'valid_cases', 'missing'),
+                          ('example_1', 'draw_2D_slice', 'missing')])
+
+    def test_missing_from_requested_models(self):
+        current = results([result('example_1', 'valid_cases', 0.1)],
+                          models=['example_1'])
+        self.assertEqual(self.reasons(compare_results(current, self.baseline)),
+                         [('example_1', 'draw_2D_slice', 'missing')])
+
+    def test_missing_from_requested_benchmarks(self):
+        current = results([result('example_1', 'valid_cases', 0.1)],
+                          models=['example_1'], benchmarks=['valid_cases'])
+        self.assertEqual(compare_results(current, self.baseline), [])
+        current = results([result('example_1', 'valid_cases', 0.1)],
+                          benchmarks=['valid_cases'])
+        self.assertEqual(self.reasons(compare_results(current, self.baseline)),
+                         [('chain_4', 'valid_cases', 'missing')])
+
+    def test_selection_argument(self):
+        current = dict(results=[result('example_1', 'valid_cases', 0.1)])
+        self.assertEqual(compare_results(current, self.baseline,
+                                         models=['example_1'],
+                                         benchmarks=['valid_cases']), [])
+
+    def test_current_rss(self):
+        rss = _current_rss()
+        if rss is None:
+            return
+        data = [0.]*1000000
+        self.assertTrue(_current_rss() - rss > 4000)
+        del data
+
+
+if __name__ == '__main__':
+    unittest.main()
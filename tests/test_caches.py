@@ -0,0 +1,79 @@
+''' The valid case queries of a design space are cached in bounded least
+    recently used caches.
+'''
+
+import unittest
+
+import dspace
+from dspace.caches import _LRUCache
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = _LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual([key for key, value in cache.items()], ['a', 'c'])
+
+    def test_counts_hits_and_misses(self):
+        cache = _LRUCache(4)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual(cache.info(), dict(hits=1, misses=1, size=1, max_size=4))
+        cache.clear()
+        self.assertEqual(cache.info(), dict(hits=0, misses=0, size=0, max_size=4))
+
+    def test_resize(self):
+        cache = _LRUCache(3)
+        for key in 'abc':
+            cache.put(key, key)
+        cache.resize(1)
+        self.assertEqual(cache.items(), [('c', 'c')])
+        cache.resize(0)
+        cache.put('d', 'd')
+        self.assertEqual(len(cache), 0)
+        self.assertRaises(ValueError, cache.resize, -1)
+
+
+class ValidCasesCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.p_bounds = {'a1':0.1, 'a2':[1e-3, 1e3], 'X3':[1e-3, 1e3],
+                         'b1':0.45, 'b2':0.45}
+
+    def test_strict_and_nonstrict_valid_cases(self):
+        strict, nonstrict = self.ds.strict_and_nonstrict_valid_cases(p_bounds=self.p_bounds)
+        self.assertEqual(strict, self.ds.valid_cases(p_bounds=self.p_bounds))
+        self.assertEqual(sorted(strict + nonstrict),
+                         sorted(self.ds.valid_cases(p_bounds=self.p_bounds, strict=False)))
+        self.assertEqual(set(strict) & set(nonstrict), set())
+
+    def test_repeated_query_is_cached(self):
+        cases = self.ds.valid_cases(p_bounds=self.p_bounds)
+        hits = self.ds.valid_cases_cache_info['hits']
+        self.assertEqual(self.ds.valid_cases(p_bounds=self.p_bounds), cases)
+        self.assertEqual(self.ds.valid_cases_cache_info['hits'], hits + 1)
+
+    def test_quantization(self):
+        ds = dspace.DesignSpace(dspace.Equations(EQUATIONS), valid_cases_quantization=0.1)
+        ds.valid_cases(p_bounds=self.p_bounds)
+        p_bounds = dict(self.p_bounds)
+        p_bounds['a1'] = 0.101
+        hits = ds.valid_cases_cache_info['hits']
+        ds.valid_cases(p_bounds=p_bounds)
+        self.assertEqual(ds.valid_cases_cache_info['hits'], hits + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+''' The bounding box index of the cases keeps every case whose box
+    intersects a slice.
+'''
+
+import unittest
+
+import dspace
+from dspace.models.designspace import _CaseBoundingBoxIndex
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+
+class CaseBoundingBoxIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        boxes = [{'a':(-2., 0.), 'b':(-1., 1.)},
+                 {'a':(1., 3.), 'b':(-1., 1.)},
+                 {'a':(-1., 2.), 'b':(2., 4.)},
+                 None,
+                 {'a':(0., -1.), 'b':(-1., 1.)}]
+        self.index = _CaseBoundingBoxIndex(['1', '2', '3', '4', '5'], ['a', 'b'], boxes)
+
+    def test_query_ranges(self):
+        self.assertEqual(self.index.query({'a':[1e-1, 1e1], 'b':[1e-1, 1e1]}),
+                         ['1', '2', '4', '5'])
+        self.assertEqual(self.index.query({'a':[1e-1, 1e1], 'b':[1e2, 1e3]}),
+                         ['3', '4'])
+
+    def test_query_points(self):
+        self.assertEqual(self.index.query({'a':1e-2, 'b':1.}), ['1', '4', '5'])
+        self.assertEqual(self.index.query({'a':1e5, 'b':1.}), ['4', '5'])
+
+    def test_query_boundary(self):
+        self.assertEqual(self.index.query({'a':1., 'b':10.}), ['1', '4', '5'])
+        self.assertEqual(self.index.query({'a':1., 'b':100.}), ['3', '4'])
+
+    def test_unknown_names_are_ignored(self):
+        self.assertEqual(self.index.query({'c':1e10}), ['1', '2', '3', '4', '5'])
+
+    def test_candidates(self):
+        self.assertEqual(self.index.candidates([1, 2, '3', 6], {'a':1e-2, 'b':1.}),
+                         ['1', '6'])
+        self.assertTrue('4' in self.index)
+        self.assertFalse('6' in self.index)
+
+
+class FilterValidCasesTest(unittest.TestCase):
+
+    def test_index_does_not_change_valid_cases(self):
+        p_bounds = {'a1':0.1, 'a2':[1e-3, 1e-1], 'X3':[1e-3, 1e-2], 'b1':0.45, 'b2':0.45}
+        indexed = dspace.DesignSpace(dspace.Equations(EQUATIONS), case_index=True)
+        plain = dspace.DesignSpace(dspace.Equations(EQUATIONS), case_index=False)
+        cases = [str(i) for i in xrange(1, plain.number_of_cases+1)]
+        self.assertEqual(indexed.filter_valid_cases(cases, p_bounds),
+                         plain.filter_valid_cases(cases, p_bounds))
+        self.assertEqual(indexed.valid_cases(p_bounds=p_bounds),
+                         plain.valid_cases(p_bounds=p_bounds))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+''' Results stored in a disk cache are found again under the same model and
+    arguments, and the results stored in a batch are committed together.
+'''
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import cPickle as pickle
+
+import dspace
+import dspace.diskcache
+from dspace.diskcache import DiskCache, arguments_key, model_key, batch, get_disk_cache
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+        self.cache = DiskCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def stored_rows(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_arguments_key(self):
+        self.assertEqual(arguments_key({'b':[1, 2.5], 'a':0.1}),
+                         arguments_key({'a':0.1, 'b':(1, 2.5)}))
+        self.assertNotEqual(arguments_key({'a':0.1}), arguments_key({'a':0.1000001}))
+
+    def test_put_and_get(self):
+        self.cache.put('model', 'valid_cases', {'a':(1., 2.)}, ['1', '3'])
+        self.assertEqual(self.cache.get('model', 'valid_cases', {'a':[1., 2.]}), ['1', '3'])
+        self.assertEqual(self.cache.get('model', 'valid_cases', {'a':(1., 3.)}), None)
+        self.assertEqual(self.cache.get('other', 'valid_cases', {'a':(1., 2.)}), None)
+        self.assertEqual(self.cache.get('model', 'vertices', {'a':(1., 2.)}), None)
+
+    def test_clear(self):
+        self.cache.put('model', 'valid_cases', None, ['1'])
+        self.cache.put('other', 'valid_cases', None, ['2'])
+        self.cache.clear('model')
+        self.assertEqual(self.cache.get('model', 'valid_cases', None), None)
+        self.assertEqual(self.cache.get('other', 'valid_cases', None), ['2'])
+        self.cache.clear()
+        self.assertEqual(self.cache.get('other', 'valid_cases', None), None)
+
+    def test_batch_commits_when_it_ends(self):
+        with batch(self.cache):
+            self.cache.put('model', 'bounding_box', '1', {})
+            with self.cache.batch():
+                self.cache.put('model', 'bounding_box', '2', {})
+            self.assertEqual(self.stored_rows(), 0)
+        self.assertEqual(self.stored_rows(), 2)
+        self.cache.put('model', 'bounding_box', '3', {})
+        self.assertEqual(self.stored_rows(), 3)
+
+    def test_batch_without_cache(self):
+        with batch(None) as disk_cache:
+            self.assertTrue(disk_cache is None)
+
+    def test_pickle(self):
+        cache = pickle.loads(pickle.dumps(self.cache))
+        self.cache.put('model', 'valid_cases', None, ['1'])
+        self.assertEqual(cache.get('model', 'valid_cases', None), ['1'])
+        cache.close()
+
+    def test_get_disk_cache(self):
+        self.assertTrue(get_disk_cache(None) is None)
+        self.assertTrue(get_disk_cache(self.cache) is self.cache)
+        self.assertEqual(get_disk_cache(self.path).path, self.path)
+        self.assertRaises(TypeError, get_disk_cache, 1)
+
+    def test_model_key_depends_on_versions(self):
+        key = model_key(EQUATIONS, None)
+        self.assertEqual(model_key(EQUATIONS, None), key)
+        self.assertNotEqual(model_key(EQUATIONS, ['X1 > X2']), key)
+        stored = dspace.diskcache.versions()
+        dspace.diskcache._versions = (stored[0] + '.dev', stored[1])
+        try:
+            self.assertNotEqual(model_key(EQUATIONS, None), key)
+        finally:
+            dspace.diskcache._versions = stored
+
+    def test_design_space_reuses_stored_results(self):
+        p_bounds = {'a1':0.1, 'a2':[1e-3, 1e3], 'X3':[1e-3, 1e3], 'b1':0.45, 'b2':0.45}
+        ds = dspace.DesignSpace(dspace.Equations(EQUATIONS), disk_cache=self.cache)
+        cases = ds.valid_cases(p_bounds=p_bounds)
+        self.assertTrue(self.stored_rows() > 0)
+        other = dspace.DesignSpace(dspace.Equations(EQUATIONS), disk_cache=self.cache)
+        self.assertEqual(self.cache.get(other._model_key, 'valid_cases',
+                                        other._valid_cases_key(p_bounds, True, False)),
+                         cases)
+        self.assertEqual(other.valid_cases(p_bounds=p_bounds), cases)
+
+
+if __name__ == '__main__':
+    unittest.main()
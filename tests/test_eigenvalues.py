@@ -0,0 +1,48 @@
+''' The dominant eigenvalue of a batch of eigenvalues is the one selected
+    by sorting the eigenvalues of each point by their real part.
+'''
+
+import unittest
+
+import numpy as np
+
+from dspace.plotutils.case_plot import dominant_eigenvalue
+
+
+def sorted_eigenvalue(eigenvalues, component='real', rank=1):
+    eig = sorted([(i.real, i.imag) for i in eigenvalues], key=lambda i: i[0])
+    rank = min(rank, len(eig))
+    if component == 'real':
+        return eig[-rank][0]
+    return eig[-rank][1]
+
+
+class DominantEigenvalueTest(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.eigenvalues = random.randn(50, 4) + 1j*random.randn(50, 4)
+        self.eigenvalues[:10, 1] = self.eigenvalues[:10, 0].conjugate()
+
+    def test_matches_sorted_eigenvalues(self):
+        for component in ['real', 'imag']:
+            for rank in [1, 2, 4]:
+                batch = dominant_eigenvalue(self.eigenvalues, component=component, rank=rank)
+                self.assertEqual(batch.shape, (50,))
+                expected = [sorted_eigenvalue(i, component=component, rank=rank)
+                            for i in self.eigenvalues]
+                self.assertTrue(np.allclose(batch, expected))
+
+    def test_rank_larger_than_system(self):
+        batch = dominant_eigenvalue(self.eigenvalues, rank=10)
+        self.assertTrue(np.allclose(batch, self.eigenvalues.real.min(axis=1)))
+
+    def test_single_point(self):
+        eigenvalues = np.array([-1+2j, 0.5-1j, -3+0j])
+        self.assertEqual(dominant_eigenvalue(eigenvalues), 0.5)
+        self.assertEqual(dominant_eigenvalue(eigenvalues, component='imag'), -1)
+        self.assertEqual(dominant_eigenvalue(eigenvalues, rank=2), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
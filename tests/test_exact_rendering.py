@@ -0,0 +1,67 @@
+''' Steady-state functions are rendered exactly from the case vertices only
+    when their expression is affine in logarithmic coordinates.
+'''
+
+import unittest
+
+import numpy as np
+
+import dspace
+import dspace.plotutils
+from dspace.plotutils.case_plot import affine_data, log_parameter_grid
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+PARAMETERS = {'a1':0.1, 'a2':1e-2, 'X3':1, 'b1':0.45, 'b2':0.45}
+
+AFFINE = ['log(X1)', 'log(X1*X2^2/a1)', 'ln(X2) - 0.5*log(a2^-1) + 3',
+          '2*log(sqrt(X1)*V_X2)', '-log(X1)', 'log(2) + 1']
+
+NOT_AFFINE = ['X1', 'log(X1 + X2)', 'log(X1)*log(X2)', 'log(X1)^2',
+              'log(X1)/X2', 'exp(log(X1))', 'log(X1^a1)', 'X1 + 3']
+
+
+class LogAffineTest(unittest.TestCase):
+
+    def test_affine_expressions(self):
+        for string in AFFINE:
+            self.assertTrue(dspace.Expression(string).is_log_affine(), string)
+
+    def test_other_expressions(self):
+        for string in NOT_AFFINE:
+            self.assertFalse(dspace.Expression(string).is_log_affine(), string)
+
+
+class AffineDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.pvals = dspace.VariablePool(names=self.ds.independent_variables)
+        self.pvals.update(PARAMETERS)
+        p_bounds = dict(self.pvals)
+        p_bounds['X3'] = [1e-4, 1e4]
+        p_bounds['a2'] = [1e-4, 1e4]
+        self.cases = [self.ds(i) for i in self.ds.valid_cases(p_bounds=p_bounds)]
+
+    def vertices(self, case, function):
+        return case.draw_2D_ss_function_data(function, self.pvals, 'X3', 'a2',
+                                             [1e-4, 1e4], [1e-4, 1e4], exact=True)
+
+    def test_affine_function_at_vertices(self):
+        for case in self.cases:
+            X, Y, Z, clim, path = self.vertices(case, 'log(X1*X2)')
+            self.assertEqual(np.ndim(X), 1)
+            params = log_parameter_grid(case, self.pvals, 'X3', 'a2', X, Y)
+            expected = case.ssystem.steady_state_function_grid('log(X1*X2)', params, log_in=True)
+            self.assertTrue(np.allclose(Z, expected))
+
+    def test_other_function_is_sampled(self):
+        for case in self.cases:
+            X, Y, Z, clim, path = self.vertices(case, 'X1')
+            self.assertEqual(np.ndim(X), 2)
+            self.assertTrue(affine_data(case, 'X1', self.pvals, 'X3', 'a2', path) is None)
+
+
+if __name__ == '__main__':
+    unittest.main()
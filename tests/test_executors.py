@@ -0,0 +1,105 @@
+''' The executors evaluate the tasks of an analysis in the order of the items
+    and stop waiting for them when the analysis is cancelled.
+'''
+
+import gc
+import unittest
+
+from dspace.executors import SerialExecutor, ThreadExecutor, ProcessExecutor
+from dspace.executors import get_executor
+
+
+class Model(object):
+
+    def __init__(self, offset):
+        self.offset = offset
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Canceller(object):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def check(self):
+        self.calls -= 1
+        if self.calls < 0:
+            raise Cancelled
+
+
+def add_offset(model, item, scale=1):
+    return scale*item + model.offset
+
+def wait_forever(model, item):
+    import time
+    time.sleep(60)
+
+
+class ExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model(10)
+        self.items = range(25)
+        self.expected = [2*i + 10 for i in self.items]
+
+    def test_serial(self):
+        self.assertEqual(SerialExecutor().map(add_offset, self.model, self.items, scale=2),
+                         self.expected)
+
+    def test_thread(self):
+        with ThreadExecutor(threads=4) as executor:
+            self.assertEqual(executor.map(add_offset, self.model, self.items, scale=2),
+                             self.expected)
+            self.assertEqual(executor.map(add_offset, self.model, [], scale=2), [])
+        self.assertTrue(executor._pool is None)
+
+    def test_process(self):
+        with ProcessExecutor(processes=2) as executor:
+            self.assertEqual(executor.map(add_offset, self.model, self.items, scale=2),
+                             self.expected)
+            pool = executor._pool
+            self.assertEqual(executor.map(add_offset, self.model, self.items, scale=2),
+                             self.expected)
+            self.assertTrue(executor._pool is pool)
+            model = Model(0)
+            self.assertEqual(executor.map(add_offset, model, self.items), self.items)
+            self.assertFalse(executor._pool is pool)
+        self.assertTrue(executor._pool is None)
+
+    def test_process_pool_closed_with_design_space(self):
+        executor = ProcessExecutor(processes=2)
+        model = Model(0)
+        executor.start(model)
+        self.assertFalse(executor._pool is None)
+        del model
+        gc.collect()
+        self.assertTrue(executor._pool is None)
+
+    def test_process_cancelled_while_waiting(self):
+        executor = ProcessExecutor(processes=2)
+        try:
+            self.assertRaises(Cancelled, executor._map, wait_forever, self.model,
+                              [1, 2], {}, canceller=Canceller(2))
+        finally:
+            executor._pool.terminate()
+            executor._pool = None
+
+    def test_serial_cancelled_between_items(self):
+        self.assertRaises(Cancelled, SerialExecutor()._map, add_offset, self.model,
+                          self.items, {}, canceller=Canceller(3))
+
+    def test_get_executor(self):
+        self.assertTrue(isinstance(get_executor(), SerialExecutor))
+        self.assertTrue(isinstance(get_executor('thread'), ThreadExecutor))
+        self.assertTrue(get_executor('process') is get_executor('process'))
+        executor = SerialExecutor()
+        self.assertTrue(get_executor(executor) is executor)
+        self.assertRaises(ValueError, get_executor, 'cluster')
+        self.assertRaises(TypeError, get_executor, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
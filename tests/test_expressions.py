@@ -0,0 +1,61 @@
+''' Compiled expressions evaluate to the same values as the C library. '''
+
+import unittest
+
+import numpy as np
+
+import dspace
+from dspace.expressions import _compiled_expressions
+
+EXPRESSIONS = ['X1*X2^2 + 3',
+               'X1^-1 - 2*X2/X3',
+               'log(X1) - log(X2) + ln(X3)',
+               'exp(X1)*sqrt(X2) + X3',
+               '-(X1 + X2)^0.5*X3^-2',
+               '1.5e-3*X1 + 0.5']
+
+VALUES = [{'X1':2., 'X2':3., 'X3':5.},
+          {'X1':0.1, 'X2':10., 'X3':0.25},
+          {'X1':1e-3, 'X2':1e3, 'X3':7.5}]
+
+
+class CompiledExpressionTest(unittest.TestCase):
+
+    def test_compile_matches_eval_with_values(self):
+        for string in EXPRESSIONS:
+            expr = dspace.Expression(string)
+            function = expr.compile()
+            for values in VALUES:
+                pvals = dspace.VariablePool(names=sorted(values))
+                pvals.update(values)
+                expected = expr.eval_with_values(p_vals=pvals)
+                self.assertTrue(np.allclose(function(values), expected, rtol=1e-10),
+                                string + ' at ' + str(values))
+
+    def test_compile_arrays(self):
+        arrays = {key:np.array([values[key] for values in VALUES]) for key in VALUES[0]}
+        for string in EXPRESSIONS:
+            expr = dspace.Expression(string)
+            result = expr.eval_with_arrays(arrays)
+            self.assertEqual(result.shape, (len(VALUES),))
+            for k in xrange(len(VALUES)):
+                pvals = dspace.VariablePool(names=sorted(VALUES[k]))
+                pvals.update(VALUES[k])
+                self.assertTrue(np.allclose(result[k], expr.eval_with_values(p_vals=pvals),
+                                            rtol=1e-10))
+
+    def test_compile_is_cached(self):
+        expr = dspace.Expression(EXPRESSIONS[0])
+        self.assertTrue(expr.compile() is dspace.Expression(EXPRESSIONS[0]).compile())
+
+    def test_compile_cache_is_bounded(self):
+        for k in xrange(_compiled_expressions.size + 10):
+            dspace.Expression('X1*' + str(k+1)).compile()
+        self.assertEqual(len(_compiled_expressions), _compiled_expressions.size)
+
+    def test_compile_rejects_unknown_functions(self):
+        self.assertRaises(ValueError, dspace.expressions._ExpressionCompiler('sin(X1)').compile)
+
+
+if __name__ == '__main__':
+    unittest.main()
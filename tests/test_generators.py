@@ -0,0 +1,65 @@
+''' The synthetic systems have the variables and number of cases set by their
+    size and number of terms, and their regulations are reproducible.
+'''
+
+import unittest
+
+import dspace
+from dspace.benchmarks.generators import chain, feedback_loop, cascade, gma_system
+
+
+class GeneratorsTest(unittest.TestCase):
+
+    def check(self, equations, number_of_variables, number_of_cases):
+        variables = ['X' + str(i) for i in xrange(1, number_of_variables+1)]
+        self.assertEqual(equations.dependent_variables, variables)
+        ds = dspace.DesignSpace(equations)
+        self.assertEqual(ds.dependent_variables, variables)
+        self.assertTrue('X0' in ds.independent_variables)
+        self.assertEqual(ds.number_of_cases, number_of_cases)
+        return ds
+
+    def test_chain(self):
+        self.check(chain(3), 3, 1)
+        self.check(chain(2, positive_terms=2, negative_terms=3), 2, 6**2)
+        ds = self.check(chain(1, positive_terms=3), 1, 3)
+        self.assertEqual(sorted(i for i in ds.independent_variables if i != 'X0'),
+                         ['k1N1', 'k1P1', 'k1P2', 'k1P3'])
+
+    def test_feedback_loop(self):
+        self.check(feedback_loop(3, positive_terms=2), 3, 8)
+        self.assertTrue('X3' in feedback_loop(3).system[0])
+        self.assertFalse('X3' in chain(3).system[0])
+        self.assertEqual(feedback_loop(4, sign='positive', seed=1).system,
+                         chain(4, feedback='positive', seed=1).system)
+
+    def test_cascade(self):
+        self.check(cascade(1), 2, 4*2)
+        self.check(cascade(2, positive_terms=3), 4, (6*4)**2)
+
+    def test_regulations(self):
+        equations = chain(4, regulations=3, seed=2)
+        self.assertEqual(chain(4, regulations=3, seed=2).system, equations.system)
+        self.assertNotEqual(chain(4).system, equations.system)
+        self.assertNotEqual(chain(4, regulations=3, seed=5).system, equations.system)
+        self.check(equations, 4, 1)
+        self.check(cascade(2, regulations=2, seed=3), 4, 8**2)
+
+    def test_gma_system(self):
+        self.assertEqual(gma_system('chain', 3, positive_terms=2).system,
+                         chain(3, positive_terms=2).system)
+        self.assertEqual(gma_system('feedback', 3).system, feedback_loop(3).system)
+        self.assertEqual(gma_system('cascade', 2).system, cascade(2).system)
+        self.assertRaises(ValueError, gma_system, 'ring', 3)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, chain, 0)
+        self.assertRaises(ValueError, chain, 2, negative_terms=0)
+        self.assertRaises(ValueError, chain, 2, feedback='mixed')
+        self.assertRaises(ValueError, chain, 2, regulations=10)
+        self.assertRaises(ValueError, cascade, 0)
+        self.assertRaises(ValueError, cascade, 2, positive_terms=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+''' The Apriori enumeration of case intersections finds the same valid
+    intersections as testing every combination of cases.
+'''
+
+import itertools
+import unittest
+
+import numpy as np
+
+import dspace
+from dspace.models.case import CaseIntersection
+from dspace.models.designspace import _apriori_intersections
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+
+class Intervals(object):
+    ''' Intervals that intersect if they share a common point, which makes
+        the validity of their intersections closed under subsets.
+    '''
+
+    def __init__(self, lower, upper):
+        self.lower = np.array(lower, dtype=float)[:,np.newaxis]
+        self.upper = np.array(upper, dtype=float)[:,np.newaxis]
+        self.tested = list()
+
+    def is_valid(self, members):
+        members = list(members)
+        return bool(self.lower[members].max() <= self.upper[members].min())
+
+    def test(self, candidates):
+        self.tested += candidates
+        return [self.is_valid(i) for i in candidates]
+
+    def brute_force(self, sizes):
+        number = len(self.lower)
+        return [current for size in sizes if size > 1
+                for current in itertools.combinations(xrange(number), size)
+                if self.is_valid(current) is True]
+
+
+class AprioriTest(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(1)
+        lower = random.uniform(0, 10, 12)
+        self.intervals = Intervals(lower, lower + random.uniform(0, 4, 12))
+
+    def test_matches_brute_force(self):
+        for sizes in [[2], [2, 3], [3, 4], [2, 3, 4, 5]]:
+            intersections = _apriori_intersections(len(self.intervals.lower), sizes,
+                                                   self.intervals.test)
+            self.assertEqual(sorted(intersections), sorted(self.intervals.brute_force(sizes)))
+
+    def test_candidates_have_valid_subsets(self):
+        _apriori_intersections(len(self.intervals.lower), [4], self.intervals.test)
+        for current in self.intervals.tested:
+            for subset in itertools.combinations(current, len(current)-1):
+                if len(subset) > 1:
+                    self.assertTrue(self.intervals.is_valid(subset))
+
+    def test_box_pruning(self):
+        intervals = self.intervals
+        number = len(intervals.lower)
+        intersections = _apriori_intersections(number, [2, 3], intervals.test,
+                                               intervals.lower, intervals.upper)
+        self.assertEqual(sorted(intersections), sorted(intervals.brute_force([2, 3])))
+        self.assertTrue(all([intervals.is_valid(i) for i in intervals.tested]))
+
+    def test_no_valid_pairs(self):
+        intervals = Intervals([0, 2, 4], [1, 3, 5])
+        self.assertEqual(_apriori_intersections(3, [2, 3], intervals.test), [])
+        self.assertEqual(len(intervals.tested), 3)
+
+
+class ValidIntersectingCasesTest(unittest.TestCase):
+
+    def test_matches_case_intersections(self):
+        ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        p_bounds = {'a1':0.1, 'a2':[1e-3, 1e3], 'X3':[1e-3, 1e3], 'b1':0.45, 'b2':0.45}
+        cases = ds.valid_cases(p_bounds=p_bounds, strict=False)
+        intersections = ds.valid_intersecting_cases([2, 3], cases, p_bounds=p_bounds)
+        expected = [list(current) for size in [2, 3]
+                    for current in itertools.combinations(cases, size)
+                    if CaseIntersection(ds(list(current))).is_valid(p_bounds=p_bounds) is True]
+        self.assertEqual(sorted(intersections), sorted(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+''' Profiles patch the SWIG functions of the dspace modules while they are
+    active, and record only the calls of the thread that entered them.
+'''
+
+import threading
+import unittest
+
+import dspace
+import dspace.models.designspace
+import dspace.SWIG.dspace_interface as dspace_interface
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+NAME = 'DSDesignSpaceNumberOfCases'
+
+
+class ProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.original = getattr(dspace_interface, NAME)
+
+    def current(self):
+        return vars(dspace.models.designspace)[NAME]
+
+    def test_patch_and_unpatch(self):
+        self.assertTrue(self.current() is self.original)
+        with dspace.profile() as p:
+            self.assertTrue(self.current()._original is self.original)
+            self.ds.number_of_cases
+        self.assertTrue(self.current() is self.original)
+        self.assertEqual(p.as_dict()[NAME]['calls'], 1)
+        self.ds.number_of_cases
+        self.assertEqual(p.as_dict()[NAME]['calls'], 1)
+
+    def test_nested_profiles(self):
+        with dspace.profile() as outer:
+            self.ds.number_of_cases
+            with dspace.profile(functions=[NAME]) as inner:
+                self.ds.number_of_cases
+                self.ds.signature
+            self.assertTrue(self.current()._original is self.original)
+            self.ds.number_of_cases
+        self.assertTrue(self.current() is self.original)
+        self.assertEqual(outer.as_dict()[NAME]['calls'], 3)
+        self.assertEqual(inner.stats.keys(), [NAME])
+        self.assertEqual(inner.as_dict()[NAME]['calls'], 1)
+
+    def test_unpatched_after_exception(self):
+        try:
+            with dspace.profile():
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertTrue(self.current() is self.original)
+
+    def test_other_threads_are_not_recorded(self):
+        thread = threading.Thread(target=lambda: self.ds.number_of_cases)
+        with dspace.profile() as p:
+            thread.start()
+            thread.join()
+        self.assertFalse(NAME in p.stats)
+
+    def test_report(self):
+        with dspace.profile() as p:
+            self.ds.number_of_cases
+        self.assertTrue(NAME in p.report(sort='calls'))
+        self.assertRaises(ValueError, p.report, sort='name')
+        p.clear()
+        self.assertEqual(p.stats, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+''' Incremental slider updates find the same valid cases and regions as
+    drawing the slice again.
+'''
+
+import unittest
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import dspace
+import dspace.plotutils
+from dspace.plotutils.designspace_plot import SliderCallback
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+PARAMETERS = {'a1':0.1, 'a2':1e-2, 'X3':1, 'b1':0.45, 'b2':0.45}
+
+
+class Slider(object):
+
+    def __init__(self, val):
+        self.val = val
+
+
+class SliderCallbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.pvals = dspace.VariablePool(names=self.ds.independent_variables)
+        self.pvals.update(PARAMETERS)
+        self.ranges = ([1e-4, 1e4], [1e-4, 1e4])
+
+    def callback(self, pvals):
+        ax = Figure().add_subplot(111)
+        FigureCanvasAgg(ax.figure)
+        sliders = {'b1':Slider(-0.35), 'a1':Slider(-1.)}
+        return SliderCallback(self.ds, sliders, [], {}, ax, pvals, 'X3', 'a2',
+                              self.ranges[0], self.ranges[1], debounce=0)
+
+    def p_bounds(self, pvals):
+        p_bounds = dict(pvals)
+        p_bounds['X3'] = self.ranges[0]
+        p_bounds['a2'] = self.ranges[1]
+        return p_bounds
+
+    def test_update_validity(self):
+        callback = self.callback(self.pvals.copy())
+        callback.validity = self.ds.strict_and_nonstrict_valid_cases(p_bounds=self.p_bounds(self.pvals))
+        for value in [1e-3, 10., 1e3]:
+            pvals = self.pvals.copy()
+            pvals['b1'] = value
+            p_bounds = self.p_bounds(pvals)
+            self.assertEqual(callback.update_validity(['b1'], p_bounds),
+                             self.ds.strict_and_nonstrict_valid_cases(p_bounds=p_bounds))
+
+    def test_incremental_regions(self):
+        callback = self.callback(self.pvals.copy())
+        callback.update()
+        callback.sliders['b1'].val = 2.
+        callback.update()
+        fresh = self.callback(self.pvals.copy())
+        fresh.sliders['b1'].val = 2.
+        fresh.update()
+        self.assertEqual(sorted(callback.regions.keys()), sorted(fresh.regions.keys()))
+        self.assertEqual(callback.validity, fresh.validity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+''' The vectorized steady-state and eigenvalue evaluation of an S-system
+    matches the evaluation of each parameter set with the C library.
+'''
+
+import unittest
+
+import numpy as np
+
+import dspace
+
+EQUATIONS = ['X1. = a1 + a2*X3 - b1*X1',
+             'X2. = b1*X1 + a2*X3^2 - b2*X2']
+
+PARAMETERS = {'a1':0.1, 'a2':1e-2, 'X3':1, 'b1':0.45, 'b2':0.45}
+
+
+class SteadyStateGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ds = dspace.DesignSpace(dspace.Equations(EQUATIONS))
+        self.pvals = dspace.VariablePool(names=self.ds.independent_variables)
+        self.pvals.update(PARAMETERS)
+        self.cases = [self.ds(i) for i in self.ds.valid_cases(expand_cycles=False)]
+        self.assertTrue(len(self.cases) > 0)
+        X3, a2 = np.meshgrid(np.logspace(-4, 4, 5), np.logspace(-3, 0, 4))
+        self.grid = dict(self.pvals)
+        self.grid.update(X3=X3, a2=a2)
+        self.shape = X3.shape
+
+    def point(self, index):
+        pvals = self.pvals.copy()
+        pvals['X3'] = self.grid['X3'][index]
+        pvals['a2'] = self.grid['a2'][index]
+        return pvals
+
+    def test_steady_state_grid(self):
+        for case in self.cases:
+            grid = case.steady_state_grid(self.grid)
+            for index in np.ndindex(*self.shape):
+                steady_state = case.steady_state(self.point(index))
+                for name in steady_state:
+                    self.assertEqual(grid[name].shape, self.shape)
+                    self.assertTrue(np.allclose(grid[name][index], steady_state[name], rtol=1e-8))
+
+    def test_steady_state_grid_log(self):
+        for case in self.cases:
+            grid = case.steady_state_grid(self.grid, log_out=True)
+            for index in np.ndindex(*self.shape):
+                steady_state = case.ssystem.steady_state(self.point(index), log_out=True)
+                for name in steady_state:
+                    self.assertTrue(np.allclose(grid[name][index], steady_state[name], rtol=1e-8))
+
+    def test_steady_state_flux_grid(self):
+        for case in self.cases:
+            grid = case.steady_state_flux_grid(self.grid)
+            for index in np.ndindex(*self.shape):
+                flux = case.steady_state_flux(self.point(index))
+                for name in flux:
+                    self.assertEqual(grid[name].shape, self.shape)
+                    self.assertTrue(np.allclose(grid[name][index], flux[name], rtol=1e-8))
+
+    def test_eigenvalues_batch(self):
+        names = self.ds.independent_variables
+        for case in self.cases:
+            ssystem = case.ssystem.remove_algebraic_constraints()
+            points = [self.point(index) for index in np.ndindex(*self.shape)]
+            values = np.array([[pvals[name] for name in names] for pvals in points])
+            batch = ssystem.eigenvalues_batch(values)
+            self.assertEqual(batch.shape, (len(points), len(ssystem.dependent_variables)))
+            for k in xrange(len(points)):
+                steady_state = ssystem.steady_state(points[k])
+                flux = ssystem.steady_state_flux(points[k])
+                turnover = np.array([[flux['V_'+i]/steady_state[i]]
+                                     for i in ssystem.dependent_variables])
+                expected = np.linalg.eigvals(turnover*np.array(ssystem.Ad))
+                self.assertTrue(np.allclose(np.sort_complex(batch[k]),
+                                            np.sort_complex(expected),
+                                            rtol=1e-8, atol=1e-12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+''' The bulk values of a VariablePool match the values of its variables and
+    of the wrapped C variable pool.
+'''
+
+import unittest
+
+import cPickle as pickle
+
+import numpy as np
+
+import dspace
+
+
+class VariablePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = dspace.VariablePool(names=['b', 'a', 'c'])
+
+    def test_set_values(self):
+        self.pool.set_values(np.array([1., 2.5, 1e-3]))
+        self.assertEqual(self.pool.keys(), ['b', 'a', 'c'])
+        self.assertEqual(dict(self.pool), {'b':1., 'a':2.5, 'c':1e-3})
+        self.assertTrue(np.allclose(self.pool.values_as_array(), [1., 2.5, 1e-3]))
+        expr = dspace.Expression('a*b + c')
+        self.assertTrue(np.allclose(expr.eval_with_values(p_vals=self.pool), 2.501))
+
+    def test_set_values_checks_length(self):
+        self.assertRaises(ValueError, self.pool.set_values, [1., 2.])
+
+    def test_values_as_array_follows_assignments(self):
+        self.pool['a'] = 4
+        self.pool['c'] = 0.5
+        self.assertTrue(np.allclose(self.pool.values_as_array(), [1., 4., 0.5]))
+        self.pool['d'] = 2
+        self.assertEqual(self.pool.keys(), ['b', 'a', 'c', 'd'])
+        self.assertTrue(np.allclose(self.pool.values_as_array(), [1., 4., 0.5, 2.]))
+
+    def test_empty_pool(self):
+        self.assertEqual(len(dspace.VariablePool().values_as_array()), 0)
+
+    def test_pickle(self):
+        self.pool.set_values([3., 2., 1.])
+        pool = pickle.loads(pickle.dumps(self.pool))
+        self.assertEqual(pool.keys(), self.pool.keys())
+        self.assertTrue(np.allclose(pool.values_as_array(), [3., 2., 1.]))
+
+
+if __name__ == '__main__':
+    unittest.main()